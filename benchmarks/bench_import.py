@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import pytest
+
+# Seconds allowed for "from xastools.io import load" in a fresh interpreter,
+# on top of the time to import xarray itself
+budget = float(os.environ.get("XASTOOLS_IMPORT_BUDGET", 0.25))
+
+
+def importTime(statement):
+    code = ("import time; t = time.perf_counter(); "
+            f"{statement}; print(time.perf_counter() - t)")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, check=True, env=env)
+    return float(out.stdout)
+
+
+@pytest.mark.benchmark(group="import")
+def bench_import_load(benchmark):
+    base = min(importTime("import xarray") for n in range(3))
+    # Times measured in the subprocess, as benchmark.stats is None under
+    # --benchmark-disable
+    times = []
+
+    def run():
+        times.append(importTime("from xastools.io import load"))
+    benchmark.pedantic(run, rounds=5)
+    # --benchmark-disable runs only one round
+    while len(times) < 3:
+        run()
+    assert min(times) - base < budget
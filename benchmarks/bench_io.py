@@ -0,0 +1,51 @@
+import pytest
+from xastools.io import (load, exportXASToSSRL, exportXASToYaml,
+                         exportXASToAthena)
+from xastools.io.ssrlExport import loadFromSSRL
+from xastools.io.yamlExport import loadFromYaml
+
+
+@pytest.mark.benchmark(group="load")
+def bench_loadFromSSRL(benchmark, files):
+    benchmark(loadFromSSRL, files["dat"][0])
+
+
+@pytest.mark.benchmark(group="load")
+def bench_loadFromYaml(benchmark, files):
+    benchmark(loadFromYaml, files["yaml"][0])
+
+
+@pytest.mark.benchmark(group="load")
+def bench_load_many(benchmark, files):
+    benchmark(load, files["dat"])
+
+
+@pytest.mark.benchmark(group="export")
+@pytest.mark.parametrize("exporter", [exportXASToSSRL, exportXASToYaml,
+                                      exportXASToAthena],
+                         ids=["ssrl", "yaml", "athena"])
+def bench_export(benchmark, xas, exporter, tmp_path):
+    benchmark(exporter, xas, str(tmp_path), namefmt="bench.out",
+              increment=False)
+
+
+@pytest.mark.benchmark(group="dtype")
+@pytest.mark.parametrize("dtype", [None, "compact"])
+def bench_load_dtype(benchmark, files, dtype):
+    """
+    Loading time, with the resident size of the data in extra_info
+    """
+    xas = benchmark(load, files["dat"], dtype)
+    benchmark.extra_info["nbytes"] = int(xas.data.nbytes)
+
+
+@pytest.mark.benchmark(group="dtype")
+@pytest.mark.parametrize("dtype", [None, "compact"])
+def bench_getData_dtype(benchmark, xas, dtype):
+    """
+    getData promotes compact storage to float64 for the selected columns
+    """
+    xas = xas.astype(dtype)
+    detectors = [c for c in xas.columns if c.startswith("SDD")]
+    benchmark.extra_info["nbytes"] = int(xas.data.nbytes)
+    benchmark(xas.getData, detectors, divisor="I0", offsetMono=True)
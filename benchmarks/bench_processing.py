@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+from xastools.background import lsdf, snip1d, itersnip, lls
+from xastools.rixstools import maskRegion, makeTrap
+
+
+@pytest.fixture(scope="module")
+def emission(size):
+    """
+    Low-count emission spectrum with a few peaks, npts bins
+    """
+    nscans, npts, nchannels = size
+    rng = np.random.default_rng(0)
+    x = np.arange(npts)
+    lam = 5 + sum(200*np.exp(-0.5*((x - c*npts)/10)**2)
+                  for c in [0.2, 0.5, 0.8])
+    return rng.poisson(lam).astype(float)
+
+
+@pytest.fixture(scope="module")
+def rixsMap(size):
+    nscans, npts, nchannels = size
+    x = np.linspace(700, 720, npts)
+    y = np.linspace(600, 750, 256)
+    z = np.random.default_rng(0).poisson(10, (len(y), len(x))).astype(float)
+    return {'x': x, 'y': y, 'z': z}
+
+
+@pytest.mark.benchmark(group="background")
+def bench_snip1d(benchmark, emission):
+    benchmark(snip1d, lls(emission), 20)
+
+
+@pytest.mark.benchmark(group="background")
+def bench_itersnip(benchmark, emission):
+    benchmark(itersnip, lls(emission), 20, 8)
+
+
+@pytest.mark.benchmark(group="background")
+def bench_lsdf(benchmark, emission):
+    benchmark(lsdf, emission, 10)
+
+
+@pytest.mark.benchmark(group="rixs")
+def bench_maskRegion(benchmark, rixsMap):
+    region = makeTrap(700, 680, 720, 700, 5)
+    benchmark(maskRegion, rixsMap, region)
+
+
+@pytest.fixture(scope="module")
+def mca(size):
+    """
+    (npts, 1024) MCA counts per scan point
+    """
+    nscans, npts, nchannels = size
+    rng = np.random.default_rng(0)
+    return rng.poisson(5, (npts, 1024)).astype(np.int32)
+
+
+@pytest.mark.benchmark(group="roi")
+def bench_integrate_rois(benchmark, mca):
+    from xastools.roi import integrate_rois
+    from xastools.utils import roiDefaults
+    energy = np.linspace(0, 1600, mca.shape[-1])
+    benchmark(integrate_rois, mca, energy, list(roiDefaults))
+
+
+@pytest.mark.benchmark(group="lcf")
+@pytest.mark.parametrize("maxSubset", [10, 0])
+def bench_lcf(benchmark, size, maxSubset):
+    """
+    nscans*10 spectra against 4 references; maxSubset=0 is one scipy nnls
+    call per spectrum
+    """
+    from xastools.lcf import lcf
+    nscans, npts, nchannels = size
+    x = np.linspace(700, 720, npts)
+    library = {str(c): (x, 1 + np.tanh(x - c)) for c in [704, 706, 708, 710]}
+    rng = np.random.default_rng(0)
+    w = rng.random((10*nscans, 4))
+    spectra = w @ np.array([y for _, y in library.values()])
+    benchmark(lcf, spectra, x, library, None, maxSubset)
+
+
+@pytest.fixture(scope="module")
+def similarityIndex(size):
+    """
+    Index of nscans*20 random fingerprints on an npts grid
+    """
+    from xastools.similarity import SimilarityIndex
+    nscans, npts, nchannels = size
+    index = SimilarityIndex(np.linspace(700, 720, npts))
+    rng = np.random.default_rng(0)
+    for n, row in enumerate(rng.random((20*nscans, npts))):
+        index._store(str(n), row)
+    return index
+
+
+@pytest.mark.benchmark(group="similarity")
+@pytest.mark.parametrize("ncomp", [None, 20])
+def bench_similarity_query(benchmark, similarityIndex, ncomp):
+    """
+    100 queries at once, on the fingerprints or on 20 PCA scores
+    """
+    if ncomp is not None:
+        similarityIndex.compress(ncomp)
+    else:
+        similarityIndex.components = None
+        similarityIndex._reduced = None
+    queries = similarityIndex.matrix[:100] + 0.01
+    benchmark(similarityIndex.query, queries, 5)
+
+
+@pytest.mark.benchmark(group="window")
+@pytest.mark.parametrize("precomputed", [False, True])
+def bench_normalize_windows(benchmark, xas, precomputed):
+    """
+    Pre-edge fit and tail normalization of every scan and detector, with
+    the energy windows searched on every call or taken from XAS.window
+    """
+    from xastools.background import fit_preedge
+    from xastools.utils import tailNorm
+    detectors = [c for c in xas.columns if c.startswith("SDD")]
+    x, y = xas.getData(detectors, individual=True, squeeze=False)
+    e = x.data[0]
+    y = y.transpose("scan", "ch", "index").data.reshape(-1, len(e))
+
+    def run():
+        if precomputed:
+            pre, post = xas.window(700, 704), xas.window(712, 720)
+        for c in y:
+            if precomputed:
+                fit_preedge(e, c, None, None, pre)
+                tailNorm(c, pre=pre, post=post)
+            else:
+                fit_preedge(e, c, 700, 704)
+                idx = (e >= 700) & (e <= 704)
+                tailNorm(c, pre=idx, post=(e >= 712) & (e <= 720))
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="downsample")
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def bench_downsample(benchmark, size, method):
+    """
+    nscans*10 scans of npts*20 points, down to 200 points each
+    """
+    from xastools.downsample import downsample
+    nscans, npts, nchannels = size
+    x = np.linspace(700, 720, 20*npts)
+    y = np.random.default_rng(0).random((10*nscans, len(x)))
+    benchmark(downsample, x, y, 200, method, 705, 715)
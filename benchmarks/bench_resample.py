@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from benchdata import makeColumns, makeHeader, makeScanArray
+from xastools.xas import XAS
+from xastools.resample import grid_edges, interp_scans, rebin_scans
+
+# Many short scans, each on its own jittered grid. The vectorized
+# resampling and the per-scan np.interp loop it replaces are benchmarked
+# side by side (same group and param), so the speedup shows in the table
+# and in --benchmark-compare.
+NSCANS, NPTS, NCHANNELS = 1000, 500, 8
+
+
+@pytest.fixture(scope="module")
+def jittered():
+    data = makeScanArray(NSCANS, NPTS, NCHANNELS)
+    rng = np.random.default_rng(1)
+    data[..., 0] += rng.uniform(-0.02, 0.02, (NSCANS, 1))
+    return data
+
+
+@pytest.fixture(scope="module")
+def grid():
+    return np.linspace(701, 719, NPTS)
+
+
+def interpLoop(x, y, grid):
+    """
+    np.interp per scan and channel
+    """
+    out = np.empty((x.shape[0], len(grid), y.shape[2]))
+    for s in range(x.shape[0]):
+        for c in range(y.shape[2]):
+            out[s, :, c] = np.interp(grid, x[s], y[s, :, c])
+    return out
+
+
+def rebinLoop(x, y, grid):
+    """
+    Cumulative counts interpolated at the bin edges, per scan and channel
+    """
+    targets = grid_edges(grid)
+    out = np.empty((x.shape[0], len(grid), y.shape[2]))
+    for s in range(x.shape[0]):
+        edges = grid_edges(x[s])
+        for c in range(y.shape[2]):
+            cumulative = np.concatenate([[0], np.cumsum(y[s, :, c])])
+            out[s, :, c] = np.diff(np.interp(targets, edges, cumulative))
+    return out
+
+
+@pytest.mark.benchmark(group="resample")
+@pytest.mark.parametrize("method", ["linear", "bin"])
+def bench_resample_arrays(benchmark, jittered, grid, method):
+    f, loop = ((interp_scans, interpLoop) if method == "linear"
+               else (rebin_scans, rebinLoop))
+    x, y = jittered[..., 0], jittered[..., 1:]
+    baseline = f"bench_resample_loop_baseline[{method}]"
+    benchmark.extra_info["baseline"] = baseline
+    out = benchmark(f, x, y, grid)
+    assert np.allclose(out, loop(x, y, grid), equal_nan=True)
+
+
+@pytest.mark.benchmark(group="resample")
+@pytest.mark.parametrize("method", ["linear", "bin"])
+def bench_resample_loop_baseline(benchmark, jittered, grid, method):
+    loop = interpLoop if method == "linear" else rebinLoop
+    benchmark(loop, jittered[..., 0], jittered[..., 1:], grid)
+
+
+@pytest.mark.benchmark(group="resample")
+def bench_getData_heterogeneous(benchmark, jittered):
+    header = makeHeader(NCHANNELS, scan=list(range(1, NSCANS + 1)))
+    xas = XAS.from_scan_array(jittered, header)
+    detectors = [c for c in makeColumns(NCHANNELS) if c.startswith("SDD")]
+    benchmark(xas.getData, detectors, divisor="I0")
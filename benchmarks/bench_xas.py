@@ -0,0 +1,103 @@
+import copy
+import pytest
+from benchdata import makeHeader, makeScanArray
+from xastools.xas import XAS
+
+
+@pytest.mark.benchmark(group="construct")
+def bench_from_data_header(benchmark, size):
+    nscans, npts, nchannels = size
+    data = makeScanArray(1, npts, nchannels)[0]
+    header = makeHeader(nchannels)
+    benchmark(lambda: XAS.from_data_header(data, copy.deepcopy(header)))
+
+
+@pytest.mark.benchmark(group="construct")
+def bench_from_scan_array(benchmark, size):
+    data = makeScanArray(*size)
+    header = makeHeader(size[2], scan=list(range(size[0])))
+    benchmark(lambda: XAS.from_scan_array(data, copy.deepcopy(header)))
+
+
+@pytest.mark.benchmark(group="construct")
+def bench_add_chain(benchmark, size):
+    nscans, npts, nchannels = size
+    data = makeScanArray(*size)
+    spectra = [XAS.from_data_header(data[n], makeHeader(nchannels, scan=n))
+               for n in range(nscans)]
+
+    def chain():
+        total = None
+        for s in spectra:
+            total = s + total
+        return total
+    benchmark(chain)
+
+
+@pytest.mark.benchmark(group="getData")
+@pytest.mark.parametrize("offsetMono", [False, True])
+def bench_getData(benchmark, xas, offsetMono):
+    detectors = [c for c in xas.columns if c.startswith("SDD")]
+    benchmark(xas.getData, detectors, divisor="I0", offsetMono=offsetMono)
+
+
+@pytest.mark.benchmark(group="align")
+@pytest.mark.parametrize("method", ["peak", "xcorr"])
+def bench_findMonoOffset(benchmark, xas, method):
+    benchmark(xas.findMonoOffset, "fe", col="REF", method=method)
+
+
+@pytest.mark.benchmark(group="getData")
+@pytest.mark.parametrize("error", ["poisson", "empirical"])
+def bench_coadd(benchmark, xas, error):
+    detectors = [c for c in xas.columns if c.startswith("SDD")]
+    benchmark(xas.coadd, detectors, divisor="I0", error=error, chunksize=25)
+
+
+@pytest.mark.benchmark(group="getData")
+def bench_deglitch(benchmark, xas):
+    """
+    Flags every detector column of every scan; getData then reuses the mask
+    """
+    detectors = [c for c in xas.columns if c.startswith("SDD")]
+    benchmark(xas.deglitch, detectors + ["I0"])
+
+
+@pytest.mark.benchmark(group="getData")
+@pytest.mark.parametrize("deglitch", ["interp", "mask"])
+def bench_getData_deglitch(benchmark, xas, deglitch):
+    detectors = [c for c in xas.columns if c.startswith("SDD")]
+    xas.deglitch(detectors + ["I0"])
+    benchmark(xas.getData, detectors, divisor="I0", deglitch=deglitch)
+
+
+@pytest.mark.benchmark(group="getData")
+def bench_sumDetectors(benchmark, xas):
+    detectors = [c for c in xas.columns if c.startswith("SDD")]
+
+    def run():
+        xas.sumDetectors(detectors, name="SUM")
+        xas.dropColumns(["SUM"])
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="decompose")
+@pytest.mark.parametrize("method", ["full", "randomized", "incremental"])
+def bench_decompose(benchmark, xas, method):
+    benchmark(xas.decompose, "SDD0", ncomp=3, method=method, divisor="I0",
+              chunksize=25)
+
+
+@pytest.mark.benchmark(group="transfer")
+@pytest.mark.parametrize("shared", [False, True])
+def bench_transfer(benchmark, xas, shared):
+    """
+    What a process pool does per task: pickle in the parent, unpickle in
+    the worker. With shared, the data stays in one shared memory segment.
+    """
+    import pickle
+    if not shared:
+        benchmark(lambda: pickle.loads(pickle.dumps(xas)))
+        return
+    with xas.toShared() as handle:
+        benchmark(lambda: pickle.loads(pickle.dumps(handle)).attach())
@@ -0,0 +1,70 @@
+"""
+Synthetic data generators for the benchmarks, sized as
+(nscans, npts, nchannels)
+"""
+import numpy as np
+from xastools.xas import XAS
+from xastools.io import exportToSSRL, exportToYaml
+
+# (nscans, npts, nchannels)
+sizes = {"small": (10, 500, 8), "large": (100, 2000, 16)}
+
+
+def makeColumns(nchannels):
+    """
+    MONO, I0 and REF, padded with detector channels up to nchannels
+    """
+    return ["MONO", "I0", "REF"] + [f"SDD{n}" for n in range(nchannels - 3)]
+
+
+def makeHeader(nchannels, scan=1, sample="bench"):
+    cols = makeColumns(nchannels)
+    return {'scaninfo': {'sample': sample, 'loadid': 'bench', 'scan': scan,
+                         'date': '2024-03-01 12:00', 'command': 'bench',
+                         'element': 'fe'},
+            'motors': {},
+            'channelinfo': {'cols': cols,
+                            'weights': {c: 1.0 for c in cols},
+                            'offsets': {c: 0.0 for c in cols}}}
+
+
+def makeScanArray(nscans, npts, nchannels, seed=0, edge=706.9):
+    """
+    Synthetic Fe L-edge scans of shape (nscans, npts, nchannels). MONO spans
+    700-720 eV, REF has a peak near edge with a small random shift per scan,
+    and the other channels are Poisson counts on an edge step.
+    """
+    rng = np.random.default_rng(seed)
+    mono = np.linspace(700, 720, npts)
+    shifts = rng.normal(0, 0.2, nscans)[:, np.newaxis]
+    peak = np.exp(-0.5*((mono - edge - shifts)/0.5)**2)
+    step = 1 + 0.5*(1 + np.tanh(mono - edge - shifts))
+    data = np.empty((nscans, npts, nchannels))
+    data[..., 0] = mono
+    data[..., 1] = rng.poisson(10000, (nscans, npts))
+    data[..., 2] = 1000*peak + rng.poisson(100, (nscans, npts))
+    lam = 200*step[..., np.newaxis]*np.ones(nchannels - 3)
+    data[..., 3:] = rng.poisson(lam)
+    return data
+
+
+def makeXAS(nscans, npts, nchannels, seed=0):
+    data = makeScanArray(nscans, npts, nchannels, seed)
+    header = makeHeader(nchannels, scan=list(range(1, nscans + 1)))
+    return XAS.from_scan_array(data, header)
+
+
+def writeFiles(folder, nscans, npts, nchannels, fmt="dat"):
+    data = makeScanArray(nscans, npts, nchannels)
+    filenames = []
+    for n in range(nscans):
+        name = f"bench_{n + 1}.{fmt}"
+        header = makeHeader(nchannels, scan=n + 1)
+        if fmt == "dat":
+            exportToSSRL(str(folder), data[n], header, namefmt=name,
+                         verbose=False)
+        else:
+            exportToYaml(str(folder), data[n], header, namefmt=name,
+                         verbose=False)
+        filenames.append(str(folder / name))
+    return filenames
@@ -0,0 +1,57 @@
+"""
+Benchmarks of the xastools hot paths, using pytest-benchmark.
+
+Run from this directory so that pytest.ini is picked up:
+
+    cd benchmarks && python -m pytest
+
+Each run is saved under benchmarks/.benchmarks, tagged with the commit.
+To flag regressions against the previous saved run:
+
+    python -m pytest --benchmark-compare --benchmark-compare-fail=mean:25%
+
+which fails if any benchmark's mean time grew by more than 25%. Use
+--benchmark-compare=NNNN to compare against a specific saved run, or -k
+to run a subset.
+"""
+import pytest
+from benchdata import sizes, makeXAS, writeFiles
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(params=list(sizes), scope="module")
+def size(request):
+    return sizes[request.param]
+
+
+@pytest.fixture(scope="module")
+def pristineXAS(size):
+    return makeXAS(*size)
+
+
+@pytest.fixture
+def xas(pristineXAS):
+    """
+    Fresh copy for each benchmark, as some (deglitch, findMonoOffset,
+    sumDetectors) change the object they run on
+    """
+    return pristineXAS.copy()
+
+
+@pytest.fixture
+def spectrum(size):
+    """
+    Single-scan XAS of the given size
+    """
+    nscans, npts, nchannels = size
+    return makeXAS(1, npts, nchannels)
+
+
+@pytest.fixture(scope="module")
+def files(size, tmp_path_factory):
+    """
+    nscans SSRL and YAML files of the given size
+    """
+    folder = tmp_path_factory.mktemp("bench")
+    return {fmt: writeFiles(folder, *size, fmt=fmt) for fmt in ["dat", "yaml"]}
@@ -0,0 +1,113 @@
+import copy
+import numpy as np
+import pytest
+from xastools.io import exportToSSRL, exportToYaml
+from xastools.xas import XAS
+
+
+def makeHeader(sample="sample1", scan=1, cols=("MONO", "I0", "REF", "TEY")):
+    header = {'scaninfo': {'sample': sample, 'loadid': 'load1',
+                           'date': '2024-03-01 12:00', 'command': 'scan mono',
+                           'scan': scan},
+              'motors': {'samplex': 1.0, 'sampley': 2.0},
+              'channelinfo': {'cols': list(cols),
+                              'weights': {c: 1.0 for c in cols},
+                              'offsets': {c: 0.0 for c in cols}}}
+    return header
+
+
+def makeData(npts=100, ncols=4, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.poisson(1000, size=(npts, ncols)).astype(float)
+    data[:, 0] = np.linspace(700, 720, npts)
+    return data
+
+
+def makeXAS(columns, scans=None, sample="s", dtype=None, **channelinfo):
+    """
+    Multi-scan XAS from a dictionary of {col: values}, each broadcast to
+    (nscans, npts)
+
+    :param scans: scan labels, defaults to 0, 1, ... nscans - 1
+    :param channelinfo: e.g. offsets and weights dictionaries
+    """
+    values = [np.asarray(v, dtype=float) for v in columns.values()]
+    shape = np.broadcast_shapes(*[v.shape for v in values])
+    if scans is None:
+        scans = range(shape[0] if len(shape) > 1 else 1)
+    shape = np.broadcast_shapes(shape, (len(scans), 1))
+    data = np.stack([np.broadcast_to(v, shape) for v in values], axis=-1)
+    header = {'scaninfo': {'sample': sample, 'scan': list(scans)},
+              'motors': {},
+              'channelinfo': dict(channelinfo, cols=list(columns))}
+    return XAS.from_scan_array(data, header, dtype=dtype)
+
+
+def makeEdgeScans(nscans=10, npts=200, seed=0, detectors=("TEY",)):
+    """
+    Scans over an L-edge: Poisson I0, a REF peak at 706.9 eV, and Poisson
+    counts of an edge step in each detector column
+    """
+    rng = np.random.default_rng(seed)
+    mono = np.linspace(700, 720, npts)
+    step = 200*(1.5 + 0.5*np.tanh(mono - 706.9))
+    columns = {"MONO": mono, "I0": rng.poisson(10000, (nscans, npts)),
+               "REF": 1000*np.exp(-0.5*((mono - 706.9)/0.5)**2) + 100}
+    counts = rng.poisson(step[:, np.newaxis], (nscans, npts, len(detectors)))
+    columns.update({d: counts[..., n] for n, d in enumerate(detectors)})
+    return makeXAS(columns)
+
+
+@pytest.fixture
+def scanXAS():
+    """
+    makeXAS, for tests
+    """
+    return makeXAS
+
+
+@pytest.fixture
+def edgeScans():
+    """
+    makeEdgeScans, for tests
+    """
+    return makeEdgeScans
+
+
+@pytest.fixture
+def scanHeader():
+    """
+    makeHeader, for tests (importing conftest is ambiguous when the
+    benchmarks are collected too)
+    """
+    return makeHeader
+
+
+@pytest.fixture
+def scanData():
+    """
+    makeData, for tests
+    """
+    return makeData
+
+
+@pytest.fixture
+def spectrumFiles(tmp_path):
+    """
+    Writes n synthetic spectra in the given format, returns the filenames
+    """
+    def _make(n=3, fmt="dat", sample="sample1", npts=100):
+        filenames = []
+        for scan in range(1, n + 1):
+            header = makeHeader(sample, scan)
+            data = makeData(npts, len(header['channelinfo']['cols']), seed=scan)
+            name = f"{sample}_{scan}.{fmt}"
+            if fmt == "dat":
+                exportToSSRL(str(tmp_path), data, copy.deepcopy(header),
+                             namefmt=name, verbose=False)
+            else:
+                exportToYaml(str(tmp_path), data, copy.deepcopy(header),
+                             namefmt=name, verbose=False)
+            filenames.append(str(tmp_path / name))
+        return filenames
+    return _make
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from xastools.align import xcorr_lags, StreamingAligner
+
+
+def makeDriftingXAS(scanXAS, scans, drift, npts=400, seed=0):
+    """
+    REF peak at 706.9 eV seen at 706.9 - drift by the mono, drifting
+    linearly with scan number
+    """
+    rng = np.random.default_rng(seed)
+    mono = np.linspace(700, 720, npts)
+    ref = np.empty((len(scans), npts))
+    for n, s in enumerate(scans):
+        center = 706.9 - drift*s
+        ref[n] = (100*np.exp(-0.5*((mono - center)/0.4)**2)
+                  + 20*(1 + np.tanh(mono - center - 2))
+                  + rng.normal(0, 0.5, npts))
+    return scanXAS({"MONO": mono, "I0": 1000, "REF": ref}, scans=scans)
+
+
+def test_xcorr_lags_subsample():
+    x = np.arange(200)
+    ref = np.exp(-0.5*((x - 100)/5)**2)
+    y = np.exp(-0.5*((x[np.newaxis] - 100 - np.array([[3.3], [-7.6]]))/5)**2)
+    lag, peak = xcorr_lags(ref, y)
+    assert np.allclose(lag, [3.3, -7.6], atol=0.05)
+    assert np.all(peak > 0.95)
+
+
+def test_streaming_aligner_tracks_drift_incrementally(scanXAS):
+    drift = 0.02
+    xas = makeDriftingXAS(scanXAS, range(30), drift)
+    aligner = StreamingAligner(702, 716, nref=5)
+    new = aligner.update(xas)
+    assert list(new) == list(range(30))
+    offsets = xas.data.offsets.sel(ch="MONO").data
+    assert np.allclose(offsets, drift*np.arange(30), atol=0.03)
+
+    more = makeDriftingXAS(scanXAS, range(30, 40), drift, seed=1)
+    xas = xas + more
+    before = xas.data.offsets.sel(ch="MONO", scan=list(range(30))).data.copy()
+    new = aligner.update(xas)
+    assert list(new) == list(range(30, 40))
+    assert np.allclose(xas.data.offsets.sel(ch="MONO", scan=list(range(30))),
+                       before)
+    assert np.allclose(list(new.values()), drift*np.arange(30, 40), atol=0.03)
+    assert aligner.update(xas) == {}
+
+
+def test_streaming_aligner_running_mean(scanXAS):
+    xas = makeDriftingXAS(scanXAS, range(12), 0.01)
+    aligner = StreamingAligner(702, 716, nref=None)
+    aligner.update(xas)
+    assert len(aligner._recent) == 0
+    x = xas.data.data.sel(ch="MONO").data
+    y = xas.data.data.sel(ch="REF").data
+    deltaE = xas.data.offsets.sel(ch="MONO").data
+    expected = np.mean([aligner._onGrid(x[n] + deltaE[n], y[n])
+                        for n in range(12)], axis=0)
+    assert np.allclose(aligner.reference, expected)
+
+
+def test_streaming_aligner_window_check(scanXAS):
+    xas = makeDriftingXAS(scanXAS, [0], 0)
+    aligner = StreamingAligner(690, 716)
+    with pytest.raises(ValueError):
+        aligner.update(xas)
+
+
+@pytest.mark.parametrize("upsample", [None, 20])
+def test_findMonoOffset_xcorr(upsample, scanXAS):
+    drift = 0.013
+    xas = makeDriftingXAS(scanXAS, range(20), drift)
+    info = xas.findMonoOffset("fe", method="xcorr", upsample=upsample,
+                              maxShift=1)
+    expected = drift*np.arange(20)
+    assert np.allclose(info["offset"], expected, atol=0.03)
+    assert np.allclose(xas.data.offsets.sel(ch="MONO"), expected, atol=0.03)
+    assert np.all(info["corr"] > 0.9)
+    assert not np.any(info["clipped"])
+    assert info["template"].dims == ("energy",)
+
+
+def test_xcorr_offsets_flags_outlier_and_clipping(scanXAS):
+    from xastools.align import xcorr_offsets
+    xas = makeDriftingXAS(scanXAS, range(10), 0)
+    x = xas.data.data.sel(ch="MONO").data
+    y = xas.data.data.sel(ch="REF").data.copy()
+    y[3] = np.interp(x[3] + 1.5, x[3], y[3])
+    result = xcorr_offsets(x, y, (702, 716), reference=0, maxShift=1)
+    assert result["clipped"][3]
+    assert np.abs(result["offsetZ"][3]) > 5
+    assert np.allclose(np.delete(result["offset"], 3), 0, atol=0.03)
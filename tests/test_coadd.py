@@ -0,0 +1,46 @@
+import numpy as np
+
+
+def poissonColumns(nscans=100, npts=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return {"MONO": np.linspace(700, 720, npts),
+            "I0": rng.poisson(1000, (nscans, npts)),
+            "TEY": rng.poisson(400, (nscans, npts))}
+
+
+def test_coadd_matches_mean_and_poisson_error(scanXAS):
+    xas = scanXAS(poissonColumns())
+    result = xas.coadd("TEY")
+    x, y = xas.getData("TEY", aggregate="mean")
+    assert np.allclose(result["mean"], y)
+    assert np.allclose(result["x"], x)
+    assert np.allclose(result["stderr"], np.sqrt(y/100))
+    assert np.all(result["nscans"] == 100)
+
+
+def test_coadd_chunked_empirical_and_weights(scanXAS):
+    xas = scanXAS(poissonColumns())
+    full = xas.coadd(["TEY", "I0"], error="empirical")
+    chunked = xas.coadd(["TEY", "I0"], error="empirical", chunksize=7)
+    for k in ["mean", "stderr", "neff"]:
+        assert np.allclose(full[k], chunked[k])
+    weights = {s: 2.0 if s < 50 else 0.0 for s in range(100)}
+    half = xas.coadd("TEY", scanWeights=weights)
+    x, y = xas.getData("TEY", aggregate="mean", exclude=list(range(50, 100)))
+    assert np.allclose(half["mean"], y)
+    assert np.allclose(half["neff"], 50)
+
+
+def test_coadd_sigma_clip(scanXAS):
+    xas = scanXAS(poissonColumns())
+    xas.data["data"][3, 10, 2] = 1e6
+    result = xas.coadd("TEY", sigmaClip=4, error="empirical")
+    assert result["nscans"][10] == 99
+    assert abs(result["mean"][10] - 400) < 10
+
+
+def test_coadd_sigma_clip_single_scan(scanXAS):
+    xas = scanXAS(poissonColumns(nscans=1))
+    result = xas.coadd("TEY", sigmaClip=3)
+    assert np.allclose(result["mean"], xas.getData("TEY")[1])
+    assert np.all(result["nscans"] == 1)
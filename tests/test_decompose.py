@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from xastools.decompose import pca, randomized_svd, IncrementalPCA
+
+
+def mixtureColumns(nscans=60, npts=80, seed=0):
+    """
+    Scans that are mixtures of two reference spectra plus small noise
+    """
+    rng = np.random.default_rng(seed)
+    mono = np.linspace(700, 720, npts)
+    a = 1 + np.tanh(mono - 706)
+    b = 1 + np.tanh(mono - 710) + np.exp(-0.5*((mono - 711)/0.5)**2)
+    frac = np.linspace(0, 1, nscans)[:, np.newaxis]
+    tey = (1 - frac)*a + frac*b + rng.normal(0, 1e-3, (nscans, npts))
+    return {"MONO": mono, "I0": 1, "TEY": tey}
+
+
+def test_randomized_matches_full():
+    rng = np.random.default_rng(1)
+    a = rng.standard_normal((200, 5)) @ rng.standard_normal((5, 50))
+    full = pca(a, 3)
+    fast = pca(a, 3, method='randomized')
+    assert np.allclose(full['components'], fast['components'], atol=1e-8)
+    assert np.allclose(full['scores'], fast['scores'], atol=1e-8)
+    u, s, vt = randomized_svd(a, 2)
+    assert u.shape == (200, 2) and vt.shape == (2, 50)
+
+
+def test_incremental_matches_full():
+    rng = np.random.default_rng(2)
+    a = rng.standard_normal((300, 4)) @ rng.standard_normal((4, 40))
+    a += rng.normal(0, 1e-3, a.shape)
+    full = pca(a, 4)
+    ipca = IncrementalPCA(4)
+    for n in range(0, 300, 64):
+        ipca.partial_fit(a[n:n + 64])
+    assert np.allclose(ipca.mean, full['mean'])
+    assert np.allclose(ipca.components, full['components'], atol=1e-6)
+    assert np.allclose(ipca.singular_values, full['singular_values'])
+    assert np.allclose(ipca.explained_variance_ratio,
+                       full['explained_variance_ratio'])
+    assert np.allclose(ipca.transform(a), full['scores'], atol=1e-6)
+
+
+@pytest.mark.parametrize("method", ["full", "randomized", "incremental"])
+def test_xas_decompose(method, scanXAS):
+    xas = scanXAS(mixtureColumns())
+    ds = xas.decompose("TEY", ncomp=2, method=method, chunksize=16)
+    assert ds.components.dims == ("component", "index")
+    assert ds.scores.dims == ("scan", "component")
+    assert ds.explained_variance_ratio[0] > 0.99
+    # The first score is linear in the mixing fraction
+    score = ds.scores.sel(component=0).data
+    assert abs(np.corrcoef(score, np.arange(60))[0, 1]) > 0.999
+    assert np.allclose(ds.x, np.linspace(700, 720, 80))
+    both = xas.decompose(["TEY", "I0"], ncomp=2, method=method, chunksize=16)
+    assert both.components.dims == ("component", "index", "ch")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+
+def makeSDDXAS(scanXAS, nscans=3, npts=30, nel=4, seed=0):
+    rng = np.random.default_rng(seed)
+    elements = [f"SDD{n}" for n in range(nel)]
+    icr = [f"ICR{n}" for n in range(nel)]
+    ocr = [f"OCR{n}" for n in range(nel)]
+    counts = rng.poisson(500, (nscans, npts, nel))
+    inputRate = rng.uniform(1e4, 2e4, (nscans, npts, nel))
+    outputRate = 0.8*inputRate
+    outputRate[0, 0, 0] = 0
+    columns = {"MONO": np.linspace(700, 720, npts), "I0": 1000}
+    for names, values in [(elements, counts), (icr, inputRate),
+                          (ocr, outputRate)]:
+        columns.update({c: values[..., n] for n, c in enumerate(names)})
+    xas = scanXAS(columns,
+                  offsets={e: 10.0*n for n, e in enumerate(elements)},
+                  weights={e: 1 + 0.1*n for n, e in enumerate(elements)})
+    return xas, elements, icr, ocr
+
+
+def test_sumDetectors_matches_getData_without_deadtime(scanXAS):
+    xas, elements, icr, ocr = makeSDDXAS(scanXAS)
+    x, y = xas.getData(elements, offset=True, weight=True, individual=True)
+    xas.sumDetectors(elements)
+    assert np.allclose(xas.getCols("SDD"), y.sum(dim="ch"))
+
+
+def test_sumDetectors_deadtime_chunks_and_drop(scanXAS):
+    xas, elements, icr, ocr = makeSDDXAS(scanXAS)
+    raw = xas.data.data
+    counts = raw.sel(ch=elements).data
+    outputRate = raw.sel(ch=ocr).data
+    ratio = raw.sel(ch=icr).data/np.where(outputRate > 0, outputRate, np.inf)
+    ratio[outputRate == 0] = 1
+    o = np.array([10.0*n for n in range(4)])
+    w = np.array([1 + 0.1*n for n in range(4)])
+    expected = ((counts*ratio - o)/w).sum(axis=-1)
+    chunked = xas.copy()
+    xas.sumDetectors(elements, icr=icr, ocr=ocr, drop=True)
+    chunked.sumDetectors(elements, icr=icr, ocr=ocr, chunksize=2)
+    assert np.allclose(xas.getCols("SDD"), expected)
+    assert np.allclose(chunked.getCols("SDD"), expected)
+    assert xas.columns == ("MONO", "I0", "SDD")
+    assert list(xas.data.ch.data) == ["MONO", "I0", "SDD"]
+    with pytest.raises(ValueError):
+        chunked.sumDetectors(elements, name="SDD")
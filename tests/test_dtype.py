@@ -0,0 +1,88 @@
+import numpy as np
+from xastools.xas import storageLayout
+from xastools.io import load
+
+
+def countingColumns(nscans=5, npts=300, seed=0):
+    """
+    Scans with high counts and a jittered mono, to probe float32 rounding
+    """
+    rng = np.random.default_rng(seed)
+    mono = np.linspace(700, 720, npts)
+    return {"MONO": mono + rng.normal(0, 0.01, (nscans, npts)),
+            "I0": rng.poisson(100000, (nscans, npts)),
+            "REF": rng.poisson(1000*np.exp(-0.5*((mono - 706.9)/0.5)**2)
+                               + 100, (nscans, npts)),
+            "TEY": rng.poisson(2000*(1.5 + 0.5*np.tanh(mono - 706.9)),
+                               (nscans, npts))}
+
+
+def test_compact_storage_accuracy(scanXAS):
+    full = scanXAS(countingColumns())
+    compact = full.astype('compact')
+    assert full.dtype == np.float64 and compact.dtype == np.float32
+    assert compact.data.data.nbytes*2 == full.data.data.nbytes
+    # Counts are stored exactly, and MONO is kept in float64
+    assert np.array_equal(compact.data.data.sel(ch="TEY"),
+                          full.data.data.sel(ch="TEY"))
+    assert list(compact.data.xch.values) == ["MONO"]
+    assert np.array_equal(compact.getCols("MONO"), full.getCols("MONO"))
+
+    for kwargs in [{'grid': np.linspace(701, 719, 200)},
+                   {'individual': True}]:
+        x0, y0 = full.getData("TEY", divisor="I0", **kwargs)
+        x1, y1 = compact.getData("TEY", divisor="I0", **kwargs)
+        assert y1.dtype == np.float64
+        assert np.array_equal(x1, x0)
+        assert np.allclose(y1, y0, rtol=1e-12)
+
+    full.findMonoOffset("fe", col="REF")
+    compact.findMonoOffset("fe", col="REF")
+    assert np.allclose(compact.data.offsets.sel(ch="MONO"),
+                       full.data.offsets.sel(ch="MONO"))
+    assert compact.window(705, 706) == full.window(705, 706)
+    assert np.array_equal(compact.astype(None).data.data, full.data.data)
+
+
+def test_compact_storage_combines(scanXAS):
+    full = scanXAS(countingColumns())
+    more = scanXAS(countingColumns(seed=1), scans=range(5, 10))
+    compact = full.astype('compact')
+    mixed = compact + more
+    assert np.array_equal(mixed.getCols("MONO"),
+                          (full + more).getCols("MONO"))
+    compact.sumDetectors(["REF", "TEY"], name="SUM")
+    compact.dropColumns(["REF"])
+    assert list(compact.data.xch.values) == ["MONO"]
+    assert np.array_equal(compact.getCols(["MONO", "SUM"]).sel(ch="MONO"),
+                          full.getCols("MONO"))
+
+
+def test_storage_policies(scanXAS):
+    xas = scanXAS(countingColumns(nscans=1))
+    data, cols = xas.data.data.data, list(xas.columns)
+    assert storageLayout(data, cols) == (np.float64, [], None)
+    assert storageLayout(data, cols, np.float32) == (np.float32, [], None)
+    assert storageLayout(data, cols, 'compact') == (np.float32, ["MONO"],
+                                                    np.float64)
+    # Each column type is stored with its own dtype
+    policy = {'motor': 'float64', 'detector': 'float32'}
+    assert storageLayout(data, cols, policy) == (np.float32, ["MONO"],
+                                                 np.float64)
+    policy = {'motor': 'float32', 'detector': 'float64'}
+    assert storageLayout(data, cols, policy) == (np.float64, [], None)
+    # Counts above 2**24 would be rounded in float32
+    data[0, 0, 3] = 2**24 + 1
+    assert storageLayout(data, cols, 'compact') == (np.float64, [], None)
+
+
+def test_load_compact(spectrumFiles):
+    files = spectrumFiles(3, "dat")
+    full = load(files)
+    compact = load(files, dtype='compact')
+    assert compact.dtype == np.float32
+    assert load(files[0], dtype='compact').dtype == np.float32
+    x0, y0 = full.getData("TEY", divisor="I0")
+    x1, y1 = compact.getData("TEY", divisor="I0")
+    assert np.array_equal(x1, x0)
+    assert np.allclose(y1, y0, rtol=1e-6)
@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+
+heavy = ["matplotlib", "scipy", "yaml", "tiled"]
+
+
+def test_headless_load_import_is_light():
+    code = ("import sys; from xastools.io import load; "
+            f"print(' '.join(m for m in {heavy!r} if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, check=True, env=env)
+    assert out.stdout.strip() == ""
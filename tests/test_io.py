@@ -26,3 +26,26 @@ def test_ssrl_roundtrip(xas):
     xas2 = loadOne(filename)
     assert xas == xas2
     os.remove(filename)
+
+
+def test_load_header_matches_full_load(spectrumFiles):
+    from xastools.io import loadHeader
+    from xastools.io.ssrlExport import loadFromSSRL
+    from xastools.io.yamlExport import loadFromYaml
+    for f, loader in [(spectrumFiles(1, "dat")[0], loadFromSSRL),
+                      (spectrumFiles(1, "yaml")[0], loadFromYaml)]:
+        data, header = loader(f)
+        h = loadHeader(f)
+        assert h['scaninfo'] == header['scaninfo']
+        assert h['channelinfo']['cols'] == header['channelinfo']['cols']
+
+
+def test_lazy_load(spectrumFiles):
+    f = spectrumFiles(1, "dat")[0]
+    lazy = loadOne(f, lazy=True)
+    assert not lazy.loaded
+    assert lazy.sample == "sample1"
+    assert lazy.columns == ("MONO", "I0", "REF", "TEY")
+    assert not lazy.loaded
+    assert lazy == loadOne(f)
+    assert lazy.loaded
@@ -0,0 +1,56 @@
+import numpy as np
+from xastools.lcf import nnls_batch, lcf, loadLibrary
+
+
+def references(x):
+    return {'a': (x, 1 + np.tanh(x - 706)),
+            'b': (x, np.exp(-0.5*((x - 710)/0.7)**2)),
+            'c': (x, 0.5*(1 + np.tanh(x - 712)))}
+
+
+def test_nnls_batch_matches_scipy():
+    from scipy.optimize import nnls
+    rng = np.random.default_rng(0)
+    refs = rng.random((5, 60))
+    spectra = rng.random((40, 60)) - 0.2
+    w, rss = nnls_batch(refs, spectra)
+    wbig, rssbig = nnls_batch(refs, spectra, maxSubset=2)
+    for n, b in enumerate(spectra):
+        expected, rnorm = nnls(refs.T, b)
+        assert np.allclose(w[n], expected, atol=1e-8)
+        assert np.allclose(rss[n], rnorm**2)
+    assert np.allclose(wbig, w, atol=1e-8)
+    assert np.all(w >= 0)
+
+
+def test_lcf_with_shift():
+    x = np.linspace(700, 720, 200)
+    library = references(x)
+    true = np.array([[0.2, 0.8, 0], [0.5, 0, 0.5], [1, 0.3, 0.1]])
+    spectra = np.array([sum(w*library[k][1] for w, k in zip(row, 'abc'))
+                        for row in true])
+    # The third spectrum sits 0.3 eV below the references
+    spectra[2] = np.interp(x + 0.3, x, spectra[2])
+    result = lcf(spectra[:, 20:-20], x[20:-20], library,
+                 shifts=np.arange(-0.5, 0.51, 0.1))
+    assert np.allclose(result['weights'], true, atol=1e-6)
+    assert np.allclose(result['shift'], [0, 0, 0.3])
+    assert np.all(result['rfactor'] < 1e-8)
+    assert result['names'] == ['a', 'b', 'c']
+
+
+def test_fitLCF_and_loadLibrary(spectrumFiles, scanXAS):
+    x = np.linspace(700, 720, 100)
+    library = references(x)
+    frac = np.linspace(0, 1, 5)[:, np.newaxis]
+    xas = scanXAS({"MONO": x, "I0": 1,
+                   "TEY": (1 - frac)*library['a'][1] + frac*library['b'][1]})
+    ds = xas.fitLCF("TEY", library)
+    assert ds.weights.dims == ("scan", "ref")
+    assert np.allclose(ds.weights.sel(ref='b'), frac[:, 0], atol=1e-3)
+    assert np.all(ds.rfactor < 1e-5)
+
+    files = spectrumFiles(2, "dat", sample="ref")
+    lib = loadLibrary([[f] for f in files], "TEY", names=["r1", "r2"])
+    assert list(lib) == ["r1", "r2"]
+    assert lib["r1"][0].shape == (100,)
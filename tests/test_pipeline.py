@@ -0,0 +1,65 @@
+import json
+import os
+import time
+import pytest
+from xastools.pipeline import runPipeline, loadManifest
+
+
+def makeManifest(spectrumFiles, tmp_path):
+    spectrumFiles(3, "dat", sample="a")
+    spectrumFiles(2, "yaml", sample="b")
+    return {'root': str(tmp_path),
+            'defaults': {'align': {'edge': 'fe', 'col': 'REF'},
+                         'export': {'format': 'ssrl', 'folder': 'out',
+                                    'norm': 'I0'}},
+            'samples': {'a': {'files': 'a_*.dat', 'exclude': [2]},
+                        'b': {'files': ['b_1.yaml', 'b_2.yaml'],
+                              'align': False,
+                              'export': {'format': 'yaml',
+                                         'folder': 'out'}},
+                        'missing': {'files': ['nothere.dat']}}}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipeline_runs_samples(spectrumFiles, tmp_path, workers):
+    manifest = makeManifest(spectrumFiles, tmp_path)
+    summary = str(tmp_path / "summary.json")
+    results = runPipeline(manifest, workers=workers, summary=summary)
+    assert [r['sample'] for r in results] == ['a', 'b', 'missing']
+    a, b, missing = results
+    assert a['status'] == 'ok' and a['nscans'] == 3
+    assert set(a['offsets']) == {'1', '2', '3'}
+    assert b['status'] == 'ok' and b['offsets'] is None
+    assert all(os.path.exists(f) for f in a['outputs'] + b['outputs'])
+    assert b['outputs'][0].endswith('.yaml')
+    assert missing['status'] == 'error'
+    with open(summary) as f:
+        assert json.load(f) == results
+
+
+def test_pipeline_timeout_and_manifest_file(spectrumFiles, tmp_path,
+                                            monkeypatch):
+    import xastools.io
+    spectrumFiles(1, "dat", sample="a")
+    with open(tmp_path / "manifest.json", "w") as f:
+        json.dump({'timeout': 0.2, 'samples': {'a': {'files': 'a_1.dat'}}}, f)
+    manifest = loadManifest(str(tmp_path / "manifest.json"))
+    assert manifest['root'] == str(tmp_path)
+
+    def slowLoad(filenames, dtype=None):
+        time.sleep(5)
+    monkeypatch.setattr(xastools.io, "load", slowLoad)
+    start = time.perf_counter()
+    result, = runPipeline(manifest, workers=1)
+    assert result['status'] == 'timeout'
+    assert time.perf_counter() - start < 2
+
+
+def test_pipeline_off_main_thread(spectrumFiles, tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    spectrumFiles(1, "dat", sample="a")
+    manifest = {'root': str(tmp_path), 'timeout': 60,
+                'samples': {'a': {'files': 'a_1.dat'}}}
+    with ThreadPoolExecutor(1) as pool:
+        result, = pool.submit(runPipeline, manifest, workers=1).result()
+    assert result['status'] == 'ok' and result['nscans'] == 1
@@ -0,0 +1,29 @@
+import json
+from xastools.io import load
+from xastools.profiling import profile
+
+
+def test_profile_records_stages(spectrumFiles, tmp_path):
+    filenames = spectrumFiles(3, "dat")
+    with profile(memory=True) as p:
+        xas = load(filenames)
+        xas.getData("TEY", divisor="I0", offset=True)
+    stats = p.stats()
+    assert stats["loadOne"][0] == 3
+    assert stats["convertDataHeader"][0] == 3
+    for name in ["select", "offset", "divide", "aggregate"]:
+        assert stats["getData." + name][0] == 1
+    assert "getData.weight" not in stats
+    assert "loadOne" in p.summary()
+    trace = tmp_path / "trace.json"
+    p.to_chrome_trace(str(trace))
+    events = json.load(open(trace))["traceEvents"]
+    assert len(events) == len(p.events)
+
+
+def test_profile_disabled(spectrumFiles):
+    filenames = spectrumFiles(1, "dat")
+    with profile() as p:
+        pass
+    load(filenames[0])
+    assert p.events == []
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+
+def test_suggest_exclude_finds_bad_scans(edgeScans):
+    xas = edgeScans(30, detectors=("TEY", "PFY"))
+    xas.data["data"][4, 50, 3] *= 10
+    xas.data["data"][4, 120, 4] *= 10
+    xas.data["data"][9, :, 3:] *= np.linspace(1, 2, 200)[:, np.newaxis]
+    xas.data["data"][17, :, 2] = np.roll(xas.data["data"][17, :, 2].data, 20)
+    ranked, exclude = xas.suggestExclude(divisor="I0", edge="fe")
+    assert sorted(exclude) == [4, 9, 17]
+    assert set(ranked[:3]) == {4, 9, 17}
+    scores = xas.scoreScans(divisor="I0")
+    assert scores.glitches.sel(scan=4) > 0
+    assert "offset" not in scores
+
+
+@pytest.mark.parametrize("nscans", [3, 5, 8])
+def test_suggest_exclude_keeps_clean_scans(edgeScans, nscans):
+    for seed in range(3):
+        xas = edgeScans(nscans, seed=seed, detectors=("TEY", "PFY"))
+        assert xas.suggestExclude(divisor="I0")[1] == []
+        assert np.all(xas.scoreScans(divisor="I0").glitches == 0)
+
+
+def test_deglitch_flags_and_repairs_glitches(edgeScans):
+    clean = edgeScans(30, detectors=("TEY", "PFY"))
+    xas = edgeScans(30, detectors=("TEY", "PFY"))
+    xas.data["data"][4, 50, 3] *= 10
+    xas.data["data"][7, 120, 1] *= 0.1
+    mask = xas.deglitch()
+    assert mask.dims == ("scan", "index", "ch")
+    assert [tuple(i) for i in np.argwhere(mask.data)] == [(4, 50, 3),
+                                                          (7, 120, 1)]
+    x, y = xas.getData("TEY", divisor="I0", deglitch="interp")
+    x0, y0 = clean.getData("TEY", divisor="I0")
+    assert np.allclose(y, y0, rtol=1e-2)
+    assert not np.allclose(xas.getData("TEY", divisor="I0")[1], y0,
+                           rtol=1e-2)
+
+    # The I0 glitch masks every column divided by it
+    x, y = xas.getData(["TEY", "PFY"], divisor="I0", deglitch="mask",
+                       individual=True)
+    assert int(y.isnull().sum()) == 3
+    assert bool(y.sel(scan=7, ch="PFY")[120].isnull())
+    x, y = xas.getData("TEY", divisor="I0", deglitch="mask")
+    assert np.allclose(y, y0, rtol=1e-2)
+
+
+def test_deglitch_mask_is_stored_and_extended(edgeScans):
+    xas = edgeScans(30, detectors=("TEY", "PFY"))
+    xas.data["data"][2, 80, 4] *= 5
+    xas.deglitch("TEY")
+    assert xas.data["mask"].attrs["cols"] == ["TEY"]
+    assert not xas.data["mask"].any()
+    xas.getData("PFY", deglitch="mask")
+    assert xas.data["mask"].attrs["cols"] == ["TEY", "PFY"]
+    assert bool(xas.data["mask"].sel(scan=2, ch="PFY")[80])
@@ -0,0 +1,34 @@
+import re
+import pytest
+
+pytest.importorskip("matplotlib")
+from xastools.io import load
+from xastools.report import ReportRenderer, renderReport
+
+
+def test_render_reuses_figure(spectrumFiles, tmp_path):
+    spectra = [load(spectrumFiles(5, "dat", sample=f"s{n}")) for n in range(3)]
+    renderer = ReportRenderer(nstack=2)
+    pdf = str(tmp_path / "report.pdf")
+    assert renderer.render(spectra, "TEY", pdf, divisor="I0") == 9
+    assert len(renderer.figure.axes) == 1
+    assert len(renderer.ax.lines) == 3
+    assert len(re.findall(rb"/Type\s*/Page\b", open(pdf, "rb").read())) == 9
+    png = str(tmp_path / "page_{page}.png")
+    assert renderer.render(spectra[0], "TEY", png, individual=False) == 1
+    assert (tmp_path / "page_0.png").exists()
+
+
+def test_check_mono_offset_to_file(spectrumFiles, tmp_path):
+    xas = load(spectrumFiles(3, "dat"))
+    pdf = str(tmp_path / "mono.pdf")
+    assert xas.checkMonoOffset(col="REF", nstack=2, vline=710,
+                               filename=pdf) == 2
+
+
+def test_render_single_scan(spectrumFiles, tmp_path):
+    xas = load(spectrumFiles(1, "dat"))
+    pdf = str(tmp_path / "single.pdf")
+    assert xas.checkMonoOffset(col="REF", vline=710, filename=pdf) == 1
+    png = str(tmp_path / "single_{page}.png")
+    assert renderReport(xas, "TEY", png, individual=False) == 1
@@ -0,0 +1,71 @@
+import numpy as np
+from xastools.resample import (interp_scans, rebin_scans, common_grid,
+                               is_heterogeneous)
+
+
+def test_interp_matches_np_interp_with_padding():
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(700, 720, (5, 40)), axis=1)
+    x[:, 0], x[:, -1] = 699, 721
+    y = rng.random((5, 40, 3))
+    x[2, 30:] = np.nan
+    y[2, 30:] = np.nan
+    grid = np.linspace(700, 720, 57)
+    out = interp_scans(x[:, ::-1], y[:, ::-1], grid)
+    for s in range(5):
+        valid = np.isfinite(x[s])
+        inside = grid <= x[s][valid].max()
+        for c in range(3):
+            expected = np.interp(grid, x[s][valid], y[s][valid, c])
+            assert np.allclose(out[s, inside, c], expected[inside])
+    assert np.all(np.isnan(out[2, grid > np.nanmax(x[2])]))
+
+
+def test_rebin_conserves_counts():
+    rng = np.random.default_rng(1)
+    x = np.linspace(700, 720, 201) + rng.uniform(-0.02, 0.02, (4, 201))
+    y = rng.poisson(100, (4, 201)).astype(float)
+    grid = np.arange(705, 715.01, 0.5)
+    out = rebin_scans(x, y, grid)
+    # 0.5 eV bins collect about five 0.1 eV samples
+    assert np.allclose(out.mean(), 500, rtol=0.05)
+    # Bins aligned with the source bins hold exactly their counts
+    aligned = rebin_scans(x[:1]*0 + np.linspace(700, 720, 201), y[:1],
+                          np.linspace(700, 720, 201)[10:20])
+    assert np.allclose(aligned[0], y[0, 10:20])
+
+
+def test_getData_resamples_heterogeneous_scans(scanXAS):
+    rng = np.random.default_rng(2)
+    npts = [60, 50]
+    mono = np.full((2, max(npts)), np.nan)
+    tey = np.full((2, max(npts)), np.nan)
+    for s, n in enumerate(npts):
+        mono[s, :n] = np.linspace(700 + 0.05*n, 720, n)
+        tey[s, :n] = 2*(mono[s, :n] - 700) + rng.normal(0, 1e-9, n)
+    xas = scanXAS({"MONO": mono, "I0": np.where(np.isnan(mono), np.nan, 1000),
+                   "TEY": tey}, scans=[1, 2])
+    assert is_heterogeneous(xas.data.data.sel(ch="MONO").data)
+    x, y = xas.getData("TEY", divisor="I0", aggregate="mean")
+    grid = common_grid(xas.data.data.sel(ch="MONO").data)
+    assert np.allclose(x, grid)
+    assert np.allclose(y, 2*(grid - 700)/1000)
+    xb, yb = xas.getData("TEY", divisor="I0", aggregate="mean",
+                         grid=grid[1:-1], resample="bin")
+    assert np.allclose(yb, 2*(grid[1:-1] - 700)/1000, rtol=2e-2)
+
+
+def test_coadd_and_decompose_resample_heterogeneous_scans(scanXAS):
+    mono = np.full((3, 60), np.nan)
+    for s, n in enumerate([60, 55, 50]):
+        mono[s, :n] = np.linspace(700 + 0.03*s, 720, n)
+    xas = scanXAS({"MONO": mono, "I0": np.where(np.isnan(mono), np.nan, 1000),
+                   "TEY": 2*(mono - 700)}, scans=[1, 2, 3])
+    grid = common_grid(xas.data.data.sel(ch="MONO").data)
+    result = xas.coadd("TEY", divisor="I0", chunksize=2)
+    assert np.allclose(result.x, grid)
+    assert np.allclose(result['mean'], 2*(grid - 700)/1000)
+    assert np.all(np.isfinite(result['stderr']))
+    pca = xas.decompose("TEY", ncomp=1, divisor="I0", method="incremental",
+                        chunksize=2)
+    assert np.allclose(pca['mean'], 2*(grid - 700)/1000)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from xastools.roi import resolveROIs, integrate_rois
+from xastools.utils import roiMaster
+
+
+def makeMCA(shape, nbins=400, seed=0):
+    rng = np.random.default_rng(seed)
+    energy = np.linspace(0, 1600, nbins)
+    mca = rng.poisson(5, shape + (nbins,)).astype(np.int32)
+    return mca, energy
+
+
+def test_resolveROIs():
+    windows = resolveROIs(['fe', 'ok', {'mine': [100, 200]}])
+    assert list(windows) == ['felab', 'fell', 'ok', 'mine']
+    assert windows['ok'] == tuple(roiMaster['ok'])
+    with pytest.raises(KeyError):
+        resolveROIs('nope')
+
+
+def test_integrate_rois_matches_direct_sum_and_chunks(tmp_path):
+    mca, energy = makeMCA((3, 20))
+    values, windows = integrate_rois(mca, energy, ['fe', 'ok'])
+    assert values.shape == (3, 20, 3)
+    for n, (lo, hi) in enumerate(windows.values()):
+        inside = (energy >= lo) & (energy <= hi)
+        assert np.array_equal(values[..., n], mca[..., inside].sum(axis=-1))
+    mm = np.lib.format.open_memmap(str(tmp_path / "mca.npy"), mode="w+",
+                                   dtype=mca.dtype, shape=mca.shape)
+    mm[:] = mca
+    chunked, _ = integrate_rois(mm, energy, ['fe', 'ok'], chunksize=2)
+    assert np.array_equal(chunked, values)
+
+
+def test_addROIs(scanXAS):
+    xas = scanXAS({"MONO": np.ones((2, 20)), "I0": 1}, scans=[1, 2])
+    mca, energy = makeMCA((2, 20))
+    names = xas.addROIs(mca, energy, 'fe')
+    assert names == ['felab', 'fell']
+    assert xas.columns == ("MONO", "I0", "felab", "fell")
+    assert xas.channelinfo['rois']['felab'] == roiMaster['felab']
+    y = xas.getData('felab', individual=True)[1]
+    expected, _ = integrate_rois(mca, energy, 'felab')
+    assert np.allclose(y, expected[..., 0])
+    with pytest.raises(ValueError):
+        xas.addROIs(mca, energy, 'felab')
+    with pytest.raises(ValueError):
+        xas.addROIs(mca[:, :10], energy, 'ok')
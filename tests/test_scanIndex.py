@@ -0,0 +1,47 @@
+import os
+import pytest
+from xastools.io import ScanIndex
+
+
+def test_index_query(spectrumFiles, tmp_path):
+    ssrl = spectrumFiles(3, "dat", sample="fe2o3")
+    yml = spectrumFiles(2, "yaml", sample="nio")
+    with ScanIndex(str(tmp_path / "index.db")) as index:
+        assert index.update(str(tmp_path)) == 5
+        assert len(index) == 5
+        assert index.query(sample="fe2o3") == sorted(ssrl)
+        assert index.query(sample="ni*", scan=2) == [yml[1]]
+        assert index.query(cols=["MONO", "TEY"]) == sorted(ssrl + yml)
+        assert index.query(cols="PFY") == []
+        assert index.getHeader(yml[0])['scaninfo']['sample'] == "nio"
+        xas = index.load(sample="fe2o3")
+        assert len(xas.data.scan) == 3
+
+
+def test_index_incremental(spectrumFiles, tmp_path):
+    filenames = spectrumFiles(3, "dat")
+    index = ScanIndex(str(tmp_path / "index.db"))
+    index.update(str(tmp_path))
+    assert index.update(str(tmp_path)) == 0
+    os.utime(filenames[0], (0, 0))
+    os.remove(filenames[1])
+    assert index.update(str(tmp_path)) == 1
+    assert index.query() == [filenames[0], filenames[2]]
+    index.close()
+
+
+def test_index_warn_and_prune(spectrumFiles, tmp_path):
+    filenames = spectrumFiles(2, "dat")
+    bad = tmp_path / "broken.dat"
+    bad.write_text("not a spectrum\n")
+    index = ScanIndex()
+    with pytest.warns(UserWarning, match="broken.dat"):
+        assert index.update(str(tmp_path)) == 2
+    # _ is a LIKE wildcard, but prune prefixes are matched literally
+    other = str(tmp_path) + "X/gone.dat"
+    index._insert(other, 0, {})
+    index.prune(str(tmp_path) + "_")
+    assert other in index.query()
+    index.prune(str(tmp_path) + "X")
+    assert index.query() == sorted(filenames)
+    index.close()
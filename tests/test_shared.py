@@ -0,0 +1,55 @@
+import pickle
+import numpy as np
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from xastools.rixs import RIXS
+
+
+def coaddInWorker(handle):
+    xas = handle.attach()
+    xas.findMonoOffset("fe", col="REF")
+    x, y = xas.getData("TEY", divisor="I0", offsetMono=True)
+    return float(np.sum(y)), xas.data.data.data.flags.owndata
+
+
+def test_shared_xas_roundtrip_and_workers(edgeScans):
+    xas = edgeScans()
+    xas.deglitch()
+    with xas.toShared() as handle:
+        assert handle.owner
+        small = pickle.dumps(handle)
+        assert len(small) < handle.nbytes/10
+        assert not pickle.loads(small).owner
+
+        attached = handle.attach()
+        assert attached == xas
+        assert "mask" in attached.data
+        assert not attached.data.data.data.flags.writeable
+        with pytest.raises(ValueError):
+            attached.data.data.data[0, 0, 0] = 1
+        # Per-scan variables are private copies
+        attached.setMonoOffset(1.0)
+        assert not np.any(xas.data.offsets.sel(ch="MONO") == 1.0)
+
+        xas.findMonoOffset("fe", col="REF")
+        expected = float(np.sum(xas.getData("TEY", divisor="I0",
+                                            offsetMono=True)[1]))
+        with ProcessPoolExecutor(2) as pool:
+            results = list(pool.map(coaddInWorker, [handle]*2))
+        assert all(np.isclose(s, expected) and not owned
+                   for s, owned in results)
+    assert not handle.owner
+    with pytest.raises(FileNotFoundError):
+        handle.attach()
+
+
+def test_shared_rixs(edgeScans):
+    xas = edgeScans(nscans=3)
+    z = np.random.default_rng(0).random((3, 50, 200))
+    rixs = RIXS(np.arange(200), np.arange(50), z, xas, np.zeros(3))
+    with rixs.toShared() as handle:
+        assert handle.nbytes > z.nbytes
+        attached = pickle.loads(pickle.dumps(handle)).attach()
+        assert np.array_equal(attached.z, z)
+        assert attached.xas == xas
+        assert not attached.z.flags.owndata
@@ -0,0 +1,55 @@
+import os
+import numpy as np
+from xastools.similarity import SimilarityIndex
+
+
+def makeEdgeXAS(scanXAS, edge, sample="s", npts=200):
+    x = np.linspace(700, 720, npts)
+    return scanXAS({"MONO": x, "I0": 1000,
+                    "TEY": 500*(1 + np.tanh(x - edge)) + 100},
+                   scans=[1], sample=sample)
+
+
+def test_similarity_query_and_compress(tmp_path, scanXAS):
+    index = SimilarityIndex(np.linspace(701, 719, 100))
+    for edge in np.arange(704, 716, 0.5):
+        index.add(f"edge{edge}", makeEdgeXAS(scanXAS, edge))
+    assert len(index) == 24 and index.matrix.dtype == np.float32
+    keys, dist = index.queryXAS(makeEdgeXAS(scanXAS, 708.1), k=3)
+    assert list(keys) == ["edge708.0", "edge708.5", "edge707.5"]
+    assert np.all(np.diff(dist) >= 0)
+
+    index.compress(ncomp=8)
+    keys, dist = index.queryXAS(makeEdgeXAS(scanXAS, 708.1), k=1)
+    assert list(keys) == ["edge708.0"]
+    index.add("new", makeEdgeXAS(scanXAS, 712.2))
+    assert index.queryXAS(makeEdgeXAS(scanXAS, 712.2), k=1)[0][0] == "new"
+
+    index.save(str(tmp_path / "index.npz"))
+    loaded = SimilarityIndex.load(str(tmp_path / "index.npz"))
+    assert loaded.keys == index.keys
+    fps = np.array([index.fingerprintXAS(makeEdgeXAS(scanXAS, e))
+                    for e in [705, 713]])
+    k1, d1 = index.query(fps, k=2)
+    k2, d2 = loaded.query(fps, k=2)
+    assert k1.shape == (2, 2) and np.array_equal(k1, k2)
+
+
+def test_similarity_addFiles_is_incremental(spectrumFiles):
+    names = spectrumFiles(3, "dat")
+    index = SimilarityIndex(np.linspace(701, 719, 100), divisor="I0")
+    assert len(index.addFiles(names[:2])) == 2
+    assert index.addFiles(names) == [names[2]]
+    assert index.addFiles(names) == []
+    os.utime(names[0], (0, 0))
+    assert index.addFiles(names) == [names[0]]
+    keys, dist = index.query(index.matrix[1], k=1)
+    assert keys[0] == names[1]
+
+
+def test_similarity_query_empty_index():
+    index = SimilarityIndex(np.linspace(701, 719, 100))
+    keys, dist = index.query(np.zeros(100))
+    assert keys.shape == (0,) and dist.shape == (0,)
+    keys, dist = index.query(np.zeros((3, 100)), k=2)
+    assert keys.shape == (3, 0) and dist.shape == (3, 0)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tiled")
+from tiled.adapters.mapping import MapAdapter
+from tiled.client import Context, from_context
+from tiled.client.container import DEFAULT_STRUCTURE_CLIENT_DISPATCH
+from tiled.server.app import build_app
+from xastools.io import loadOne
+from xastools.io.ssrlExport import loadFromSSRL
+from xastools.io.tiledAdapters import SSRLAdapter, YamlAdapter
+from xastools.io.tiledClient import XASClient
+
+
+@pytest.fixture
+def tiledTree(spectrumFiles):
+    ssrl = spectrumFiles(2, "dat")
+    yml = spectrumFiles(1, "yaml", sample="sample2")
+    # A copy of the default dispatch, so that the global one is left as is
+    clients = dict(DEFAULT_STRUCTURE_CLIENT_DISPATCH["numpy"],
+                   nistxas=XASClient)
+    adapters = {f"ssrl{n}": SSRLAdapter.from_file(f)
+                for n, f in enumerate(ssrl)}
+    adapters["yaml0"] = YamlAdapter.from_file(yml[0])
+    tree = MapAdapter(adapters)
+    with Context.from_app(build_app(tree)) as context:
+        yield from_context(context, structure_clients=clients), ssrl + yml
+
+
+def test_adapter_is_lazy(spectrumFiles, monkeypatch):
+    f = spectrumFiles(1, "dat", npts=37)[0]
+    reads = []
+
+    def loader(filepath):
+        reads.append(filepath)
+        return loadFromSSRL(filepath)
+    monkeypatch.setattr(SSRLAdapter, "loader", staticmethod(loader))
+    adapter = SSRLAdapter.from_file(f)
+    assert adapter.structure().shape == (37, 4)
+    assert adapter.metadata()['scaninfo']['sample'] == "sample1"
+    assert reads == []
+    expected = loadOne(f).getCols("I0").squeeze()
+    assert np.allclose(adapter.read()[:, 1], expected)
+    assert np.allclose(adapter.read()[:, 1], expected)
+    # Parsed once, then served from the resource cache
+    assert reads == [f]
+
+
+def test_client_to_xas(tiledTree):
+    client, filenames = tiledTree
+    entry = client["ssrl0"]
+    assert isinstance(entry, XASClient)
+    xas = entry.to_xas()
+    assert xas == loadOne(filenames[0])
+    sub = client["yaml0"].to_xas(cols=["MONO", "TEY"], points=slice(10, 20))
+    ref = loadOne(filenames[2])
+    assert sub.columns == ("MONO", "TEY")
+    assert np.allclose(sub.getCols("TEY").squeeze(),
+                       ref.getCols("TEY").squeeze()[10:20])
+
+
+def test_xas_from_tiled(tiledTree):
+    from xastools.io import load
+    from xastools.io.tiledClient import xas_from_tiled
+    client, filenames = tiledTree
+    xas = xas_from_tiled(client, ["ssrl0", "ssrl1"], max_concurrency=2)
+    assert xas == load(filenames[:2])
+    sub = xas_from_tiled(client, scans=[1], cols=["MONO", "REF"])
+    assert sub.columns == ("MONO", "REF")
+    assert len(sub.data.scan) == 2
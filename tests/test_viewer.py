@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from xastools.downsample import (downsample, minmax_downsample,
+                                 lttb_downsample, visible_range)
+
+
+def makeScans(nscans=20, npts=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(700, 720, npts)
+    y = 1 + np.tanh(x - 706.9) + rng.normal(0, 0.01, (nscans, npts))
+    return x, y
+
+
+def test_minmax_keeps_extremes():
+    x, y = makeScans()
+    y[3, 1234] = 50
+    y[7, 8000] = -50
+    xs, ys = downsample(x, y, 200)
+    assert xs.shape == ys.shape == (20, 200)
+    assert np.allclose(ys.max(axis=1), y.max(axis=1))
+    assert np.allclose(ys.min(axis=1), y.min(axis=1))
+    assert ys[3].max() == 50 and xs[3, np.argmax(ys[3])] == x[1234]
+    assert np.all(np.diff(xs, axis=1) >= 0)
+    # Short scans are returned as they are
+    assert minmax_downsample(xs, ys, 1000)[0] is xs
+
+
+def test_lttb_shape_and_fidelity():
+    x, y = makeScans(nscans=3)
+    xs, ys = lttb_downsample(np.broadcast_to(x, y.shape), y, 500)
+    assert xs.shape == (3, 500)
+    assert np.all(xs[:, 0] == 700) and np.all(xs[:, -1] == 720)
+    assert np.all(np.diff(xs, axis=1) > 0)
+    # Every kept point is an original point
+    assert np.all(np.interp(xs, x, y[0])[0] == ys[0])
+    assert np.abs(np.interp(x, xs[0], ys[0]) - y[0]).max() < 0.1
+
+
+def test_visible_range():
+    x, y = makeScans(nscans=2, npts=201)
+    lo, hi = visible_range(np.broadcast_to(x, y.shape), 705, 706)
+    assert x[lo] < 705 and x[hi - 1] > 706
+    xs, ys = downsample(x, y, 1000, 'lttb', 705, 706)
+    assert xs.shape == (2, hi - lo)
+    with pytest.raises(ValueError):
+        downsample(x, y, 10, 'mean')
+
+
+def test_viewer_bounded_and_rezooms(scanXAS):
+    pytest.importorskip("matplotlib")
+    import matplotlib
+    matplotlib.use("Agg")
+    from xastools.viewer import ScanViewer
+    x, y = makeScans(nscans=50, npts=5000)
+    xas = scanXAS({"MONO": x, "I0": 1, "TEY": y})
+    viewer = ScanViewer(xas, "TEY", divisor="I0", budget=10000)
+    assert viewer.npoints == 200
+    segments = viewer.lines.get_segments()
+    assert len(segments) == 50 and len(segments[0]) == 200
+    viewer.ax.set_xlim(706, 708)
+    segments = viewer.lines.get_segments()
+    assert len(segments[0]) == 24
+    assert viewer.render() <= 10000 + 4*200
+    segment = viewer.lines.get_segments()[0]
+    assert segment[1, 0] >= 706 and segment[-2, 0] <= 708
@@ -0,0 +1,72 @@
+import numpy as np
+from xastools.utils import (energy_window, areaNorm, tailNorm, find_y_peak,
+                            normalize)
+from xastools.background import fit_preedge, flatten_post
+
+
+def stepColumns(mono):
+    """
+    One scan per row of mono, with a TEY edge step
+    """
+    mono = np.atleast_2d(mono)
+    return {"MONO": mono, "TEY": 1 + np.tanh(mono - 706.9) + 0.01*mono}
+
+
+def test_energy_window():
+    x = np.linspace(700, 720, 201)
+    w = energy_window(x, 705, 706)
+    assert isinstance(w, slice)
+    assert np.array_equal(x[w], x[(x >= 705) & (x <= 706)])
+    assert energy_window(x, 690, 695) == slice(0, 0)
+
+
+def test_xas_window_shared_and_per_scan(scanXAS):
+    x = np.linspace(700, 720, 201)
+    xas = scanXAS(stepColumns(np.vstack([x, x, x])))
+    w = xas.window(705, 706)
+    assert isinstance(w, slice)
+    y = xas.data.data.sel(ch="TEY").data
+    assert np.shares_memory(y[:, w], y)
+    assert xas.energyIndex() is xas.energyIndex()
+
+    xas.setMonoOffset([0.0, 0.5, -0.5])
+    windows = xas.window(705, 706, offsetMono=True)
+    assert len(windows) == 3
+    for n, w in enumerate(windows):
+        e = x[w] + [0.0, 0.5, -0.5][n]
+        assert e.min() >= 705 - 1e-9 and e.max() <= 706 + 1e-9
+        assert len(e) == 11
+
+    # Unsorted scans get index arrays
+    xas = scanXAS(stepColumns(np.vstack([x, x[::-1]])))
+    windows = xas.window(705, 706)
+    mono = xas.data.data.sel(ch="MONO").data
+    assert isinstance(windows[0], slice)
+    assert np.array_equal(np.sort(mono[1, windows[1]]), x[windows[0]])
+
+
+def test_normalization_accepts_windows(scanXAS):
+    x = np.linspace(700, 720, 201)
+    y = 1 + np.tanh(x - 706.9) + 0.01*x
+    xas = scanXAS(stepColumns(x))
+    full = xas.window(700, 720)
+    assert np.allclose(areaNorm(x, y, window=full), normalize(x, y, "area"))
+    assert np.allclose(tailNorm(y, pre=slice(0, 10), post=slice(191, 201)),
+                       tailNorm(y))
+    pre = xas.window(700, 704)
+    post = xas.window(712, 720)
+    ynorm = tailNorm(y, pre=pre, post=post)
+    assert np.isclose(np.mean(ynorm[pre]), 0)
+    assert np.isclose(np.mean(ynorm[post]), 1)
+
+    assert np.allclose(fit_preedge(x, y, 700, 704),
+                       fit_preedge(x, y, None, None, energy_window(
+                           x, 700, 704 - 0.05)))
+    flatten_post(x, y, 706.9, 712, 720, 1, window=post)
+
+    ref = np.exp(-0.5*((x - 707.2)/0.5)**2)
+    peak, = find_y_peak(x, ref, 706.9, 2)
+    windowed, = find_y_peak(x, ref, None, None,
+                            window=xas.window(704.9, 708.9))
+    assert np.isclose(peak, 707.2, atol=0.02)
+    assert np.isclose(windowed, 707.2, atol=0.02)
@@ -7,3 +7,49 @@ def test_xas_equality():
     xas = loadOne(filename)
     xas2 = loadOne(filename)
     assert xas == xas2
+
+
+def test_from_scan_array_matches_added_scans(scanHeader, scanData):
+    import copy
+    import numpy as np
+    header = scanHeader(scan=[1, 2, 3])
+    data = np.stack([scanData(seed=n) for n in range(3)])
+    stacked = XAS.from_scan_array(data, copy.deepcopy(header))
+    added = None
+    for n in range(3):
+        h = scanHeader(scan=n + 1)
+        added = XAS.from_data_header(data[n], h) + added
+    assert stacked == added
+    assert list(stacked.data.scan.values) == [1, 2, 3]
+
+
+def test_from_scan_array_partial_offsets():
+    import numpy as np
+    cols = ["MONO", "I0", "TEY"]
+
+    def header(scan):
+        return {'scaninfo': {'sample': 's', 'scan': scan}, 'motors': {},
+                'channelinfo': {'cols': cols, 'offsets': {'TEY': 0.5}}}
+    data = np.random.default_rng(0).random((3, 20, 3))
+    stacked = XAS.from_scan_array(data, header([1, 2, 3]))
+    added = None
+    for n in range(3):
+        added = XAS.from_data_header(data[n], header(n + 1)) + added
+    assert stacked == added
+    assert list(stacked.data.ch.values) == cols
+
+
+def test_constructors_copy_by_default():
+    import numpy as np
+
+    def header():
+        return {'scaninfo': {'sample': 's', 'scan': [1, 2]}, 'motors': {},
+                'channelinfo': {'cols': ["MONO", "I0", "TEY"]}}
+    data = np.ones((2, 10, 3))
+    stacked = XAS.from_scan_array(data, header())
+    single = XAS.from_data_header(data[0], header())
+    shared = XAS.from_scan_array(data, header(), copy=False)
+    data[...] = 2
+    assert np.all(stacked.data.data == 1)
+    assert np.all(single.data.data == 1)
+    assert np.all(shared.data.data == 2)
@@ -0,0 +1,246 @@
+"""
+Mono alignment by cross-correlation against a reference spectrum, as an
+alternative to finding a single peak near a reference edge (see
+utils.find_mono_offset).
+
+Offsets follow the convention of XAS offsets for MONO: the true energy of
+a point is mono + deltaE.
+"""
+import numpy as np
+from collections import deque
+from xastools.utils import find_mono_offset
+from xastools.resample import interp_scans
+
+
+def _prepare(y, derivative=True):
+    """
+    Mean-subtracted y (or its derivative) along the last axis
+    """
+    y = np.asarray(y, dtype=float)
+    if derivative:
+        y = np.gradient(y, axis=-1)
+    return y - y.mean(axis=-1, keepdims=True)
+
+
+def xcorr_lags(ref, y, derivative=True, maxlag=None, upsample=None):
+    """
+    Cross-correlates each row of y against ref by FFT, zero padded so the
+    correlation is not circular
+
+    :param ref: array of shape (n,)
+    :param y: array of shape (..., n), on the same uniform grid as ref
+    :param derivative: correlate derivatives, which emphasizes edges and
+    peaks over smooth backgrounds
+    :param maxlag: largest |lag| in samples to consider
+    :param upsample: if given, refine the peak by evaluating the
+    correlation at 1/upsample sample steps within one sample of the coarse
+    peak (a small matrix DFT of the cross-power spectrum). Otherwise a
+    parabola is fitted through the coarse peak.
+    :returns: lag (..., ) in samples and the normalized correlation
+    coefficient at the peak (..., ). A positive lag means the features of y
+    lie at higher index than those of ref.
+    """
+    a = _prepare(ref, derivative)
+    b = _prepare(y, derivative)
+    n = a.shape[-1]
+    nfft = 1 << (2*n - 1).bit_length()
+    cross = np.fft.rfft(b, nfft)*np.conj(np.fft.rfft(a, nfft))
+    c = np.fft.irfft(cross, nfft)
+    # Reorder to lags -(n - 1) .. (n - 1)
+    c = np.concatenate([c[..., nfft - n + 1:], c[..., :n]], axis=-1)
+    lags = np.arange(-n + 1, n)
+    if maxlag is not None:
+        c = np.where(np.abs(lags) <= maxlag, c, -np.inf)
+    k = np.clip(np.argmax(c, axis=-1), 1, 2*n - 3)
+    if upsample:
+        u = np.arange(-upsample, upsample + 1)/upsample
+        f = np.arange(cross.shape[-1])
+        # Real correlation from the one-sided spectrum: double the
+        # frequencies that stand for a conjugate pair
+        w = np.full(f.shape, 2.0)
+        w[0] = w[-1] = 1
+        shifted = w*cross*np.exp(2j*np.pi*lags[k][..., np.newaxis]*f/nfft)
+        dft = np.exp(2j*np.pi*np.outer(f, u)/nfft)
+        cu = (shifted @ dft).real/nfft
+        j = np.argmax(cu, axis=-1)
+        frac = u[j]
+        c1 = np.take_along_axis(cu, j[..., np.newaxis], -1)[..., 0]
+    else:
+        c0 = np.take_along_axis(c, (k - 1)[..., np.newaxis], -1)[..., 0]
+        c1 = np.take_along_axis(c, k[..., np.newaxis], -1)[..., 0]
+        c2 = np.take_along_axis(c, (k + 1)[..., np.newaxis], -1)[..., 0]
+        with np.errstate(invalid='ignore'):
+            denom = c0 - 2*c1 + c2
+            frac = np.where(np.isfinite(denom) & (denom < 0),
+                            0.5*(c0 - c2)/denom, 0.0)
+        frac = np.clip(frac, -0.5, 0.5)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        norm = np.sqrt(np.sum(a*a)*np.sum(b*b, axis=-1))
+        peak = np.where(norm > 0, c1/norm, 0.0)
+    return lags[k] + frac, peak
+
+
+def xcorr_offsets(x, y, window=None, step=None, reference=None,
+                  upsample=10, derivative=True, maxShift=None,
+                  iterations=2):
+    """
+    Aligns all scans at once by cross-correlating them against a reference
+    over an energy window
+
+    :param x: mono energies, array of shape (nscans, npts)
+    :param y: reference column, array of shape (nscans, npts)
+    :param window: (emin, emax), limited to the range covered by all scans
+    :param step: grid step, defaults to the median step of x
+    :param reference: index of the scan to align to, or a template array on
+    the window grid. By default, the median of all scans, rebuilt from the
+    aligned scans after each iteration.
+    :param upsample: see xcorr_lags, None for parabolic refinement
+    :param maxShift: largest offset considered, in energy units
+    :param iterations: number of alignment passes against the median
+    :returns: dictionary of arrays (nscans,) of offset (deltaE), corr (the
+    normalized correlation with the reference), offsetZ (robust z-score of
+    the offset among the scans), and clipped (the best lag was at
+    maxShift, so the true offset may be larger), plus the grid and the
+    template the scans were aligned to
+    """
+    from xastools.quality import robust_zscore
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    if step is None:
+        step = np.nanmedian(np.abs(np.diff(x, axis=1)))
+    covered = (np.nanmax(np.nanmin(x, axis=1)),
+               np.nanmin(np.nanmax(x, axis=1)))
+    if window is None:
+        window = covered
+    window = (max(window[0], covered[0]), min(window[1], covered[1]))
+    grid = np.arange(window[0], window[1] + step/2, step)
+    grid = grid[grid <= window[1]]
+    spectra = interp_scans(x, y, grid)
+    if np.any(np.isnan(spectra)):
+        raise ValueError(f"Missing values in the window {window}")
+    maxlag = None if maxShift is None else int(np.ceil(maxShift/step))
+    offset = np.zeros(x.shape[0])
+    if reference is not None:
+        iterations = 1
+    for n in range(iterations):
+        if reference is None:
+            if n == 0:
+                template = np.median(spectra, axis=0)
+            else:
+                shifted = interp_scans(x + offset[:, np.newaxis], y, grid)
+                template = np.nanmedian(shifted, axis=0)
+        elif np.ndim(reference) == 0:
+            template = spectra[reference]
+        else:
+            template = np.asarray(reference, dtype=float)
+        lag, corr = xcorr_lags(template, spectra, derivative, maxlag,
+                               upsample)
+        offset = -lag*step
+    clipped = np.zeros(offset.shape, dtype=bool)
+    if maxlag is not None:
+        clipped = np.abs(lag) >= maxlag - 0.5
+    return {'offset': offset, 'corr': corr,
+            'offsetZ': robust_zscore(offset), 'clipped': clipped,
+            'grid': grid, 'template': template}
+
+
+class StreamingAligner:
+    """
+    Aligns scans one at a time against a running reference, the mean of
+    the most recently aligned scans, so long series with slow mono drift
+    (and slowly changing samples) can be aligned as they are collected.
+    Each new scan costs one FFT cross-correlation over the alignment
+    window, and earlier scans are never revisited.
+    """
+
+    def __init__(self, emin, emax, step=0.05, nref=10, derivative=True,
+                 maxShift=2.0, edge=None, width=5):
+        """
+        :param emin, emax: alignment window
+        :param step: grid step within the window
+        :param nref: number of recent aligned scans averaged into the
+        reference, or None for all of them (kept as a running sum, so
+        memory use does not grow with the number of scans)
+        :param derivative: see xcorr_lags
+        :param maxShift: largest offset (relative to the reference)
+        considered, in energy units
+        :param edge: if given, the first scan is calibrated against this
+        edge with find_mono_offset. Otherwise its offset is 0, and all
+        later offsets are relative to it.
+        :param width: passed to find_mono_offset
+        """
+        self.grid = np.arange(emin, emax + step/2, step)
+        self.step = step
+        self.nref = nref
+        self.derivative = derivative
+        self.maxShift = maxShift
+        self.edge = edge
+        self.width = width
+        self.reference = None
+        self.offsets = {}
+        self._recent = deque()
+        self._sum = np.zeros_like(self.grid)
+        self._count = 0
+
+    def _onGrid(self, x, y):
+        order = np.argsort(x)
+        x, y = x[order], y[order]
+        valid = np.isfinite(x) & np.isfinite(y)
+        x, y = x[valid], y[valid]
+        if x.size < 2 or x[0] > self.grid[0] or x[-1] < self.grid[-1]:
+            raise ValueError("Scan does not cover the alignment window "
+                             f"{self.grid[0]}-{self.grid[-1]}")
+        return np.interp(self.grid, x, y)
+
+    def add(self, x, y, scan=None):
+        """
+        Aligns one scan against the running reference, then adds it to the
+        reference
+
+        :param x: mono energies of the scan
+        :param y: reference column of the scan
+        :param scan: label under which to record the offset
+        :returns: deltaE for this scan
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if self.reference is None:
+            deltaE = 0.0
+            if self.edge is not None:
+                deltaE = float(find_mono_offset(x[np.newaxis], y[np.newaxis],
+                                                self.edge, self.width)[0])
+        else:
+            lag, peak = xcorr_lags(self.reference, self._onGrid(x, y),
+                                   self.derivative,
+                                   int(np.ceil(self.maxShift/self.step)))
+            deltaE = -float(lag)*self.step
+        aligned = self._onGrid(x + deltaE, y)
+        self._sum += aligned
+        self._count += 1
+        if self.nref is not None:
+            self._recent.append(aligned)
+            if len(self._recent) > self.nref:
+                self._sum -= self._recent.popleft()
+                self._count -= 1
+        self.reference = self._sum/self._count
+        if scan is None:
+            scan = len(self.offsets)
+        self.offsets[scan] = deltaE
+        return deltaE
+
+    def update(self, xas, col='REF', xcol='MONO'):
+        """
+        Aligns the scans of xas that have not been seen yet, in scan order,
+        and writes their MONO offsets into xas.data['offsets']. Offsets of
+        scans aligned earlier are left as they are.
+
+        :returns: dictionary of {scan: deltaE} for the new scans
+        """
+        scans = [s for s in xas.data.scan.data if s not in self.offsets]
+        if not scans:
+            return {}
+        x = xas.columnData(xcol, scans).data
+        y = xas.columnData(col, scans).data
+        new = {s: self.add(xs, ys, s) for s, xs, ys in zip(scans, x, y)}
+        xas.data['offsets'].loc[dict(ch='MONO', scan=scans)] = list(new.values())
+        return new
@@ -17,37 +17,44 @@ def edge_jump(e, k, i1, f='erf'):
     else:
         return (np.arctan(k*(e - i1)) + np.pi/2)/np.pi
 
-def fit_preedge(e, c, e1, e2):
+def fit_window(e, e1, e2, window=None):
+    """
+    Points of the fit region: window if given (a slice, see
+    utils.energy_window), otherwise from the points nearest e1 up to the
+    point nearest e2
+    """
+    if window is not None:
+        return window
+    idx1 = np.argmin(np.abs(e - e1))
+    idx2 = np.argmin(np.abs(e - e2))
+    return slice(idx1, idx2)
+
+def fit_preedge(e, c, e1, e2, window=None):
     """
 
     :param e: Energy 
     :param c: Counts 
     :param e1: Start of fit region (energy)
     :param e2: End of fit region (energy)
+    :param window: optional precomputed fit region, see fit_window
     :returns: Pre-edge flattened c
     :rtype: 
 
     """
-    idx1 = np.argmin(np.abs(e - e1))
-    idx2 = np.argmin(np.abs(e - e2))
-    efit = e[idx1:idx2]
-    cfit = c[idx1:idx2]
-    p = P.fit(efit, cfit, 1)
+    idx = fit_window(e, e1, e2, window)
+    p = P.fit(e[idx], c[idx], 1)
     return p(e)
 
-def flatten_pre(e, c, e1, e2):
-    b = fit_preedge(e, c, e1, e2)
+def flatten_pre(e, c, e1, e2, window=None):
+    b = fit_preedge(e, c, e1, e2, window)
     return c - b
 
-def fit_postedge(e, c, e1, e2, deg):
-    idx1 = np.argmin(np.abs(e - e1))
-    idx2 = np.argmin(np.abs(e - e2))
-    efit = e[idx1:idx2]
-    cfit = c[idx1:idx2]
-    p = P.fit(efit, cfit, deg)
+def fit_postedge(e, c, e1, e2, deg, window=None):
+    idx = fit_window(e, e1, e2, window)
+    p = P.fit(e[idx], c[idx], deg)
     return p(e)
 
-def flatten_post(e, c, e0, e1, e2, deg):
+def flatten_post(e, c, e0, e1, e2, deg, window=None):
     """Fits a polynomial of degree deg to post-edge of an XAS spectrum and 
     then flattens it.
 
@@ -57,11 +64,12 @@ def flatten_post(e, c, e0, e1, e2, deg):
     :param e1: Lower limit of fit region (energy)
     :param e2: Upper limit of fit region (energy)
     :param deg: Polynomial degree
+    :param window: optional precomputed fit region, see fit_window
     :returns: Post-edge flattened spectrum
     :rtype: 
 
     """
-    post = fit_postedge(e, c, e1, e2, deg)
+    post = fit_postedge(e, c, e1, e2, deg, window)
     idx = np.argmin(np.abs(e - e0))
     post2 = post - post[idx]
     post2[post2<0] = 0
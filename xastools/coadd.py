@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class CoaddAccumulator:
+    """
+    Running weighted sums over the scan axis, from which the weighted mean
+    and its uncertainty are computed. Scans may be added in chunks, so only
+    one chunk needs to be in memory at a time.
+
+    Sums are taken relative to the first scan added, which keeps the
+    variance from cancelling catastrophically when the spread between scans
+    is small compared to the signal.
+    """
+
+    def __init__(self):
+        self.shift = None
+
+    def add(self, y, w, var=None, mask=None):
+        """
+        :param y: array of shape (nscans, ...)
+        :param w: per-scan weights, broadcastable to y
+        :param var: optional variance of each point of y (e.g. Poisson)
+        :param mask: optional boolean array, False for points to leave out
+        """
+        y = np.asarray(y, dtype=float)
+        w = np.broadcast_to(np.asarray(w, dtype=float), y.shape)
+        valid = np.isfinite(y)
+        if mask is not None:
+            valid &= mask
+        w = np.where(valid, w, 0.0)
+        if self.shift is None:
+            self.shift = np.where(valid[0], y[0], 0.0)
+            zeros = np.zeros(y.shape[1:])
+            self.S0, self.S1, self.S2 = zeros.copy(), zeros.copy(), zeros.copy()
+            self.W2, self.SV = zeros.copy(), zeros.copy()
+            self.N = np.zeros(y.shape[1:], dtype=int)
+        d = np.where(valid, y - self.shift, 0.0)
+        wd = w*d
+        self.S0 += w.sum(axis=0)
+        self.S1 += wd.sum(axis=0)
+        self.S2 += (wd*d).sum(axis=0)
+        self.W2 += (w*w).sum(axis=0)
+        self.N += valid.sum(axis=0)
+        if var is not None:
+            self.SV += (w*w*np.where(valid, var, 0.0)).sum(axis=0)
+
+    def mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.shift + self.S1/self.S0
+
+    def spread(self):
+        """
+        Unbiased weighted standard deviation of the individual scans
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ss = self.S2 - self.S1**2/self.S0
+            var = ss/(self.S0 - self.W2/self.S0)
+        return np.sqrt(np.clip(var, 0, None))
+
+    def result(self, error='poisson'):
+        """
+        :param error: 'poisson' to propagate the per-point variances given to
+        add, or 'empirical' to use the scatter between scans
+        :returns: dictionary of mean, variance and stderr of the mean, spread
+        of the scans, effective number of scans neff, number of scans used
+        per point nscans, and effective counts mean**2/variance
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.mean()
+            spread = self.spread()
+            neff = self.S0**2/self.W2
+            if error == 'poisson':
+                variance = self.SV/self.S0**2
+            elif error == 'empirical':
+                variance = spread**2/neff
+            else:
+                raise ValueError(f"Unknown error mode {error}")
+            counts = mean**2/variance
+        return {'mean': mean, 'variance': variance,
+                'stderr': np.sqrt(variance), 'spread': spread,
+                'neff': neff, 'nscans': self.N, 'counts': counts}
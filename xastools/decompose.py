@@ -0,0 +1,132 @@
+"""
+PCA of large series of spectra, without leaving xastools.
+
+Spectra are rows of a (nspectra, nfeatures) array. pca works on an array
+in memory, with a full or randomized SVD. IncrementalPCA takes the
+spectra in chunks, so only one chunk (plus the components) is in memory
+at a time.
+"""
+import numpy as np
+
+
+def randomized_svd(a, ncomp, oversample=10, iterations=4, seed=0):
+    """
+    Truncated SVD by random projection (Halko, Martinsson and Tropp)
+
+    :param a: array of shape (m, n)
+    :param ncomp: number of singular vectors to return
+    :param oversample: extra random directions, for accuracy
+    :param iterations: power iterations, for slowly decaying spectra
+    :returns: u (m, ncomp), s (ncomp,), vt (ncomp, n)
+    """
+    rng = np.random.default_rng(seed)
+    k = min(ncomp + oversample, *a.shape)
+    q, _ = np.linalg.qr(a @ rng.standard_normal((a.shape[1], k)))
+    for n in range(iterations):
+        q, _ = np.linalg.qr(a.T @ q)
+        q, _ = np.linalg.qr(a @ q)
+    u, s, vt = np.linalg.svd(q.T @ a, full_matrices=False)
+    return (q @ u)[:, :ncomp], s[:ncomp], vt[:ncomp]
+
+
+def _signFlip(u, vt):
+    """
+    Makes the largest entry of each component positive, so results do not
+    depend on the solver
+    """
+    signs = np.sign(vt[np.arange(len(vt)), np.argmax(np.abs(vt), axis=1)])
+    signs[signs == 0] = 1
+    return u*signs, vt*signs[:, np.newaxis]
+
+
+def pca(spectra, ncomp, method='full', center=True, **kwargs):
+    """
+    :param spectra: array of shape (nspectra, nfeatures)
+    :param ncomp: number of components
+    :param method: 'full' or 'randomized' (see randomized_svd, which gets
+    kwargs)
+    :param center: subtract the mean spectrum first
+    :returns: dictionary of mean (nfeatures,), components (ncomp,
+    nfeatures), scores (nspectra, ncomp), singular_values (ncomp,) and
+    explained_variance_ratio (ncomp,)
+    """
+    a = np.asarray(spectra, dtype=float)
+    mean = a.mean(axis=0) if center else np.zeros(a.shape[1])
+    a = a - mean
+    if method == 'full':
+        u, s, vt = np.linalg.svd(a, full_matrices=False)
+        u, s, vt = u[:, :ncomp], s[:ncomp], vt[:ncomp]
+    elif method == 'randomized':
+        u, s, vt = randomized_svd(a, ncomp, **kwargs)
+    else:
+        raise ValueError(f"Unknown method {method}")
+    u, vt = _signFlip(u, vt)
+    total = np.sum(a*a)
+    return {'mean': mean, 'components': vt, 'scores': u*s,
+            'singular_values': s,
+            'explained_variance_ratio': s**2/total if total > 0 else s*0}
+
+
+class IncrementalPCA:
+    """
+    PCA updated one chunk of spectra at a time (Ross et al., as in
+    scikit-learn's IncrementalPCA). Memory use is set by the chunk size
+    and ncomp, not by the number of spectra.
+
+        ipca = IncrementalPCA(3)
+        for chunk in chunks:
+            ipca.partial_fit(chunk)
+        scores = np.concatenate([ipca.transform(c) for c in chunks])
+    """
+
+    def __init__(self, ncomp):
+        self.ncomp = ncomp
+        self.n = 0
+        self.mean = None
+        self.components = None
+        self.singular_values = None
+        self._sumsq = 0.0
+
+    def partial_fit(self, chunk):
+        """
+        :param chunk: array of shape (nchunk, nfeatures)
+        """
+        x = np.asarray(chunk, dtype=float)
+        m = x.shape[0]
+        if m == 0:
+            return self
+        chunkMean = x.mean(axis=0)
+        if self.n == 0:
+            stacked = x - chunkMean
+            mean = chunkMean
+            self._sumsq = np.sum(stacked**2)
+        else:
+            total = self.n + m
+            mean = self.mean + (chunkMean - self.mean)*m/total
+            correction = np.sqrt(self.n*m/total)*(self.mean - chunkMean)
+            centered = x - chunkMean
+            # Total sum of squares about the new mean, for explained variance
+            self._sumsq += (np.sum(centered**2)
+                            + np.sum(correction**2))
+            stacked = np.vstack([self.singular_values[:, np.newaxis]
+                                 * self.components, centered,
+                                 correction[np.newaxis]])
+        u, s, vt = np.linalg.svd(stacked, full_matrices=False)
+        u, vt = _signFlip(u, vt)
+        self.components = vt[:self.ncomp]
+        self.singular_values = s[:self.ncomp]
+        self.mean = mean
+        self.n += m
+        return self
+
+    def transform(self, chunk):
+        """
+        :returns: scores of shape (nchunk, ncomp)
+        """
+        return (np.asarray(chunk, dtype=float) - self.mean) @ self.components.T
+
+    @property
+    def explained_variance_ratio(self):
+        if self._sumsq == 0:
+            return np.zeros_like(self.singular_values)
+        return self.singular_values**2/self._sumsq
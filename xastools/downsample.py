@@ -0,0 +1,148 @@
+"""
+Downsampling of many scans for display, so that the cost of drawing is
+set by the number of pixels rather than the number of points.
+
+Both methods work on every scan at once. Each scan is cut to the visible
+energy range and split into buckets of equal numbers of points. 'minmax'
+keeps the smallest and largest point of each bucket, so spikes and edges
+survive.
+'lttb' (largest triangle three buckets, Steinarsson 2013) keeps the one
+point of each bucket that best preserves the shape of the line.
+"""
+import numpy as np
+
+
+def visible_range(x, xmin=None, xmax=None):
+    """
+    Point range [lo, hi) of sorted scans that covers xmin to xmax in every
+    scan, plus one point on either side so lines reach the edges
+
+    :param x: array of shape (nscans, npts), each row increasing
+    """
+    npts = x.shape[1]
+    if x.strides[0] == 0:
+        # Scans broadcast from one shared axis
+        x = x[:1]
+    lo = 0 if xmin is None else min(np.searchsorted(row, xmin) for row in x)
+    hi = npts if xmax is None else max(np.searchsorted(row, xmax, 'right')
+                                       for row in x)
+    return max(lo - 1, 0), min(hi + 1, npts)
+
+
+def _buckets(a, nbuckets):
+    """
+    Splits the last axis of a (nscans, n) array into nbuckets buckets of
+    n//nbuckets points, without copying
+
+    :returns: view of shape (nscans, nbuckets - 1, size) of all buckets but
+    the last, and view of the last bucket, which also takes the leftover
+    points
+    """
+    size = a.shape[1]//nbuckets
+    start = (nbuckets - 1)*size
+    return a[:, :start].reshape(a.shape[0], nbuckets - 1, size), a[:, start:]
+
+
+def _extremes(y, axis):
+    """
+    Positions of the smallest and largest values along axis, ignoring NaN
+    """
+    if np.isnan(y).any():
+        missing = np.isnan(y)
+        return (np.argmin(np.where(missing, np.inf, y), axis=axis),
+                np.argmax(np.where(missing, -np.inf, y), axis=axis))
+    return np.argmin(y, axis=axis), np.argmax(y, axis=axis)
+
+
+def minmax_downsample(x, y, nout):
+    """
+    :param x: array of shape (nscans, npts)
+    :param y: array of shape (nscans, npts)
+    :param nout: at most this many points are kept per scan
+    :returns: x, y of shape (nscans, <= nout), in the original order
+    """
+    nbuckets = max(nout//2, 1)
+    if x.shape[1] <= 2*nbuckets:
+        return x, y
+    xb, xlast = _buckets(x, nbuckets)
+    yb, ylast = _buckets(y, nbuckets)
+    imin, imax = _extremes(yb, 2)
+    lmin, lmax = _extremes(ylast, 1)
+    # Keep each bucket's pair of points in the order they were measured
+    idx = np.stack([np.minimum(imin, imax), np.maximum(imin, imax)], axis=2)
+    last = np.stack([np.minimum(lmin, lmax), np.maximum(lmin, lmax)], axis=1)
+    rows = np.arange(x.shape[0])[:, np.newaxis]
+    xs = np.concatenate([np.take_along_axis(xb, idx, 2).reshape(
+        x.shape[0], -1), xlast[rows, last]], axis=1)
+    ys = np.concatenate([np.take_along_axis(yb, idx, 2).reshape(
+        y.shape[0], -1), ylast[rows, last]], axis=1)
+    return xs, ys
+
+
+def lttb_downsample(x, y, nout):
+    """
+    Largest triangle three buckets, for all scans at once. The first and
+    last points are kept, and one point from each of nout - 2 buckets in
+    between. One loop step per bucket; each step is vectorized over scans
+    and the points of the bucket.
+
+    :param x: array of shape (nscans, npts)
+    :param y: array of shape (nscans, npts)
+    :returns: x, y of shape (nscans, <= nout)
+    """
+    nscans, npts = x.shape
+    if npts <= nout or nout < 3:
+        return x, y
+    nbuckets = nout - 2
+    xb, xlast = _buckets(x[:, 1:-1], nbuckets)
+    yb, ylast = _buckets(y[:, 1:-1], nbuckets)
+    buckets = [(xb[:, n], yb[:, n]) for n in range(nbuckets - 1)]
+    buckets.append((xlast, ylast))
+    with np.errstate(invalid='ignore'):
+        # The third point of each triangle is the next bucket's average
+        shared = x.strides[0] == 0
+        rx, rlast = (xb[:1], xlast[:1]) if shared else (xb, xlast)
+        xnext = np.concatenate([np.nanmean(rx[:, 1:], axis=2),
+                                np.nanmean(rlast, axis=1)[:, np.newaxis],
+                                x[:1 if shared else None, -1:]], axis=1)
+        xnext = np.broadcast_to(xnext, (nscans, xnext.shape[1]))
+        ynext = np.concatenate([np.nanmean(yb[:, 1:], axis=2),
+                                np.nanmean(ylast, axis=1)[:, np.newaxis],
+                                y[:, -1:]], axis=1)
+    xs = np.empty((nscans, nbuckets + 2))
+    ys = np.empty((nscans, nbuckets + 2))
+    xs[:, 0], ys[:, 0] = x[:, 0], y[:, 0]
+    xs[:, -1], ys[:, -1] = x[:, -1], y[:, -1]
+    rows = np.arange(nscans)
+    for n, (bx, by) in enumerate(buckets):
+        ax, ay = xs[:, n:n + 1], ys[:, n:n + 1]
+        cx, cy = xnext[:, n:n + 1], ynext[:, n:n + 1]
+        area = np.abs((ax - cx)*(by - ay) - (ax - bx)*(cy - ay))
+        best = np.argmax(np.where(np.isnan(area), -np.inf, area), axis=1)
+        xs[:, n + 1] = bx[rows, best]
+        ys[:, n + 1] = by[rows, best]
+    return xs, ys
+
+
+def downsample(x, y, nout, method='minmax', xmin=None, xmax=None):
+    """
+    Cuts scans to the visible range and downsamples them
+
+    :param x: array of shape (npts,) or (nscans, npts), each scan
+    increasing
+    :param y: array of shape (npts,) or (nscans, npts)
+    :param nout: points to keep per scan
+    :param method: 'minmax' or 'lttb'
+    :param xmin: lower limit of the visible range, default all
+    :param xmax: upper limit of the visible range, default all
+    :returns: x, y, 2-d (one row per scan)
+    """
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    x = np.broadcast_to(np.asarray(x, dtype=float), y.shape)
+    lo, hi = visible_range(x, xmin, xmax)
+    x, y = x[:, lo:hi], y[:, lo:hi]
+    if method == 'minmax':
+        return minmax_downsample(x, y, nout)
+    elif method == 'lttb':
+        return lttb_downsample(x, y, nout)
+    raise ValueError(f"Unknown downsampling method {method}")
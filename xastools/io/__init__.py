@@ -1,5 +1,6 @@
-from .loadXAS import load
+from .loadXAS import load, loadOne, loadHeader
 from .exportXAS import exportXASToSSRL, exportXASToYaml, exportXASToAthena
 from .athenaExport import exportToAthena
 from .ssrlExport import exportToSSRL
 from .yamlExport import exportToYaml
+from .scanIndex import ScanIndex
@@ -1,8 +1,10 @@
 import numpy as np
 from os.path import exists, join
 from .ssrlExport import makeOffsetStr, makeWeightStr
+from ..profiling import timed
 
 
+@timed("exportToAthena")
 def exportToAthena(
     folder,
     data,
@@ -24,8 +26,8 @@ def exportToAthena(
     :param c1: Comment string 1
     :param c2: Comment string 2
     :param headerUpdates: Manual updates for header dictionary (helpful to fill missing info)
-    :returns:
-    :rtype:
+    :returns: the filename written
+    :rtype: str
 
     """
 
@@ -35,6 +37,7 @@ def exportToAthena(
         i = 1
         while exists(filename):
             filename = base_filename + f"_{i}"
+            i += 1
 
     if verbose:
         print(f"Exporting to {filename}")
@@ -97,6 +100,7 @@ ROIS:
         f.write(headerstring)
         f.write("\n")
         np.savetxt(f, data, fmt=" %8.8e")
+    return filename
 
 
 def add_comment_to_lines(multiline_string, comment_char="#"):
@@ -3,6 +3,7 @@ from .yamlExport import exportToYaml
 from .ssrlExport import exportToSSRL
 from .athenaExport import exportToAthena
 from ..xas import inferColTypes
+from ..profiling import timed
 
 
 def headerFromXAS(xas, data=None):
@@ -39,6 +40,7 @@ def dataFromXAS(xas, norm=None, offsetMono=False, exclude=[], **kwargs):
     # Will eventually deal with multiscans, etc
     scans = xas.getIncludedScans(exclude)
     data = xas.data.sel(scan=scans).copy(deep=True)
+    data['data'] = xas.getCols(list(xas.columns), exclude).astype(float)
     cols = np.array(xas.channelinfo["cols"])
     if hasattr(xas.channelinfo, "coltypes"):
         coltypes = xas.channelinfo["coltypes"]
@@ -61,6 +63,7 @@ def dataFromXAS(xas, norm=None, offsetMono=False, exclude=[], **kwargs):
     return data
 
 
+@timed("getDataAndHeader")
 def getDataAndHeader(xas, **kwargs):
     data = dataFromXAS(xas, **kwargs)
     header = headerFromXAS(xas, data)
@@ -68,22 +71,25 @@ def getDataAndHeader(xas, **kwargs):
     return d, header
 
 
+@timed("exportXASToYaml")
 def exportXASToYaml(
     xas, folder, namefmt="{sample}_{scan}.yaml", increment=True, **kwargs
 ):
     data, header = getDataAndHeader(xas, **kwargs)
-    exportToYaml(folder, data, header, namefmt, increment=increment)
+    return exportToYaml(folder, data, header, namefmt, increment=increment)
 
 
+@timed("exportXASToSSRL")
 def exportXASToSSRL(
     xas, folder, namefmt="{sample}_{scan}.dat", increment=True, **kwargs
 ):
     data, header = getDataAndHeader(xas, **kwargs)
-    exportToSSRL(folder, data, header, namefmt, increment=increment)
+    return exportToSSRL(folder, data, header, namefmt, increment=increment)
 
 
+@timed("exportXASToAthena")
 def exportXASToAthena(
     xas, folder, namefmt="{sample}_{scan}.dat", increment=True, **kwargs
 ):
     data, header = getDataAndHeader(xas, **kwargs)
-    exportToAthena(folder, data, header, namefmt, increment=increment)
+    return exportToAthena(folder, data, header, namefmt, increment=increment)
@@ -1,38 +1,68 @@
-from functools import reduce
-from ..xas import XAS
-from .yamlExport import loadFromYaml
-from .ssrlExport import loadFromSSRL
+from ..xas import XAS, LazyXAS, concatScans
+from ..profiling import timed
+from .yamlExport import loadFromYaml, loadHeaderFromYaml
+from .ssrlExport import loadFromSSRL, loadHeaderFromSSRL
 
 
-def loadOne(filename):
+def _getLoaders(filename):
     ext = filename.split('.')[-1]
     if ext == 'yaml':
-        data, header = loadFromYaml(filename)
+        return loadFromYaml, loadHeaderFromYaml
     elif ext == "dat":
-        data, header = loadFromSSRL(filename)
+        return loadFromSSRL, loadHeaderFromSSRL
     else:
         raise ValueError("File extension not recognized")
-    return XAS.from_data_header(data, header)
 
 
-def loadMany(filenames):
+def loadHeader(filename):
+    """
+    Reads only the header of a file, returning the same header
+    dictionary as the full loaders
+    """
+    loader, headerLoader = _getLoaders(filename)
+    return headerLoader(filename)
+
+
+@timed("loadOne")
+def loadOne(filename, lazy=False, dtype=None):
+    """
+    :param filename: .yaml or .dat file
+    :param lazy: if True, only read the header now, and parse the data
+    when XAS.data is first accessed
+    :param dtype: storage dtype policy, e.g. 'compact' (see
+    xas.storageLayout). Defaults to float64.
+    """
+    loader, headerLoader = _getLoaders(filename)
+    if lazy:
+        header = headerLoader(filename)
+        return LazyXAS(header, lambda: loader(filename)[0], dtype)
+    data, header = loader(filename)
+    return XAS.from_data_header(data, header, dtype, copy=False)
+
+
+def loadMany(filenames, lazy=False, dtype=None):
     spectra = []
     for f in filenames:
-        spectra.append(loadOne(f))
+        spectra.append(loadOne(f, lazy=lazy, dtype=dtype))
     return spectra
 
 
-def loadCombined(filenames):
-    spectra = loadMany(filenames)
+def loadCombined(filenames, dtype=None):
+    spectra = loadMany(filenames, dtype=dtype)
     #spectra.sort(key=lambda x: x.scans[0])
-    return reduce(lambda x, y: x + y, spectra)
+    # One concat instead of a chain of XAS additions
+    header = spectra[0].getHeader()
+    data = concatScans([s.data for s in spectra])
+    return XAS(data, copy=False, **header)
 
 
-def load(filenames):
+def load(filenames, dtype=None):
     """
     Takes one or more filenames and returns a single combined XAS object
+
+    :param dtype: storage dtype policy, see loadOne
     """
     if isinstance(filenames, str):
-        return loadOne(filenames)
+        return loadOne(filenames, dtype=dtype)
     else:
-        return loadCombined(filenames)
+        return loadCombined(filenames, dtype)
@@ -0,0 +1,213 @@
+import json
+import sqlite3
+import warnings
+from os import walk
+from os.path import abspath, exists, getmtime, isdir, join
+from .loadXAS import load, loadHeader
+
+indexkeys = ["sample", "loadid", "date", "command", "motor"]
+
+schema = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL,
+    sample TEXT,
+    loadid TEXT,
+    date TEXT,
+    command TEXT,
+    motor TEXT,
+    scaninfo TEXT,
+    motors TEXT,
+    cols TEXT
+);
+CREATE TABLE IF NOT EXISTS scans (path TEXT, scan TEXT);
+CREATE TABLE IF NOT EXISTS channels (path TEXT, ch TEXT);
+CREATE INDEX IF NOT EXISTS files_sample ON files (sample);
+CREATE INDEX IF NOT EXISTS scans_path ON scans (path);
+CREATE INDEX IF NOT EXISTS scans_scan ON scans (scan);
+CREATE INDEX IF NOT EXISTS channels_path ON channels (path);
+CREATE INDEX IF NOT EXISTS channels_ch ON channels (ch);
+"""
+
+
+def _toText(value):
+    if value is None:
+        return None
+    return str(value)
+
+
+def _jsonDefault(value):
+    # numpy scalars and arrays from the loaders
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+class ScanIndex:
+    """
+    SQLite index of the scaninfo, motors and channel lists of
+    SSRL/YAML spectrum files, built from the headers only
+    """
+    extensions = ("dat", "yaml")
+
+    def __init__(self, dbfile=":memory:"):
+        """
+        :param dbfile: SQLite database file, created if it does not exist
+        """
+        self.dbfile = dbfile
+        self.conn = sqlite3.connect(dbfile)
+        self.conn.executescript(schema)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def _findFiles(self, path, recursive=True):
+        filenames = []
+        for root, dirs, files in walk(path):
+            for f in sorted(files):
+                if f.split('.')[-1] in self.extensions:
+                    filenames.append(join(root, f))
+            if not recursive:
+                break
+        return filenames
+
+    def _remove(self, path):
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM scans WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM channels WHERE path = ?", (path,))
+
+    def _insert(self, path, mtime, header):
+        scaninfo = dict(header.get('scaninfo', {}))
+        motors = header.get('motors', {})
+        cols = list(header.get('channelinfo', {}).get('cols', []))
+        scan = scaninfo.get('scan', None)
+        if isinstance(scan, (list, tuple)):
+            scans = scan
+        else:
+            scans = [scan]
+        self._remove(path)
+        self.conn.execute(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, mtime,
+             *[_toText(scaninfo.get(k, None)) for k in indexkeys],
+             json.dumps(scaninfo, default=_jsonDefault),
+             json.dumps(motors, default=_jsonDefault),
+             json.dumps(cols)))
+        self.conn.executemany("INSERT INTO scans VALUES (?, ?)",
+                              [(path, _toText(s)) for s in scans])
+        self.conn.executemany("INSERT INTO channels VALUES (?, ?)",
+                              [(path, c) for c in cols])
+
+    def update(self, paths, recursive=True):
+        """
+        Adds files to the index, re-reading headers only for files whose
+        mtime has changed since they were last indexed. Files under an indexed
+        directory that no longer exist are dropped.
+
+        :param paths: a file, a directory, or a list of either
+        :param recursive: whether to descend into subdirectories
+        :returns: number of files (re-)indexed
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        filenames = []
+        for p in paths:
+            p = abspath(p)
+            if isdir(p):
+                filenames += self._findFiles(p, recursive)
+                self.prune(p)
+            else:
+                filenames.append(p)
+        known = dict(self.conn.execute("SELECT path, mtime FROM files"))
+        nupdated = 0
+        for f in filenames:
+            mtime = getmtime(f)
+            if known.get(f, None) == mtime:
+                continue
+            try:
+                header = loadHeader(f)
+            except Exception as e:
+                warnings.warn(f"Could not index {f}: {e}")
+                continue
+            self._insert(f, mtime, header)
+            nupdated += 1
+        self.conn.commit()
+        return nupdated
+
+    def prune(self, prefix=""):
+        """
+        Removes entries for files that no longer exist
+
+        :param prefix: only consider indexed paths starting with prefix
+        """
+        # Compared literally, as paths may contain LIKE wildcards (% and _)
+        paths = [p for (p,) in self.conn.execute(
+            "SELECT path FROM files WHERE substr(path, 1, ?) = ?",
+            (len(prefix), prefix))]
+        for p in paths:
+            if not exists(p):
+                self._remove(p)
+        self.conn.commit()
+
+    def query(self, scan=None, cols=None, **kwargs):
+        """
+        Finds indexed files matching all of the given criteria. String
+        values may contain glob wildcards (*, ?, [...]).
+
+        :param scan: scan number, matched against every scan in a file
+        :param cols: channel name or list of names that must all be present
+        :param kwargs: any of sample, loadid, date, command, motor
+        :returns: sorted list of filenames
+        """
+        clauses = []
+        params = []
+        for k, v in kwargs.items():
+            if k not in indexkeys:
+                raise KeyError(f"Cannot query on {k}, expected one of {indexkeys}")
+            clauses.append(f"{k} GLOB ?")
+            params.append(str(v))
+        if scan is not None:
+            clauses.append("path IN (SELECT path FROM scans WHERE scan GLOB ?)")
+            params.append(str(scan))
+        if cols is not None:
+            if isinstance(cols, str):
+                cols = [cols]
+            for c in cols:
+                clauses.append("path IN (SELECT path FROM channels WHERE ch = ?)")
+                params.append(c)
+        sql = "SELECT path FROM files"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY path"
+        return [p for (p,) in self.conn.execute(sql, params)]
+
+    def getHeader(self, filename):
+        """
+        Returns the indexed scaninfo, motors and cols for a file
+        """
+        row = self.conn.execute(
+            "SELECT scaninfo, motors, cols FROM files WHERE path = ?",
+            (abspath(filename),)).fetchone()
+        if row is None:
+            raise KeyError(f"{filename} is not indexed")
+        scaninfo, motors, cols = map(json.loads, row)
+        return {"scaninfo": scaninfo, "motors": motors,
+                "channelinfo": {"cols": cols}}
+
+    def load(self, **kwargs):
+        """
+        Loads all files matching the query (see query) into one XAS object
+        """
+        filenames = self.query(**kwargs)
+        if len(filenames) == 0:
+            return None
+        return load(filenames)
@@ -2,8 +2,10 @@ import numpy as np
 from os.path import exists, join
 from os import mkdir
 from ..xas import inferColTypes
+from ..profiling import timed
 
 
+@timed("exportToSSRL")
 def exportToSSRL(
     folder,
     data,
@@ -26,8 +28,8 @@ def exportToSSRL(
     :param c1: Comment string 1
     :param c2: Comment string 2
     :param headerUpdates: Manual updates for header dictionary (helpful to fill missing info)
-    :returns:
-    :rtype:
+    :returns: the filename written
+    :rtype: str
 
     """
 
@@ -37,6 +39,7 @@ def exportToSSRL(
         i = 1
         while exists(filename):
             filename = base_filename + f"_{i}"
+            i += 1
 
     if verbose:
         print(f"Exporting to {filename}")
@@ -101,6 +104,7 @@ Data:
     with open(filename, "w") as f:
         f.write(headerstring)
         np.savetxt(f, data, fmt=" %8.8e")
+    return filename
 
 
 def makeWeightStr(weights, cols):
@@ -166,39 +170,41 @@ def parseOffsets(line, cols):
     return offsets
 
 
-def loadFromSSRL(filename):
+def _readSSRLHeader(f):
     """
-    :param filename: SSRL .dat file to read in
-    returns data, header
+    Reads the SSRL header from an open file, leaving f positioned
+    at the start of the numeric block
+
+    :param f: file object opened for reading at the start of the file
+    :returns: header, npts, ncols
     """
-    with open(filename, "r") as f:
-        f.readline()
-        dateline = f.readline()
-        fmtline = f.readline().split()
-        npts = int(fmtline[1])
-        ncols = int(fmtline[3])
-        for n in range(4):
-            f.readline()
-        sampleline = f.readline().split()
-        sample = sampleline[1]
-        loadid = sampleline[3]
-        cmdline = f.readline().rstrip("\n")
-        slitline = f.readline().rstrip("\n")
-        manipline = f.readline().rstrip("\n")
-        scanline = f.readline().split()
-        try:
-            scan = scanline[1]
-        except:
-            scan = None
-        for n in range(2):
-            f.readline()
-        f.readline()
-        weightline = f.readline()
+    f.readline()
+    dateline = f.readline()
+    fmtline = f.readline().split()
+    npts = int(fmtline[1])
+    ncols = int(fmtline[3])
+    for n in range(4):
         f.readline()
-        offsetline = f.readline()
+    sampleline = f.readline().split()
+    sample = sampleline[1]
+    loadid = sampleline[3]
+    cmdline = f.readline().rstrip("\n")
+    slitline = f.readline().rstrip("\n")
+    manipline = f.readline().rstrip("\n")
+    scanline = f.readline().split()
+    try:
+        scan = scanline[1]
+    except:
+        scan = None
+    for n in range(2):
         f.readline()
-        cols = [f.readline().rstrip("\n") for n in range(ncols)]
-    data = np.loadtxt(filename, skiprows=(20 + ncols))
+    f.readline()
+    weightline = f.readline()
+    f.readline()
+    offsetline = f.readline()
+    f.readline()
+    cols = [f.readline().rstrip("\n") for n in range(ncols)]
+
     header = {}
     scaninfo = {}
     scaninfo["date"] = dateline.rstrip("\n")
@@ -230,5 +236,27 @@ def loadFromSSRL(filename):
     header["scaninfo"] = scaninfo
     header["motors"] = motors
     header["channelinfo"] = channelinfo
+    return header, npts, ncols
+
 
+def loadHeaderFromSSRL(filename):
+    """
+    Reads only the header of an SSRL .dat file, without parsing the data
+
+    :param filename: SSRL .dat file to read in
+    :returns: header
+    """
+    with open(filename, "r") as f:
+        header, npts, ncols = _readSSRLHeader(f)
+    return header
+
+
+def loadFromSSRL(filename):
+    """
+    :param filename: SSRL .dat file to read in
+    returns data, header
+    """
+    with open(filename, "r") as f:
+        header, npts, ncols = _readSSRLHeader(f)
+    data = np.loadtxt(filename, skiprows=(20 + ncols))
     return data, header
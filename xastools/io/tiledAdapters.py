@@ -1,21 +1,103 @@
-from .yamlExport import loadFromYaml
-from .ssrlExport import loadFromSSRL
+import numpy as np
+from os.path import getmtime
+from .yamlExport import loadFromYaml, loadHeaderFromYaml
+from .ssrlExport import loadFromSSRL, loadHeaderFromSSRL
 from tiled.adapters.array import ArrayAdapter
+from tiled.adapters.core import Adapter
+from tiled.adapters.resource_cache import with_resource_cache
+from tiled.structures.array import ArrayStructure, BuiltinDtype
+from tiled.structures.core import Spec, StructureFamily
 
 
-class SSRLAdapter(ArrayAdapter):
-    specs = ['nistxas']
+def _countRows(f):
+    """
+    Counts the remaining non-empty lines of an open file without parsing them
+    """
+    return sum(1 for line in f if line.strip())
+
+
+class _LazyFileAdapter(Adapter[ArrayStructure]):
+    """
+    Serves an XAS file as an (index, ch) array. Only the header is read
+    when the adapter is created; the numeric block is parsed on the first
+    read and kept in tiled's resource cache, keyed on the file mtime.
+    Reads are delegated to an ArrayAdapter over the cached array. Each
+    channel is its own chunk, so clients can fetch single channels and
+    point ranges.
+
+    Subclasses set loader and headerLoader, and define
+    countRows(filepath, header).
+    """
+    structure_family = StructureFamily.array
+    loader = None
+    headerLoader = None
+
+    def __init__(self, filepath, structure, *, metadata=None, specs=None):
+        self.filepath = filepath
+        if specs is None:
+            specs = [Spec("nistxas")]
+        super().__init__(structure, metadata=metadata, specs=specs)
 
     @classmethod
     def from_file(cls, filepath):
-        data, header = loadFromSSRL(filepath)
-        return cls.from_array(data, metadata=header)
+        header = cls.headerLoader(filepath)
+        ncols = len(header['channelinfo']['cols'])
+        npts = cls.countRows(filepath, header)
+        structure = ArrayStructure(
+            data_type=BuiltinDtype.from_numpy_dtype(np.dtype("float64")),
+            chunks=((npts,), (1,) * ncols),
+            shape=(npts, ncols),
+            dims=("index", "ch"))
+        return cls(filepath, structure, metadata=header)
+
+    def _load(self):
+        data, header = self.loader(self.filepath)
+        return np.atleast_2d(data)
+
+    @property
+    def _array(self):
+        key = (type(self).__name__, self.filepath, getmtime(self.filepath))
+        return with_resource_cache(key, self._load)
+
+    def _arrayAdapter(self):
+        return ArrayAdapter(self._array, self._structure,
+                            metadata=self._metadata, specs=self._specs)
+
+    @property
+    def dims(self):
+        return self._structure.dims
 
+    def read(self, *args, **kwargs):
+        return self._arrayAdapter().read(*args, **kwargs)
 
-class YamlAdapter(ArrayAdapter):
-    specs = ['nistxas']
+    def read_block(self, *args, **kwargs):
+        return self._arrayAdapter().read_block(*args, **kwargs)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.filepath!r})"
+
+
+class SSRLAdapter(_LazyFileAdapter):
+    loader = staticmethod(loadFromSSRL)
+    headerLoader = staticmethod(loadHeaderFromSSRL)
 
     @classmethod
-    def from_file(cls, filepath):
-        data, header = loadFromYaml(filepath)
-        return cls.from_array(data, metadata=header)
+    def countRows(cls, filepath, header):
+        ncols = len(header['channelinfo']['cols'])
+        with open(filepath, "r") as f:
+            for n in range(20 + ncols):
+                f.readline()
+            return _countRows(f)
+
+
+class YamlAdapter(_LazyFileAdapter):
+    loader = staticmethod(loadFromYaml)
+    headerLoader = staticmethod(loadHeaderFromYaml)
+
+    @classmethod
+    def countRows(cls, filepath, header):
+        with open(filepath, "r") as f:
+            for line in f:
+                if line == "...\n":
+                    break
+            return _countRows(f)
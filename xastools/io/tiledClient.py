@@ -1,15 +1,128 @@
+import numpy as np
+import xarray as xr
+from concurrent.futures import ThreadPoolExecutor
 from tiled.client.array import ArrayClient
-from ..xas import XAS
+from ..xas import XAS, convertDataHeader
+
+
+def _plainHeader(metadata):
+    """
+    Converts tiled's read-only metadata views into a mutable header dict
+    """
+    if hasattr(metadata, "items"):
+        return {k: _plainHeader(v) for k, v in metadata.items()}
+    if isinstance(metadata, (list, tuple)):
+        return [_plainHeader(v) for v in metadata]
+    return metadata
+
+
+def _contiguousRuns(idx):
+    """
+    Groups column indices into runs of consecutive indices, so that
+    neighbouring columns are fetched in one request
+    """
+    runs = []
+    for i in idx:
+        if runs and runs[-1].stop == i:
+            runs[-1] = slice(runs[-1].start, i + 1)
+        else:
+            runs.append(slice(i, i + 1))
+    return runs
+
+
+def selectHeader(header, cols):
+    """
+    Restricts the channelinfo of a header to a subset of columns
+    """
+    channelinfo = header['channelinfo']
+    allcols = list(channelinfo['cols'])
+    idx = [allcols.index(c) for c in cols]
+    channelinfo['cols'] = list(cols)
+    if 'coltypes' in channelinfo:
+        channelinfo['coltypes'] = [channelinfo['coltypes'][i] for i in idx]
+    for k in ['weights', 'offsets']:
+        if k in channelinfo:
+            channelinfo[k] = {c: v for c, v in channelinfo[k].items()
+                              if c in cols}
+    return header, idx
+
+
+def _fetch(client, cols=None, points=None):
+    """
+    Reads the data and header of one array entry
+
+    :returns: data, header
+    """
+    header = _plainHeader(client.metadata)
+    if points is None:
+        points = slice(None)
+    if cols is None:
+        data = client[points, :]
+    else:
+        header, idx = selectHeader(header, cols)
+        data = np.concatenate([client[points, run]
+                               for run in _contiguousRuns(idx)], axis=-1)
+    return np.asarray(data), header
 
 
 class XASClient(ArrayClient):
-    def to_xas(self):
-        data = self.read()
-        header = self.metadata
-        return XAS.from_data_header(data, header)
-    
+    def to_xas(self, cols=None, points=None):
+        """
+        Fetch this entry as an XAS object, transferring only what is needed
+
+        :param cols: list of columns to fetch (include the x column, e.g. MONO).
+        Defaults to all columns.
+        :param points: slice of point indices to fetch. Defaults to all points.
+        """
+        data, header = _fetch(self, cols, points)
+        return XAS.from_data_header(data, header, copy=False)
+
+
 def xas_client(*args, **kwargs):
     ac = ArrayClient(*args, **kwargs)
     data = ac.read()
-    header = ac.metadata
-    return XAS.from_data_header(data, header)
+    header = _plainHeader(ac.metadata)
+    return XAS.from_data_header(data, header, copy=False)
+
+
+def xas_from_tiled(container, keys=None, scans=None, cols=None, points=None,
+                   max_concurrency=8):
+    """
+    Fetch many entries of a tiled container concurrently and assemble them
+    into one scan-stacked XAS object, without chaining XAS additions.
+
+    Requests share the container's HTTP connection pool.
+
+    :param container: tiled container client
+    :param keys: entries to fetch. Defaults to every entry in the container.
+    :param scans: if given, only keep entries whose scaninfo scan is in scans
+    :param cols: columns to fetch (see XASClient.to_xas)
+    :param points: slice of point indices to fetch
+    :param max_concurrency: maximum number of simultaneous requests
+    :returns: XAS object, with scans in the order of keys
+    """
+    if keys is None:
+        keys = list(container.keys())
+    if scans is not None:
+        scans = [str(s) for s in np.atleast_1d(scans)]
+
+    def fetch(key):
+        client = container[key]
+        if scans is not None:
+            scan = client.metadata['scaninfo'].get('scan', None)
+            if str(scan) not in scans:
+                return None
+        return _fetch(client, cols, points)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = [r for r in executor.map(fetch, keys) if r is not None]
+    if len(results) == 0:
+        return None
+    datasets = []
+    header = None
+    for data, h in results:
+        d, h = convertDataHeader(data, h, copy=False)
+        datasets.append(d)
+        if header is None:
+            header = h
+    return XAS(xr.concat(datasets, "scan"), copy=False, **header)
@@ -1,9 +1,11 @@
-import yaml
 from os.path import join, exists
 import numpy as np
+from ..profiling import timed
 
 
 def writeHeader(filename, header):
+    import yaml
+
     def ndrep(dumper, data):
         return dumper.represent_data([float(d) for d in data])
 
@@ -24,6 +26,7 @@ def writeData(filename, scanData):
         np.savetxt(f, scanData, fmt=datafmt)
 
 
+@timed("exportToYaml")
 def exportToYaml(
     folder, data, header, namefmt="{sample}_{scan}.yaml", verbose=True, increment=False
 ):
@@ -33,8 +36,8 @@ def exportToYaml(
     :param data: numpy array of data
     :param header: Header dictionary consisting of 'scaninfo', 'motors', 'channelinfo' subdictionaries
     :param namefmt: format string consisting of keys in scaninfo dictionary
-    :returns:
-    :rtype:
+    :returns: the filename written
+    :rtype: str
 
     """
 
@@ -44,17 +47,37 @@ def exportToYaml(
         i = 1
         while exists(filename):
             filename = base_filename + f"_{i}"
+            i += 1
     if verbose:
         print(f"Exporting to {filename}")
     writeHeader(filename, header)
     writeData(filename, data)
+    return filename
+
+
+def loadHeaderFromYaml(filename):
+    """
+    Reads only the YAML header, stopping at the "..." end marker
+
+    :param filename: YAML file to read in
+    :returns: header
+    """
+    import yaml
+    lines = []
+    with open(filename, "r") as f:
+        for line in f:
+            lines.append(line)
+            if line == "...\n":
+                break
+    return yaml.load("".join(lines), Loader=yaml.Loader)
 
 
 def loadFromYaml(filename):
+    import yaml
     with open(filename, "r") as f:
         document = f.readlines()
     yamlEnd = document.index("...\n") + 1
     yamlStr = "".join(document[:yamlEnd])
-    header = yaml.load(yamlStr)
+    header = yaml.load(yamlStr, Loader=yaml.Loader)
     data = np.loadtxt(document[yamlEnd:])
     return data, header
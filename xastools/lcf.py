@@ -0,0 +1,128 @@
+"""
+Linear combination fitting (LCF) of many spectra against a library of
+reference spectra, with non-negative weights.
+
+The library is interpolated onto the target grid once (per trial energy
+shift), and all spectra are solved together. For up to maxSubset
+references the non-negative least squares problem is solved exactly by
+trying every subset of references at once: the NNLS solution is the
+unconstrained solution on its own support, so it is the best feasible
+subset solution. Each subset costs a small solve with the Gram matrix,
+for all spectra together. Larger libraries fall back to scipy's nnls,
+one spectrum at a time.
+"""
+import itertools
+import numpy as np
+
+
+def loadLibrary(filenames, col, normType=None, names=None, **kwargs):
+    """
+    Loads reference spectra with io.load
+
+    :param filenames: list of files (or lists of files) to load, one
+    reference each
+    :param col: column to use
+    :param normType: normalization of each reference, see utils.normalize
+    :param names: reference names, defaults to the sample names
+    :param kwargs: passed to getData
+    :returns: dictionary of {name: (x, y)}
+    """
+    from xastools.io import load
+    from xastools.utils import normalize
+    kwargs.setdefault('aggregate', 'mean')
+    library = {}
+    for n, f in enumerate(filenames):
+        xas = load(f)
+        x, y = xas.getData(col, **kwargs)
+        name = names[n] if names is not None else str(xas.sample)
+        library[name] = (np.asarray(x), normalize(np.asarray(x),
+                                                  np.asarray(y), normType))
+    return library
+
+
+def library_matrix(library, grid, shift=0.0):
+    """
+    Interpolates every reference onto grid + shift
+
+    :param library: dictionary of {name: (x, y)}
+    :returns: array of shape (nrefs, ngrid)
+    """
+    rows = []
+    for x, y in library.values():
+        order = np.argsort(x)
+        rows.append(np.interp(np.asarray(grid) + shift, np.asarray(x)[order],
+                              np.asarray(y)[order]))
+    return np.array(rows)
+
+
+def nnls_batch(refs, spectra, maxSubset=10):
+    """
+    Solves min |w @ refs - b|, w >= 0 for every row b of spectra
+
+    :param refs: array of shape (nrefs, ngrid)
+    :param spectra: array of shape (nspectra, ngrid)
+    :param maxSubset: largest number of references solved by subset
+    enumeration
+    :returns: weights (nspectra, nrefs) and squared residual norm
+    (nspectra,)
+    """
+    refs = np.asarray(refs, dtype=float)
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=float))
+    nrefs = refs.shape[0]
+    nspectra = spectra.shape[0]
+    bb = np.sum(spectra*spectra, axis=1)
+    if nrefs > maxSubset:
+        from scipy.optimize import nnls
+        weights = np.array([nnls(refs.T, b)[0] for b in spectra])
+        fit = weights @ refs
+        return weights, np.sum((spectra - fit)**2, axis=1)
+    gram = refs @ refs.T
+    proj = spectra @ refs.T
+    best = bb.copy()
+    weights = np.zeros((nspectra, nrefs))
+    for size in range(1, nrefs + 1):
+        for subset in itertools.combinations(range(nrefs), size):
+            idx = list(subset)
+            w = proj[:, idx] @ np.linalg.pinv(gram[np.ix_(idx, idx)])
+            rss = bb - np.sum(w*proj[:, idx], axis=1)
+            better = np.all(w >= 0, axis=1) & (rss < best - 1e-12*bb)
+            best = np.where(better, rss, best)
+            weights[better] = 0
+            weights[np.ix_(better, idx)] = w[better]
+    return weights, np.clip(best, 0, None)
+
+
+def lcf(spectra, grid, library, shifts=None, maxSubset=10):
+    """
+    Fits every spectrum as a non-negative combination of the references
+
+    :param spectra: array of shape (nspectra, ngrid), on grid
+    :param grid: energies of the spectra
+    :param library: dictionary of {name: (x, y)}, see loadLibrary
+    :param shifts: optional trial energy shifts of the library. Each
+    spectrum keeps the shift with the smallest residual.
+    :returns: dictionary of weights (nspectra, nrefs), fit and residual
+    (nspectra, ngrid), rfactor (nspectra,), sum(residual**2)/sum(y**2),
+    shift (nspectra,) and names of the references
+    """
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=float))
+    if shifts is None:
+        shifts = [0.0]
+    nspectra = spectra.shape[0]
+    best = np.full(nspectra, np.inf)
+    weights = np.zeros((nspectra, len(library)))
+    shift = np.zeros(nspectra)
+    fit = np.zeros_like(spectra)
+    for s in shifts:
+        refs = library_matrix(library, grid, s)
+        w, rss = nnls_batch(refs, spectra, maxSubset)
+        better = rss < best
+        best = np.where(better, rss, best)
+        weights[better] = w[better]
+        shift[better] = s
+        fit[better] = w[better] @ refs
+    residual = spectra - fit
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rfactor = np.sum(residual**2, axis=1)/np.sum(spectra**2, axis=1)
+    return {'weights': weights, 'fit': fit, 'residual': residual,
+            'rfactor': rfactor, 'shift': shift, 'names': list(library)}
@@ -0,0 +1,221 @@
+"""
+Per-sample reduction (load -> align -> export) of many samples in parallel,
+driven by a manifest.
+
+A manifest is a YAML or JSON file (or dictionary) such as
+
+    workers: 8            # worker processes
+    timeout: 600          # seconds per sample
+    maxTasksPerChild: 4   # recycle workers to bound memory growth
+    memoryLimit: 4096     # MB of address space per worker (Unix only)
+    defaults:
+      dtype: compact      # storage dtype policy, see io.load
+      align: {edge: fe, col: REF}
+      export: {format: ssrl, folder: reduced, namefmt: "{sample}.dat",
+               offsetMono: true, norm: I0}
+    samples:
+      sampleA:
+        files: [a_1.dat, a_2.dat]
+      sampleB:
+        files: "b_*.dat"
+        exclude: [3]
+        align: false
+
+Each sample's settings are merged over the defaults. Relative file and
+folder paths are taken relative to the manifest. align is passed to
+XAS.findMonoOffset, and export (apart from format and folder) to the
+matching exportXASTo* function.
+"""
+import glob
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+exportFormats = {'ssrl': 'exportXASToSSRL', 'yaml': 'exportXASToYaml',
+                 'athena': 'exportXASToAthena'}
+
+
+class TaskTimeout(Exception):
+    pass
+
+
+def loadManifest(filename):
+    """
+    Reads a YAML or JSON manifest, recording its folder as root
+    """
+    with open(filename, 'r') as f:
+        if filename.endswith('.json'):
+            manifest = json.load(f)
+        else:
+            import yaml
+            manifest = yaml.safe_load(f)
+    manifest.setdefault('root', os.path.dirname(os.path.abspath(filename)))
+    return manifest
+
+
+def _resolve(root, path):
+    return path if os.path.isabs(path) else os.path.join(root, path)
+
+
+def makeTasks(manifest):
+    """
+    One task dictionary per sample, with defaults merged in and files
+    expanded to sorted absolute paths
+    """
+    root = manifest.get('root', os.getcwd())
+    defaults = manifest.get('defaults', {})
+    tasks = []
+    for sample, settings in manifest['samples'].items():
+        task = {'sample': sample, 'exclude': [], 'align': False,
+                'export': False}
+        task.update(defaults)
+        task.update(settings)
+        patterns = task['files']
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        files = []
+        for p in patterns:
+            matches = sorted(glob.glob(_resolve(root, p)))
+            files.extend(matches if matches else [_resolve(root, p)])
+        task['files'] = files
+        if task['export']:
+            export = dict(task['export'])
+            export['folder'] = _resolve(root, export.get('folder', '.'))
+            task['export'] = export
+        tasks.append(task)
+    return tasks
+
+
+def _alarm(signum, frame):
+    raise TaskTimeout()
+
+
+def runTask(task, timeout=None):
+    """
+    Loads, aligns and exports one sample
+
+    :param timeout: seconds allowed, enforced with SIGALRM. Signal handlers
+    can only be installed from the main thread (as in the pool workers),
+    so from any other thread the timeout is not enforced.
+    :returns: dictionary of sample, status ('ok', 'error' or 'timeout'),
+    files, nscans, offsets (MONO offsets per scan, if aligned), outputs,
+    seconds, and error
+    """
+    from xastools.io import load
+    from xastools.io import exportXAS
+    result = {'sample': task['sample'], 'status': 'ok',
+              'files': task['files'], 'nscans': 0, 'offsets': None,
+              'outputs': [], 'seconds': 0.0, 'error': None}
+    start = time.perf_counter()
+    useAlarm = (timeout is not None and hasattr(signal, 'setitimer') and
+                threading.current_thread() is threading.main_thread())
+    previous = None
+    try:
+        if useAlarm:
+            previous = signal.signal(signal.SIGALRM, _alarm)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        xas = load(task['files'], task.get('dtype'))
+        result['nscans'] = len(xas.data.scan)
+        if task['align']:
+            xas.findMonoOffset(**task['align'])
+            offsets = xas.data.offsets.sel(ch='MONO')
+            result['offsets'] = {str(s): float(o) for s, o in
+                                 zip(offsets.scan.data, offsets.data)}
+        if task['export']:
+            export = dict(task['export'])
+            fmt = export.pop('format', 'ssrl')
+            folder = export.pop('folder')
+            os.makedirs(folder, exist_ok=True)
+            exporter = getattr(exportXAS, exportFormats[fmt])
+            # Scan labels may be strings, depending on the file format
+            exclude = {str(e) for e in task['exclude']}
+            exclude = [s for s in xas.data.scan.data if str(s) in exclude]
+            output = exporter(xas, folder, exclude=exclude, **export)
+            result['outputs'].append(output)
+    except TaskTimeout:
+        result['status'] = 'timeout'
+        result['error'] = f"Exceeded {timeout} s"
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if previous is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _initWorker(memoryLimit):
+    if memoryLimit is None:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    nbytes = int(memoryLimit*2**20)
+    resource.setrlimit(resource.RLIMIT_AS, (nbytes, nbytes))
+
+
+def runPipeline(manifest, workers=None, timeout=None, maxTasksPerChild=None,
+                memoryLimit=None, summary=None, progress=None):
+    """
+    Runs every sample of a manifest, in a process pool unless workers is 1
+
+    :param manifest: manifest filename or dictionary. Keyword arguments
+    left as None are taken from the manifest.
+    :param workers: number of worker processes, defaults to the CPU count
+    :param timeout: seconds allowed per sample
+    :param maxTasksPerChild: samples handled by a worker before it is
+    replaced
+    :param memoryLimit: address space limit per worker, in MB
+    :param summary: optional filename to write the results to, as JSON
+    :param progress: optional callable, called with each result as it
+    completes
+    :returns: list of result dictionaries (see runTask), in manifest order
+    """
+    if isinstance(manifest, str):
+        manifest = loadManifest(manifest)
+    workers = workers or manifest.get('workers') or os.cpu_count()
+    timeout = timeout or manifest.get('timeout')
+    maxTasksPerChild = maxTasksPerChild or manifest.get('maxTasksPerChild')
+    memoryLimit = memoryLimit or manifest.get('memoryLimit')
+    tasks = makeTasks(manifest)
+    results = {}
+    if workers == 1:
+        for n, task in enumerate(tasks):
+            results[n] = runTask(task, timeout)
+            if progress is not None:
+                progress(results[n])
+    else:
+        kwargs = {}
+        if maxTasksPerChild:
+            kwargs['max_tasks_per_child'] = maxTasksPerChild
+        with ProcessPoolExecutor(min(workers, len(tasks) or 1),
+                                 initializer=_initWorker,
+                                 initargs=(memoryLimit,), **kwargs) as pool:
+            futures = {pool.submit(runTask, task, timeout): n
+                       for n, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                n = futures[future]
+                try:
+                    results[n] = future.result()
+                except BrokenProcessPool as e:
+                    # The worker died, e.g. killed for running out of memory
+                    results[n] = {'sample': tasks[n]['sample'],
+                                  'status': 'error',
+                                  'files': tasks[n]['files'], 'nscans': 0,
+                                  'offsets': None, 'outputs': [],
+                                  'seconds': 0.0,
+                                  'error': f"Worker failed: {e}"}
+                if progress is not None:
+                    progress(results[n])
+    results = [results[n] for n in range(len(tasks))]
+    if summary is not None:
+        with open(summary, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
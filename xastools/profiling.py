@@ -0,0 +1,188 @@
+"""
+Opt-in instrumentation of the reduction pipeline
+
+Stages (loadOne, convertDataHeader, the getData substeps, find_mono_offset
+and the exporters) are only timed while a Profiler is active, either via
+
+    with profile() as p:
+        ...
+    print(p.summary())
+    p.to_chrome_trace("trace.json")
+
+or by setting the XASTOOLS_PROFILE environment variable, in which case
+the summary is printed at exit (or written as a Chrome trace if the value
+ends in .json). Set XASTOOLS_PROFILE_MEMORY=1 to also record allocations.
+When no Profiler is active, each stage costs one global lookup.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+_profiler = None
+
+
+class Profiler:
+    def __init__(self, memory=False):
+        """
+        :param memory: if True, record net bytes allocated per stage with
+        tracemalloc (slows everything down noticeably)
+        """
+        self.memory = memory
+        self.events = []
+        self._stopTracing = False
+        self._lock = threading.Lock()
+
+    def record(self, name, start, duration, nbytes=0):
+        with self._lock:
+            self.events.append((name, start, duration, nbytes,
+                                threading.get_ident()))
+
+    def stats(self):
+        """
+        :returns: dictionary of stage name: (calls, total seconds, net bytes)
+        """
+        stats = {}
+        for name, start, duration, nbytes, tid in self.events:
+            calls, total, mem = stats.get(name, (0, 0.0, 0))
+            stats[name] = (calls + 1, total + duration, mem + nbytes)
+        return stats
+
+    def summary(self):
+        """
+        :returns: table of calls, total and mean time, and net allocation
+        per stage, sorted by total time
+        """
+        stats = self.stats()
+        width = max([len(k) for k in stats] + [5])
+        lines = [f"{'stage':<{width}} {'calls':>7} {'total (s)':>10} "
+                 f"{'mean (ms)':>10} {'alloc (MB)':>11}"]
+        for name, (calls, total, mem) in sorted(stats.items(),
+                                                key=lambda kv: -kv[1][1]):
+            lines.append(f"{name:<{width}} {calls:>7d} {total:>10.4f} "
+                         f"{1e3*total/calls:>10.3f} {mem/2**20:>11.2f}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self, filename):
+        """
+        Writes the recorded stages in the Chrome trace event format, for
+        chrome://tracing or Perfetto
+        """
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": 1e6*start,
+                   "dur": 1e6*duration, "pid": pid, "tid": tid,
+                   "args": {"bytes": nbytes}}
+                  for name, start, duration, nbytes, tid in self.events]
+        with open(filename, "w") as f:
+            json.dump({"traceEvents": events}, f)
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start", "mem")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.memory:
+            self.mem = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        duration = time.perf_counter() - self.start
+        nbytes = 0
+        if self.profiler.memory:
+            nbytes = tracemalloc.get_traced_memory()[0] - self.mem
+        self.profiler.record(self.name, self.start, duration, nbytes)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_nullstage = _NullStage()
+
+
+def stage(name):
+    """
+    Context manager timing one stage, if a Profiler is active
+    """
+    if _profiler is None:
+        return _nullstage
+    return _Stage(_profiler, name)
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function as a stage
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return f(*args, **kwargs)
+            with _Stage(_profiler, name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable(memory=False):
+    """
+    Starts recording into a new Profiler, which is returned
+    """
+    global _profiler
+    startTracing = memory and not tracemalloc.is_tracing()
+    if startTracing:
+        tracemalloc.start()
+    _profiler = Profiler(memory)
+    _profiler._stopTracing = startTracing
+    return _profiler
+
+
+def disable():
+    """
+    Stops recording, returning the Profiler that was active
+    """
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    if profiler is not None and profiler._stopTracing:
+        tracemalloc.stop()
+    return profiler
+
+
+@contextmanager
+def profile(memory=False):
+    profiler = enable(memory)
+    try:
+        yield profiler
+    finally:
+        disable()
+
+
+def _reportAtExit(target):
+    profiler = disable()
+    if profiler is None:
+        return
+    if target.endswith(".json"):
+        profiler.to_chrome_trace(target)
+    else:
+        print(profiler.summary())
+
+
+if os.environ.get("XASTOOLS_PROFILE"):
+    enable(memory=bool(os.environ.get("XASTOOLS_PROFILE_MEMORY")))
+    atexit.register(_reportAtExit, os.environ["XASTOOLS_PROFILE"])
@@ -0,0 +1,122 @@
+import numpy as np
+
+# Converts a median absolute deviation to a gaussian standard deviation
+MAD_SCALE = 1.4826
+
+
+def robust_zscore(values, axis=0):
+    """
+    (values - median)/(scaled MAD) along axis. A MAD of zero is replaced by
+    the smallest non-zero MAD (or 1), so constant data gives z = 0.
+    """
+    med = np.nanmedian(values, axis=axis, keepdims=True)
+    mad = MAD_SCALE*np.nanmedian(np.abs(values - med), axis=axis, keepdims=True)
+    positive = mad[mad > 0]
+    floor = positive.min() if positive.size else 1.0
+    mad = np.where(mad > 0, mad, floor)
+    return (values - med)/mad
+
+
+def scan_scores(y, glitch_threshold=8, normalize=True, window=5):
+    """
+    Compares every scan to the median of all scans, for all channels at once
+
+    :param y: array of shape (nscans, npts, nchannels)
+    :param glitch_threshold: robust z-score above which a point is a glitch
+    :param normalize: scale each scan and channel by its median first, so
+    that overall intensity changes are not scored
+    :param window: median filter length for the local test, see glitch_mask
+    :returns: residual (nscans,), median |z| of each scan over points and
+    channels, and glitches (nscans,), number of points with |z| above
+    glitch_threshold both among scans and against a running median of
+    their own scan. The cross-scan z alone is too noisy with few scans,
+    when the MAD of each point is taken over a handful of values.
+    """
+    y = np.asarray(y, dtype=float)
+    if normalize:
+        scale = np.nanmedian(y, axis=1, keepdims=True)
+        scale = np.where(scale != 0, scale, 1)
+        y = y/scale
+    z = np.abs(robust_zscore(y, axis=0))
+    residual = np.nanmedian(z.reshape(z.shape[0], -1), axis=1)
+    with np.errstate(invalid='ignore'):
+        local = np.abs(robust_zscore(y - median_filter(y, window), axis=1))
+        glitches = np.sum((z > glitch_threshold) & (local > glitch_threshold),
+                          axis=(1, 2))
+    return residual, glitches
+
+
+def median_filter(y, window=5, axis=1):
+    """
+    Running median along axis, with the ends reflected
+
+    :param window: odd number of points
+    """
+    half = window//2
+    pad = [(0, 0)]*y.ndim
+    pad[axis] = (half, half)
+    padded = np.pad(y, pad, mode='reflect')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis)
+    return np.median(windows, axis=-1)
+
+
+def glitch_mask(y, window=5, threshold=6):
+    """
+    Flags isolated outliers (mono glitches, detector spikes) in all scans
+    and channels at once.
+
+    A point is compared to a running median of its own scan, scaled by the
+    MAD of that scan's residual. With three or more scans it must also be
+    an outlier compared to the other scans at the same point (after
+    scaling each scan by its median), so that real sharp features, which
+    every scan shares, are not flagged.
+
+    :param y: array of shape (nscans, npts, nchannels)
+    :param window: median filter length in points, odd. Glitches up to
+    window//2 points wide are found.
+    :param threshold: robust z-score above which a point is flagged
+    :returns: boolean array like y, True where a point is a glitch
+    """
+    y = np.asarray(y, dtype=float)
+    with np.errstate(invalid='ignore'):
+        local = np.abs(robust_zscore(y - median_filter(y, window), axis=1))
+        mask = local > threshold
+        if y.shape[0] >= 3:
+            scale = np.nanmedian(y, axis=1, keepdims=True)
+            scale = np.where(scale != 0, scale, 1)
+            across = np.abs(robust_zscore(y/scale, axis=0))
+            mask &= across > threshold
+    return mask
+
+
+def repair_glitches(x, y, mask):
+    """
+    Replaces flagged points by linear interpolation (in x) between the
+    nearest unflagged points of the same scan and channel. Points with an
+    unflagged neighbour on one side only take its value.
+
+    :param x: array of shape (nscans, npts)
+    :param y: array of shape (nscans, npts, nchannels)
+    :param mask: boolean array like y, see glitch_mask
+    :returns: repaired copy of y
+    """
+    y = np.array(y, dtype=float)
+    x = np.broadcast_to(np.asarray(x, dtype=float)[..., np.newaxis], y.shape)
+    npts = y.shape[1]
+    index = np.arange(npts)[np.newaxis, :, np.newaxis]
+    good = ~mask
+    # Nearest good point at or before, and at or after, each point
+    before = np.maximum.accumulate(np.where(good, index, -1), axis=1)
+    after = np.minimum.accumulate(np.where(good, index, npts)[:, ::-1],
+                                  axis=1)[:, ::-1]
+    hasBefore = before >= 0
+    hasAfter = after < npts
+    before = np.where(hasBefore, before, after).clip(0, npts - 1)
+    after = np.where(hasAfter, after, before).clip(0, npts - 1)
+    x0 = np.take_along_axis(x, before, 1)
+    x1 = np.take_along_axis(x, after, 1)
+    y0 = np.take_along_axis(y, before, 1)
+    y1 = np.take_along_axis(y, after, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.where(x1 != x0, (x - x0)/(x1 - x0), 0.0)
+    return np.where(mask, y0 + t*(y1 - y0), y)
@@ -0,0 +1,127 @@
+"""
+Headless rendering of XAS plots to PNG/PDF files.
+
+A ReportRenderer owns one Agg figure and its axes, outside of pyplot, and
+redraws them for every page by updating the data of a fixed pool of lines.
+Memory use therefore does not grow with the number of spectra or pages.
+"""
+from xastools.utils import normalize
+
+
+class ReportRenderer:
+    def __init__(self, nstack=7, figsize=(8, 6), dpi=100):
+        """
+        :param nstack: maximum number of scans drawn on one page
+        :param figsize: figure size in inches
+        :param dpi: resolution of PNG pages
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.nstack = nstack
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111)
+        self.lines = [self.ax.plot([], [])[0] for n in range(nstack)]
+        self.vline = self.ax.axvline(0, color='k', ls='--', visible=False)
+
+    def draw(self, curves, title="", vline=None):
+        """
+        Updates the figure in place to show curves
+
+        :param curves: list of at most nstack (x, y, label) tuples
+        :param title: axes title
+        :param vline: optional x position of a vertical marker
+        """
+        if len(curves) > len(self.lines):
+            raise ValueError(f"At most {len(self.lines)} curves per page")
+        for line, curve in zip(self.lines, curves):
+            x, y, label = curve
+            line.set_data(x, y)
+            line.set_label(label)
+            line.set_visible(True)
+        for line in self.lines[len(curves):]:
+            line.set_data([], [])
+            line.set_label("_hidden")
+            line.set_visible(False)
+        if vline is not None:
+            self.vline.set_xdata([vline, vline])
+        self.vline.set_visible(vline is not None)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+        self.ax.set_title(title)
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        if curves:
+            self.ax.legend(handles=self.lines[:len(curves)])
+        return self.figure
+
+    def pages(self, xas, col, individual=True, normType=None,
+              titlefmt="{sample} XAS", **kwargs):
+        """
+        Yields (curves, title) for each page of one XAS object
+
+        :param individual: one curve per scan, nstack scans per page.
+        Otherwise a single page with the coadded spectrum.
+        :param kwargs: passed to getData
+        """
+        try:
+            title = titlefmt.format(**xas.__dict__)
+        except (KeyError, AttributeError, IndexError):
+            title = str(xas.sample)
+        # Keep the scan dimension, which a single-scan XAS would lose
+        x, y = xas.getData(col, individual=individual, squeeze=False, **kwargs)
+        if not individual:
+            yield [(x.data, normalize(x.data, y.data, normType), col)], title
+            return
+        scans = list(y.scan.data)
+        for n in range(0, len(scans), self.nstack):
+            curves = []
+            for s in scans[n:n + self.nstack]:
+                xs = x.sel(scan=s).data
+                ys = y.sel(scan=s).data
+                curves.append((xs, normalize(xs, ys, normType), f"Scan {s}"))
+            yield curves, title
+
+    def render(self, spectra, col, filename, vline=None, **kwargs):
+        """
+        Renders a list of XAS objects to one file per page (PNG), or to a
+        single multi-page PDF
+
+        :param spectra: XAS object or list of XAS objects
+        :param col: column to plot
+        :param filename: a .pdf file, or a format string with a {page} field,
+        e.g. "report_{page:03d}.png"
+        :param vline: optional x position of a vertical marker (e.g. the edge
+        used by findMonoOffset)
+        :param kwargs: passed to pages (individual, normType, titlefmt) and
+        on to getData (offsetMono, divisor, ...)
+        :returns: number of pages written
+        """
+        if not isinstance(spectra, (list, tuple)):
+            spectra = [spectra]
+        npages = 0
+        if filename.endswith(".pdf"):
+            from matplotlib.backends.backend_pdf import PdfPages
+            with PdfPages(filename) as pdf:
+                for xas in spectra:
+                    for curves, title in self.pages(xas, col, **kwargs):
+                        pdf.savefig(self.draw(curves, title, vline))
+                        npages += 1
+        else:
+            for xas in spectra:
+                for curves, title in self.pages(xas, col, **kwargs):
+                    self.draw(curves, title, vline)
+                    self.figure.savefig(filename.format(page=npages))
+                    npages += 1
+        return npages
+
+
+def renderReport(spectra, col, filename, nstack=7, **kwargs):
+    """
+    Renders a list of XAS objects to a multi-page report, see
+    ReportRenderer.render. For a checkMonoOffset-style report use
+    offsetMono=True and vline=<edge energy>.
+    """
+    renderer = ReportRenderer(nstack=nstack)
+    return renderer.render(spectra, col, filename, **kwargs)
@@ -0,0 +1,195 @@
+"""
+Resampling of many scans onto a common energy grid.
+
+Scans are given as x of shape (nscans, npts) and y of shape
+(nscans, npts, ...). x need not be sorted, and may be padded with NaN
+(as xr.concat does for scans of different lengths).
+
+Where each grid point falls in a scan is found once per scan, with
+np.interp of the sample index, and shared by every channel. The
+interpolation itself is vectorized over scans and channels, a block of
+scans at a time so that the temporaries stay in cache.
+"""
+import numpy as np
+
+# Number of y values processed at once
+_blocksize = 2**15
+
+
+def _sortScans(x, y):
+    """
+    Sorts each scan by x, moving invalid (NaN) points to the end. Scans
+    that are already increasing (the usual case) are not copied.
+
+    :returns: xs, ys, nvalid (number of valid points per scan)
+    """
+    with np.errstate(invalid="ignore"):
+        if np.all(x[:, 1:] > x[:, :-1]):
+            return x, y, np.full(x.shape[0], x.shape[1])
+    valid = np.isfinite(x)
+    nvalid = valid.sum(axis=1)
+    with np.errstate(invalid="ignore"):
+        increasing = np.all((np.diff(x, axis=1) > 0) | ~valid[:, 1:], axis=1)
+    trailing = np.all(valid == (np.arange(x.shape[1]) < nvalid[:, np.newaxis]),
+                      axis=1)
+    if np.all(increasing & trailing):
+        return x, y, nvalid
+    order = np.argsort(np.where(valid, x, np.inf), axis=1, kind="stable")
+    xs = np.take_along_axis(x, order, axis=1)
+    rows = np.arange(x.shape[0])[:, np.newaxis]
+    return xs, y[rows, order], nvalid
+
+
+def _blockScans(y):
+    """
+    Number of scans of y processed at once
+    """
+    return max(_blocksize*y.shape[0]//max(y.size, 1), 1)
+
+
+def _bracket(xs, nvalid, grid):
+    """
+    For each scan and grid point, finds the sorted sample index lo such
+    that the grid point lies between samples lo and lo + 1
+
+    :returns: lo, t (fractional position between lo and lo + 1), and
+    outside (grid point lies outside the scan's range)
+    """
+    index = np.arange(xs.shape[1], dtype=float)
+    pos = np.full((xs.shape[0], len(grid)), np.nan)
+    for row, xrow, n in zip(pos, xs, nvalid.tolist()):
+        if n > 0:
+            row[:] = np.interp(grid, xrow[:n], index[:n], np.nan, np.nan)
+    outside = np.isnan(pos)
+    pos[outside] = 0
+    lo = np.minimum(pos.astype(np.intp),
+                    np.maximum(nvalid - 2, 0)[:, np.newaxis])
+    return lo, pos - lo, outside
+
+
+def _lerp(ys, lo, t, outside, out):
+    """
+    out[s, i] = ys[s, lo] + t*(ys[s, lo + 1] - ys[s, lo]), for every scan s
+    and grid point i, via row lookups into a flattened (scans*npts, ...)
+    copy of each block of ys
+    """
+    nscans, npts = ys.shape[:2]
+    nblock = _blockScans(ys)
+    # Reused for every block, rather than reallocated
+    step = np.empty((min(nblock, nscans)*lo.shape[1], out[0, 0].size))
+    for n in range(0, nscans, nblock):
+        yb = np.ascontiguousarray(ys[n:n + nblock])
+        rows = yb.reshape((yb.shape[0]*npts, -1))
+        idx = (lo[n:n + nblock] +
+               npts*np.arange(yb.shape[0])[:, np.newaxis]).ravel()
+        block = out[n:n + nblock].reshape((len(idx), -1))
+        # mode='clip' lets take write to out directly; idx is in range
+        np.take(rows, idx, axis=0, out=block, mode='clip')
+        hi = np.take(rows, idx + 1, axis=0, out=step[:len(idx)], mode='clip')
+        hi -= block
+        hi *= t[n:n + nblock].reshape((-1, 1))
+        block += hi
+    out[outside] = np.nan
+    return out
+
+
+def interp_scans(x, y, grid):
+    """
+    Linear interpolation of every scan onto grid
+
+    :param x: array of shape (nscans, npts)
+    :param y: array of shape (nscans, npts, ...)
+    :param grid: 1-d target grid
+    :returns: array of shape (nscans, len(grid), ...), NaN outside each
+    scan's x range
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    grid = np.asarray(grid, dtype=float)
+    xs, ys, nvalid = _sortScans(x, y)
+    lo, t, outside = _bracket(xs, nvalid, grid)
+    out = np.empty((x.shape[0], len(grid)) + y.shape[2:])
+    return _lerp(ys, lo, t, outside, out)
+
+
+def grid_edges(grid):
+    """
+    Bin edges for bins centered on the points of a sorted 1-d grid
+    """
+    grid = np.asarray(grid, dtype=float)
+    mid = (grid[1:] + grid[:-1])/2
+    return np.concatenate([[grid[0] - (grid[1] - grid[0])/2], mid,
+                           [grid[-1] + (grid[-1] - grid[-2])/2]])
+
+
+def rebin_scans(x, y, grid):
+    """
+    Count-conserving rebinning of every scan onto bins centered on grid.
+
+    Each sample's counts are spread uniformly over its own bin (halfway to
+    its neighbours), and the counts falling in each target bin are summed,
+    via cumulative sums interpolated at the target bin edges.
+
+    :param x: array of shape (nscans, npts)
+    :param y: counts, array of shape (nscans, npts, ...)
+    :param grid: 1-d sorted target bin centers
+    :returns: counts of shape (nscans, len(grid), ...), NaN for bins not
+    fully covered by a scan
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    xs, ys, nvalid = _sortScans(x, y)
+    nscans, npts = xs.shape
+    rows = np.arange(nscans)
+    # Source bin edges, NaN beyond the last valid edge of each scan
+    edges = np.full((nscans, npts + 1), np.nan)
+    edges[:, 1:npts] = (xs[:, 1:] + xs[:, :-1])/2
+    edges[:, 0] = xs[:, 0] - (xs[:, 1] - xs[:, 0])/2
+    last = np.maximum(nvalid - 1, 1)
+    xlast = xs[rows, last]
+    edges[rows, last + 1] = xlast + (xlast - xs[rows, last - 1])/2
+    targets = grid_edges(grid)
+    lo, t, outside = _bracket(edges, np.isfinite(edges).sum(axis=1), targets)
+    out = np.empty((nscans, len(grid)) + y.shape[2:])
+    nblock = _blockScans(ys)
+    for n in range(0, nscans, nblock):
+        yb = ys[n:n + nblock]
+        if np.isnan(yb).any():
+            yb = np.where(np.isnan(yb), 0.0, yb)
+        cumulative = np.zeros((len(yb), npts + 1) + y.shape[2:])
+        np.cumsum(yb, axis=1, out=cumulative[:, 1:])
+        c = np.empty((len(yb), len(targets)) + y.shape[2:])
+        _lerp(cumulative, lo[n:n + nblock], t[n:n + nblock],
+              outside[n:n + nblock], c)
+        np.subtract(c[:, 1:], c[:, :-1], out=out[n:n + nblock])
+    return out
+
+
+def common_grid(x):
+    """
+    Grid spanning the range covered by every scan, with the median step
+
+    :param x: array of shape (nscans, npts)
+    """
+    x = np.asarray(x, dtype=float)
+    start = np.nanmax(np.nanmin(x, axis=1))
+    stop = np.nanmin(np.nanmax(x, axis=1))
+    step = np.nanmedian(np.abs(np.diff(x, axis=1)))
+    npts = int(np.floor((stop - start)/step + 1e-6)) + 1
+    return np.minimum(start + step*np.arange(npts), stop)
+
+
+def is_heterogeneous(x, tolerance=0.1):
+    """
+    True if the scans are not on one shared grid: some are NaN-padded, or
+    some x differs from the first scan by more than tolerance*step
+
+    :param x: array of shape (nscans, npts)
+    """
+    x = np.asarray(x, dtype=float)
+    if np.any(np.isnan(x)):
+        return True
+    if x.shape[0] < 2 or x.shape[1] < 2:
+        return False
+    step = np.median(np.abs(np.diff(x[0])))
+    return bool(np.max(np.abs(x - x[0])) > tolerance*step)
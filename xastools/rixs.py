@@ -1,17 +1,20 @@
 import numpy as np
 from copy import copy
-from six import string_types
-import matplotlib.pyplot as plt
 import datetime
 from xastools.utils import find_mono_offset, correct_mono, appendMatrices, appendArrays, appendVectors
 
 class RIXS:
-    def __init__(self, x, y, z, xas, eoffsets=None, **kwargs):
+    def __init__(self, x, y, z, xas, eoffsets=None, copy=True, **kwargs):
+        """
+        :param copy: if False, take ownership of x, y and z instead of
+        copying them
+        """
         self.bintype = 'RIXS'
         self.xas = xas
-        self.x = np.array(x)
-        self.y = np.array(y)
-        self.z = np.array(z)
+        asarray = np.array if copy else np.asarray
+        self.x = asarray(x)
+        self.y = asarray(y)
+        self.z = asarray(z)
         if eoffsets is None:
             self.eoffsets = np.zeros_like(self.xas.scans)
         else:
@@ -47,6 +50,14 @@ class RIXS:
         xas = self.xas.copy()
         return RIXS(x, y, z, xas, offsets)
 
+    def toShared(self):
+        """
+        Copies the maps and the XAS data into shared memory, see
+        XAS.toShared
+        """
+        from xastools.shared import SharedHandle
+        return SharedHandle.fromRIXS(self)
+
     def getData(self, divisor=None, individual=False, offsetMono=False, offsetEnergy=False):
         pass
 
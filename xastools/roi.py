@@ -0,0 +1,72 @@
+"""
+Integration of MCA (e.g. SDD) spectra over emission-energy regions of
+interest, turning full spectra into PFY channels.
+
+ROIs are given by name from utils.roiMaster, by element (expanded with
+utils.roiDefaults), or explicitly as {name: [elow, ehigh]}.
+"""
+import numpy as np
+from xastools.utils import roiMaster, roiDefaults
+
+
+def resolveROIs(rois):
+    """
+    :param rois: a ROI name, element, or dictionary, or a list of them
+    :returns: dictionary of {name: (elow, ehigh)}, in the order given
+    """
+    if isinstance(rois, (str, dict)):
+        rois = [rois]
+    windows = {}
+    for roi in rois:
+        if isinstance(roi, dict):
+            windows.update({k: tuple(v) for k, v in roi.items()})
+        elif roi in roiMaster:
+            windows[roi] = tuple(roiMaster[roi])
+        elif roi in roiDefaults:
+            windows.update({k: tuple(roiMaster[k]) for k in roiDefaults[roi]})
+        else:
+            raise KeyError(f"Unknown ROI or element {roi}")
+    return windows
+
+
+def roiIndices(energy, windows):
+    """
+    Bin index ranges [lo, hi) of the bins whose energy lies within each
+    window, for a sorted energy axis
+
+    :returns: lo, hi arrays of shape (nrois,)
+    """
+    bounds = np.array(list(windows.values()), dtype=float).reshape(-1, 2)
+    lo = np.searchsorted(energy, bounds[:, 0], side='left')
+    hi = np.searchsorted(energy, bounds[:, 1], side='right')
+    return lo, hi
+
+
+def integrate_rois(mca, energy, rois, chunksize=None):
+    """
+    Sums MCA counts over every ROI at once. Each chunk is cumulatively
+    summed along the bin axis once, after which each ROI costs one
+    subtraction per point, however wide it is.
+
+    :param mca: array of shape (..., nbins). Anything that can be sliced
+    along its first axis works (e.g. np.memmap or an h5py dataset), and
+    only chunksize entries of that axis are read into memory at a time.
+    :param energy: emission energy of each bin, sorted, shape (nbins,)
+    :param rois: see resolveROIs
+    :param chunksize: entries of the first axis per chunk, default all
+    :returns: array of shape (..., nrois), and the resolved windows
+    """
+    windows = resolveROIs(rois)
+    lo, hi = roiIndices(np.asarray(energy), windows)
+    shape = tuple(mca.shape)
+    # Integer counts are summed exactly
+    acc = np.int64 if np.issubdtype(mca.dtype, np.integer) else np.float64
+    out = np.empty(shape[:-1] + (len(windows),), dtype=acc)
+    if chunksize is None:
+        chunksize = max(shape[0], 1)
+    for start in range(0, shape[0], chunksize):
+        block = np.asarray(mca[start:start + chunksize])
+        cumulative = np.zeros(block.shape[:-1] + (shape[-1] + 1,), dtype=acc)
+        np.cumsum(block, axis=-1, dtype=acc, out=cumulative[..., 1:])
+        out[start:start + chunksize] = cumulative[..., hi] - cumulative[..., lo]
+    return out, windows
@@ -0,0 +1,187 @@
+"""
+Zero-copy transfer of XAS and RIXS objects to worker processes.
+
+The bulk arrays (the per-point variables of the Dataset, and the RIXS
+maps) are copied once into multiprocessing.shared_memory segments. What
+gets pickled is a SharedHandle: segment names, shapes and dtypes, plus the
+coordinates, the small per-scan variables and the header. A worker calls
+handle.attach() to get an object backed directly by the segments.
+
+    with xas.toShared() as handle:
+        results = list(pool.map(work, [handle]*ntasks))
+
+    def work(handle):
+        xas = handle.attach()
+        ...
+
+Attached bulk arrays are read-only, as every process sees the same
+memory; the per-scan offsets and weights are private copies, so e.g.
+findMonoOffset works in a worker. The process that created the handle
+owns the segments and frees them when its with block ends (or on
+unlink()); mappings in other processes are released with the attached
+objects.
+"""
+import numpy as np
+import xarray as xr
+from multiprocessing import shared_memory
+
+
+def shareArray(arr):
+    """
+    Copies an array into a new shared memory segment
+
+    :returns: the SharedMemory segment and a descriptor for attachArray
+    """
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    view[...] = arr
+    del view
+    return shm, {'name': shm.name, 'shape': arr.shape, 'dtype': arr.dtype.str}
+
+
+def attachArray(desc, writeable=False):
+    """
+    Maps the segment of a descriptor from shareArray, without copying
+
+    :returns: the SharedMemory segment and the array. The array is only
+    valid while the segment is open.
+    """
+    shm = shared_memory.SharedMemory(name=desc['name'])
+    arr = np.ndarray(desc['shape'], dtype=np.dtype(desc['dtype']),
+                     buffer=shm.buf)
+    arr.flags.writeable = writeable
+    return shm, arr
+
+
+class SharedHandle:
+    """
+    Picklable descriptor of an XAS or RIXS object in shared memory, see
+    XAS.toShared and RIXS.toShared
+    """
+
+    def __init__(self, kind, arrays, meta, segments):
+        self.kind = kind
+        self.arrays = arrays
+        self.meta = meta
+        self._segments = segments
+
+    @classmethod
+    def fromXAS(cls, xas):
+        data = xas.data
+        arrays = {}
+        variables = {}
+        segments = []
+        try:
+            for k, v in data.data_vars.items():
+                if 'index' in v.dims:
+                    shm, desc = shareArray(v.data)
+                    segments.append(shm)
+                    arrays[k] = desc
+                    variables[k] = (v.dims, None, v.attrs)
+                else:
+                    variables[k] = (v.dims, np.asarray(v.data), v.attrs)
+        except Exception:
+            cls._release(segments)
+            raise
+        coords = {k: (c.dims, np.asarray(c.data)) for k, c in
+                  data.coords.items()}
+        meta = {'variables': variables, 'coords': coords,
+                'header': xas.getHeader()}
+        return cls('XAS', arrays, meta, segments)
+
+    @classmethod
+    def fromRIXS(cls, rixs):
+        xasHandle = cls.fromXAS(rixs.xas)
+        arrays = {}
+        segments = list(xasHandle._segments)
+        try:
+            for k in ('x', 'y', 'z'):
+                shm, desc = shareArray(getattr(rixs, k))
+                segments.append(shm)
+                arrays[k] = desc
+        except Exception:
+            cls._release(segments)
+            raise
+        meta = {'xas': xasHandle, 'eoffsets': np.asarray(rixs.eoffsets)}
+        xasHandle._segments = []
+        return cls('RIXS', arrays, meta, segments)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # Segments stay with the process that owns them
+        state['_segments'] = []
+        return state
+
+    @property
+    def owner(self):
+        return bool(self._segments)
+
+    @property
+    def nbytes(self):
+        """
+        Size of the shared arrays
+        """
+        total = sum(int(np.prod(d['shape']))*np.dtype(d['dtype']).itemsize
+                    for d in self.arrays.values())
+        if self.kind == 'RIXS':
+            total += self.meta['xas'].nbytes
+        return total
+
+    def _attachAll(self, writeable):
+        segments = []
+        arrays = {}
+        for k, desc in self.arrays.items():
+            shm, arrays[k] = attachArray(desc, writeable)
+            segments.append(shm)
+        return segments, arrays
+
+    def attach(self, writeable=False):
+        """
+        Builds the object on top of the shared segments, without copying.
+        The segments stay mapped for as long as the object exists.
+
+        :param writeable: allow in-place changes of the shared arrays,
+        which every attached process sees
+        """
+        if self.kind == 'RIXS':
+            from xastools.rixs import RIXS
+            xas = self.meta['xas'].attach(writeable)
+            segments, arrays = self._attachAll(writeable)
+            obj = RIXS(arrays['x'], arrays['y'], arrays['z'], xas,
+                       self.meta['eoffsets'].copy(), copy=False)
+            obj._shared = segments
+            return obj
+        from xastools.xas import XAS
+        segments, arrays = self._attachAll(writeable)
+        variables = {}
+        for k, (dims, values, attrs) in self.meta['variables'].items():
+            values = arrays[k] if values is None else values.copy()
+            variables[k] = xr.Variable(dims, values, attrs)
+        data = xr.Dataset(variables, coords=self.meta['coords'])
+        obj = XAS(data, copy=False, **self.meta['header'])
+        obj._shared = segments
+        return obj
+
+    @staticmethod
+    def _release(segments):
+        for shm in segments:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def unlink(self):
+        """
+        Frees the segments (owner only). Objects already attached in
+        other processes keep their mappings until they are deleted.
+        """
+        segments, self._segments = self._segments, []
+        self._release(segments)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
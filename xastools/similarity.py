@@ -0,0 +1,192 @@
+"""
+Nearest-neighbour search over an archive of spectra.
+
+Each archived spectrum is reduced once to a fingerprint: resampled onto a
+fixed grid, normalized (see utils.normalize) and stored as one float32
+row of a matrix. Queries compare a fingerprint against every row at once,
+optionally in a PCA-compressed space.
+"""
+import numpy as np
+from os.path import abspath, getmtime
+from xastools.utils import normalize
+
+
+class SimilarityIndex:
+    def __init__(self, grid, col='TEY', divisor=None, normType='tail',
+                 **kwargs):
+        """
+        :param grid: energy grid of the fingerprints
+        :param col: column used as the spectrum
+        :param divisor: passed to getData
+        :param normType: 'tail' or 'pp' (see utils.normalize)
+        :param kwargs: passed to getData (offsetMono, exclude, ...)
+        """
+        self.grid = np.asarray(grid, dtype=float)
+        self.col = col
+        self.divisor = divisor
+        self.normType = normType
+        self.kwargs = kwargs
+        self.keys = []
+        self.mtimes = {}
+        self._positions = {}
+        self._rows = np.empty((0, len(self.grid)), dtype=np.float32)
+        self.components = None
+        self.mean = None
+        self._reduced = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def matrix(self):
+        """
+        Fingerprints, one float32 row per key
+        """
+        return self._rows[:len(self.keys)]
+
+    def fingerprint(self, x, y):
+        """
+        Resamples one spectrum onto the grid and normalizes it
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        order = np.argsort(x)
+        y = np.interp(self.grid, x[order], y[order])
+        y = normalize(self.grid, y, self.normType)
+        return np.nan_to_num(y).astype(np.float32)
+
+    def fingerprintXAS(self, xas):
+        x, y = xas.getData(self.col, divisor=self.divisor, aggregate='mean',
+                           **self.kwargs)
+        return self.fingerprint(x, y)
+
+    def _store(self, key, row):
+        if key in self._positions:
+            n = self._positions[key]
+        else:
+            n = len(self.keys)
+            if n == len(self._rows):
+                # Grow geometrically, so appending is amortized O(1)
+                grown = np.empty((max(2*n, 64), len(self.grid)),
+                                 dtype=np.float32)
+                grown[:n] = self._rows[:n]
+                self._rows = grown
+            self.keys.append(key)
+            self._positions[key] = n
+        self._rows[n] = row
+        self._reduced = None
+
+    def add(self, key, xas):
+        """
+        Adds (or replaces) one XAS object under key
+        """
+        self._store(key, self.fingerprintXAS(xas))
+
+    def addFiles(self, filenames):
+        """
+        Adds files that are new or have changed since they were added
+
+        :returns: list of the filenames (re)indexed
+        """
+        from xastools.io import loadOne
+        added = []
+        for f in filenames:
+            key = abspath(f)
+            mtime = getmtime(key)
+            if self.mtimes.get(key) == mtime:
+                continue
+            self._store(key, self.fingerprintXAS(loadOne(key)))
+            self.mtimes[key] = mtime
+            added.append(key)
+        return added
+
+    def compress(self, ncomp=20, method='randomized'):
+        """
+        Fits a PCA of the fingerprints; queries are then answered in the
+        ncomp-dimensional score space. Fingerprints added later are
+        projected onto the same components.
+        """
+        from xastools.decompose import pca
+        result = pca(self.matrix, ncomp, method)
+        self.mean = result['mean'].astype(np.float32)
+        self.components = result['components'].astype(np.float32)
+        self._reduced = None
+
+    def _space(self):
+        """
+        The rows queries are compared against, with their squared norms
+        """
+        if self.components is None:
+            rows = self.matrix
+        else:
+            if self._reduced is None:
+                self._reduced = (self.matrix - self.mean) @ self.components.T
+            rows = self._reduced
+        return rows, np.einsum('ij,ij->i', rows, rows)
+
+    def query(self, fingerprints, k=5):
+        """
+        Finds the k nearest archived spectra (Euclidean distance between
+        fingerprints) for each query
+
+        :param fingerprints: array of shape (ngrid,) or (nqueries, ngrid),
+        see fingerprint
+        :returns: keys (nqueries, k) and distances (nqueries, k), nearest
+        first, or one row of each for a single query. Fewer than k if the
+        index holds fewer spectra (none if it is empty).
+        """
+        q = np.atleast_2d(np.asarray(fingerprints, dtype=np.float32))
+        if self.components is not None:
+            q = (q - self.mean) @ self.components.T
+        rows, norms = self._space()
+        d2 = norms[np.newaxis] - 2*(q @ rows.T) + np.sum(q*q, axis=1)[:, None]
+        k = min(k, len(self))
+        if k == 0:
+            nearest = np.empty((len(q), 0), dtype=np.intp)
+        else:
+            nearest = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(d2, nearest, 1), axis=1)
+        nearest = np.take_along_axis(nearest, order, 1)
+        dist = np.sqrt(np.clip(np.take_along_axis(d2, nearest, 1), 0, None))
+        keys = np.array(self.keys, dtype=object)[nearest]
+        if np.ndim(fingerprints) == 1:
+            return keys[0], dist[0]
+        return keys, dist
+
+    def queryXAS(self, xas, k=5):
+        return self.query(self.fingerprintXAS(xas), k)
+
+    def save(self, filename):
+        """
+        Writes the index to a .npz file
+        """
+        arrays = {'grid': self.grid, 'matrix': self.matrix,
+                  'keys': np.array(self.keys, dtype=str),
+                  'mtimes': np.array([self.mtimes.get(k) or np.nan
+                                      for k in self.keys]),
+                  'settings': np.array([self.col, self.divisor or '',
+                                        self.normType or ''])}
+        if self.components is not None:
+            arrays['mean'] = self.mean
+            arrays['components'] = self.components
+        np.savez(filename, **arrays)
+
+    @classmethod
+    def load(cls, filename, **kwargs):
+        """
+        Reads an index written by save. kwargs are passed to getData for
+        spectra added later.
+        """
+        with np.load(filename) as f:
+            col, divisor, normType = f['settings']
+            index = cls(f['grid'], str(col), str(divisor) or None,
+                        str(normType) or None, **kwargs)
+            index.keys = [str(k) for k in f['keys']]
+            index._positions = {k: n for n, k in enumerate(index.keys)}
+            index._rows = f['matrix'].copy()
+            index.mtimes = {k: (None if np.isnan(m) else float(m))
+                            for k, m in zip(index.keys, f['mtimes'])}
+            if 'components' in f:
+                index.mean = f['mean']
+                index.components = f['components']
+        return index
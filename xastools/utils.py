@@ -1,6 +1,5 @@
 import numpy as np
-from scipy.interpolate import UnivariateSpline
-from scipy.signal import savgol_filter, argrelmax
+from xastools.profiling import timed
 
 
 refEdges = {'o': 527, 'mn': 638, 'fe': 706.9, 'co': 779.1, 'ni': 852.7}
@@ -24,6 +23,22 @@ roiDefaults = {'b': ['bk'], 'c': ['ck'], 'sr': ['srm'], 'n': ['nk'], 'ti': ['til
                'zn': ['znlab', 'znll'], "na": ["nak"]}
 
 
+# np.trapz was renamed in numpy 2.0 and later removed
+trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def energy_window(x, emin, emax):
+    """
+    Finds the points of a sorted 1-d energy axis with emin <= x <= emax by
+    binary search. The result is a slice, so y[window] is a view.
+
+    :returns: slice of the points in the window
+    """
+    lo = np.searchsorted(x, emin, side='left')
+    hi = np.searchsorted(x, emax, side='right')
+    return slice(int(lo), int(hi))
+
+
 def at_least_2d(arr):
     if len(arr.shape) < 2:
         return arr[:, np.newaxis]
@@ -64,36 +79,47 @@ def ppNorm(y):
     return ynorm
 
 
-def areaNorm(x, y, start=0, end=None, offset=True):
+def areaNorm(x, y, start=0, end=None, offset=True, window=None):
     """
     :param x: X-coordinates of data
     :param y: Y-coordinates of data
+    :param window: optional slice (see energy_window) of the points to
+    integrate, instead of start and end
     :returns: y with total area normalized to 1
     :rtype:
 
     """
+    if window is not None:
+        start, end = window.start or 0, window.stop
     if offset:
         sub = np.mean(y[start:start+10, ...], axis=0)
     else:
         sub = 0
-    area = np.trapz(y[start:end, ...] - sub, x[start:end, ...], axis=0)
+    area = trapezoid(y[start:end, ...] - sub, x[start:end, ...], axis=0)
 
     return (y - sub)/area
 
 
-def tailNorm(y, start=0, end=-10, startRange=10, endRange=10):
+def tailNorm(y, start=0, end=-10, startRange=10, endRange=10, pre=None,
+             post=None):
     """
     tailNorm essentially sets the pre-edge to 0, and the post-edge to 1.
     It works just like ppNorm, but for "min" uses the average of the first 10
     points, and for max uses the average of the last 10 points.
 
     :param y: y data (counts)
+    :param pre: optional slice (see energy_window) averaged for "min"
+    :param post: optional slice averaged for "max"
 
     """
-    ymin = np.mean(y[start:start + startRange], axis=0)
-    if end < 0:
-        end = len(y) + end
-    ymax = np.mean(y[end:end + endRange], axis=0)
+    if pre is None:
+        pre = slice(start, start + startRange)
+    if post is None:
+        if end < 0:
+            end = len(y) + end
+        post = slice(end, end + endRange)
+    ymin = np.mean(y[pre], axis=0)
+    ymax = np.mean(y[post], axis=0)
     ynorm = (y - ymin)/(ymax - ymin)
 
     return ynorm
@@ -123,6 +149,7 @@ def correct_mono(mono, offset, scancounts):
     """
     Takes one mono, one offset
     """
+    from scipy.interpolate import UnivariateSpline
     scancounts_new = np.zeros_like(scancounts)
     if len(scancounts.shape) == 2:
         for n in range(scancounts.shape[1]):
@@ -136,16 +163,24 @@ def correct_mono(mono, offset, scancounts):
     return scancounts_new
 
 
-def find_y_peak(xlist, ylist, center, width=5, smooth=False):
+def find_y_peak(xlist, ylist, center, width=5, smooth=False, window=None):
     """
     Find the position of a relative maximum in the y-data, given a
     window centered on center, of width width
+
+    :param window: optional precomputed slice (see energy_window) of the
+    points to search, instead of center and width
     """
+    from scipy.interpolate import UnivariateSpline
+    from scipy.signal import savgol_filter
     if len(xlist.shape) > 1:
         xlist = xlist[0, :]
     if len(ylist.shape) == 1:
         ylist = np.expand_dims(ylist, axis=0)
-    xidx = (xlist > (center - width)) & (xlist < (center + width))
+    if window is not None:
+        xidx = window
+    else:
+        xidx = (xlist > (center - width)) & (xlist < (center + width))
     x = xlist[xidx]
 
     if smooth:
@@ -162,12 +197,16 @@ def find_y_peak(xlist, ylist, center, width=5, smooth=False):
     return xloc
 
 
-def find_mono_offset(xlist, ylist, edge, width=5, smooth=False, shift=0):
+@timed("find_mono_offset")
+def find_mono_offset(xlist, ylist, edge, width=5, smooth=False, shift=0,
+                     window=None):
     """
     Default alignment method for data that has a good peak
     xlist.shape = (nscans, npts)
     ylist.shape = (nscans, npts)
     shift : amount to shift nominal peak location when finding peak
+    window : optional precomputed slice of the points to search, see
+    find_y_peak
     """
     if edge in refEdges:
         nominal = refEdges[edge]
@@ -176,7 +215,7 @@ def find_mono_offset(xlist, ylist, edge, width=5, smooth=False, shift=0):
             nominal = float(edge)
         except:
             print("Could not understand edge ")
-    xloc = find_y_peak(xlist, ylist, nominal + shift, width, smooth)
+    xloc = find_y_peak(xlist, ylist, nominal + shift, width, smooth, window)
     xdelta = nominal - np.array(xloc)
     meanDelta = np.mean(xdelta)
     if np.std(xdelta) > 0.3:
@@ -0,0 +1,104 @@
+"""
+Interactive overlay of many scans, which stays responsive with thousands
+of scans or fly scans of 100k points.
+
+Every scan is drawn as one segment of a single LineCollection, downsampled
+(see xastools.downsample) to the visible energy range. The number of
+points drawn is bounded by budget, however many scans there are. After a
+zoom or pan the view is redrawn at once at low resolution, then refined
+once the view has been still for a moment.
+"""
+import numpy as np
+from xastools.downsample import downsample
+from xastools.utils import normalize
+
+
+class ScanViewer:
+    def __init__(self, xas, col, divisor=None, method='minmax',
+                 budget=200000, maxPoints=4000, normType=None, mean=True,
+                 ax=None, cmap='viridis', delay=150, **kwargs):
+        """
+        :param xas: XAS object
+        :param col: column to show
+        :param divisor: passed to getData
+        :param method: 'minmax' or 'lttb', see xastools.downsample
+        :param budget: total points drawn, shared between the scans
+        :param maxPoints: most points drawn per scan
+        :param normType: normalization of each scan, see utils.normalize
+        :param mean: also draw the mean of all scans
+        :param ax: axes to draw in, default a new pyplot figure
+        :param delay: ms the view has to be still before it is refined
+        :param kwargs: passed to getData (offsetMono, exclude, ...)
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import LineCollection
+        x, y = xas.getData(col, divisor=divisor, individual=True,
+                           squeeze=False, **kwargs)
+        self.scans = list(y.scan.data)
+        self.x = np.atleast_2d(x.transpose('scan', 'index').data)
+        y = np.atleast_2d(np.squeeze(y.transpose('scan', 'index', ...).data))
+        self.y = normalize(self.x.T, y.T, normType).T
+        order = np.argsort(self.x, axis=1, kind='stable')
+        self.x = np.take_along_axis(self.x, order, 1)
+        self.y = np.take_along_axis(self.y, order, 1)
+        self.method = method
+        self.npoints = int(np.clip(budget//max(len(self.scans), 1), 4,
+                                   maxPoints))
+        if ax is None:
+            fig, ax = plt.subplots()
+        self.ax = ax
+        colors = plt.get_cmap(cmap)(np.linspace(0, 1, len(self.scans)))
+        self.lines = LineCollection([], colors=colors, linewidths=0.8,
+                                    alpha=0.6 if mean else 1.0)
+        ax.add_collection(self.lines)
+        self.meanLine = None
+        if mean:
+            mx, my = xas.getData(col, divisor=divisor, aggregate='mean',
+                                 **kwargs)
+            self.meanX = np.asarray(mx, dtype=float)
+            self.meanY = normalize(self.meanX, np.asarray(my, dtype=float),
+                                   normType)
+            self.meanLine, = ax.plot([], [], color='k', lw=1.5, label='mean')
+        ax.set_xlabel(kwargs.get('xcol', 'MONO'))
+        ax.set_ylabel(col if divisor is None else f"{col}/{divisor}")
+        ax.set_title(f"{xas.sample} ({len(self.scans)} scans)")
+        self._zoomed = False
+        self.render()
+        ax.set_xlim(np.nanmin(self.x), np.nanmax(self.x))
+        ax.set_ylim(*self._ylim())
+        self._zoomed = True
+        self._timer = ax.figure.canvas.new_timer(interval=delay)
+        self._timer.single_shot = True
+        self._timer.add_callback(self.render)
+        ax.callbacks.connect('xlim_changed', self._onZoom)
+
+    def _ylim(self):
+        lo, hi = np.nanmin(self.y), np.nanmax(self.y)
+        pad = 0.05*(hi - lo) if hi > lo else 1
+        return lo - pad, hi + pad
+
+    def render(self, coarse=False):
+        """
+        Downsamples every scan to the visible range and redraws
+
+        :param coarse: use an eighth of the points, for immediate feedback
+        :returns: number of points drawn
+        """
+        xmin, xmax = self.ax.get_xlim() if self._zoomed else (None, None)
+        npoints = max(self.npoints//8, 4) if coarse else self.npoints
+        xs, ys = downsample(self.x, self.y, npoints, self.method, xmin, xmax)
+        self.lines.set_segments(np.stack([xs, ys], axis=-1))
+        drawn = xs.size
+        if self.meanLine is not None:
+            mx, my = downsample(self.meanX, self.meanY, 4*self.npoints,
+                                self.method, xmin, xmax)
+            self.meanLine.set_data(mx[0], my[0])
+            drawn += mx.size
+        self.ax.figure.canvas.draw_idle()
+        return drawn
+
+    def _onZoom(self, ax):
+        self.render(coarse=True)
+        # Restarting the timer refines only once zooming has stopped
+        self._timer.stop()
+        self._timer.start()
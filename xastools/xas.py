@@ -1,22 +1,104 @@
 import numpy as np
+from copy import deepcopy
 import xarray as xr
-import matplotlib.pyplot as plt
-from xastools.utils import (find_mono_offset, correct_mono, normalize)
+from xastools.utils import (find_mono_offset, correct_mono, normalize,
+                            energy_window)
+from xastools.profiling import stage, timed
+from xastools.coadd import CoaddAccumulator
+from xastools.quality import (scan_scores, robust_zscore, glitch_mask,
+                               repair_glitches)
+from xastools.resample import (interp_scans, rebin_scans, common_grid,
+                               is_heterogeneous)
+
+coltypeNames = {'Seconds': 'motor', 'ENERGY_ENC': 'motor', 'MONO': 'motor',
+                'TEMP': 'sensor'}
 
 def inferColTypes(cols):
-    motorNames = ['Seconds', 'ENERGY_ENC', 'MONO']
-    sensorNames = ['TEMP']
-    coltypes = []
-    for c in cols:
-        if c in motorNames:
-            coltypes.append('motor')
-        elif c in sensorNames:
-            coltypes.append('sensor')
-        else:
-            coltypes.append('detector')
-    return coltypes
+    return [coltypeNames.get(c, 'detector') for c in cols]
+
+def columnDtypes(data, cols, dtype=None, coltypes=None):
+    """
+    Resolves a storage dtype policy to one dtype per column of data, of
+    shape (..., ncols)
+
+    :param dtype: None or 'float64' to store float64; a numpy dtype for
+    every column; a dictionary of {coltype: dtype} (see inferColTypes),
+    float64 for the types it leaves out; or 'compact', which stores the
+    detector columns as float32 (unless that would round integer counts
+    above 2**24) and the motor and sensor columns as float64
+    :returns: list of numpy dtypes
+    """
+    if dtype is None:
+        return [np.dtype(float)]*len(cols)
+    if coltypes is None:
+        coltypes = inferColTypes(cols)
+    if isinstance(dtype, str) and dtype == 'compact':
+        data = np.asarray(data)
+        detectors = data[..., np.asarray(coltypes) == 'detector']
+        counts = detectors[detectors == np.round(detectors)]
+        rounded = np.any(counts.astype(np.float32) != counts)
+        dtype = {'detector': np.float64 if rounded else np.float32}
+    if isinstance(dtype, dict):
+        return [np.dtype(dtype.get(t, float)) for t in coltypes]
+    return [np.dtype(dtype)]*len(cols)
 
-def convertDataHeader(data, header):
+def storageLayout(data, cols, dtype=None, coltypes=None):
+    """
+    Resolves a storage dtype policy for data of shape (..., ncols)
+
+    All columns share the "data" array, which is stored with the dtype of
+    the detector columns. Columns whose own dtype that cannot hold (the
+    motors, under 'compact') are also kept in "xdata" (scan, index, xch),
+    which every read of those columns uses, see XAS.columnData. Steps that
+    are sensitive to rounding (offsets, division, mono correction,
+    resampling, normalization) always work in float64, see
+    XAS._processScans.
+
+    :param dtype: storage dtype policy, see columnDtypes
+    :returns: dtype of data, list of the columns kept in xdata, and dtype
+    of xdata (None if there are no such columns)
+    """
+    if coltypes is None:
+        coltypes = inferColTypes(cols)
+    dtypes = columnDtypes(data, cols, dtype, coltypes)
+    detectors = [d for d, t in zip(dtypes, coltypes) if t == 'detector']
+    storage = np.result_type(*(detectors or dtypes or [float]))
+    wide = [(c, d) for c, d in zip(cols, dtypes)
+            if not np.can_cast(d, storage, 'safe')]
+    if not wide:
+        return storage, [], None
+    xcols, xdtypes = zip(*wide)
+    return storage, list(xcols), np.result_type(*xdtypes)
+
+def storageDtype(data, cols, dtype=None, coltypes=None):
+    """
+    dtype of the "data" array under a storage dtype policy, see
+    storageLayout
+    """
+    return storageLayout(data, cols, dtype, coltypes)[0]
+
+def concatScans(datasets):
+    """
+    Concatenates XAS Datasets along scan. Where only some of them keep
+    columns in "xdata" (see storageLayout), the others' values of those
+    columns are taken from "data".
+    """
+    xcols = []
+    for d in datasets:
+        if 'xdata' in d:
+            xcols += [c for c in d.xch.values if c not in xcols]
+    if xcols:
+        datasets = [d if 'xdata' in d else d.assign(
+            xdata=d.data.sel(ch=[c for c in xcols if c in d.ch.values])
+            .rename(ch='xch')) for d in datasets]
+    return xr.concat(datasets, "scan")
+
+def convertHeader(header):
+    """
+    Splits the per-scan values out of a file header, in place
+
+    :returns: scan, offsets, weights, header
+    """
     scan = header['scaninfo'].pop('scan', None)
     cols = header['channelinfo']['cols']
     offsets = header['channelinfo'].pop('offsets', {})
@@ -24,41 +106,132 @@ def convertDataHeader(data, header):
     if "coltypes" not in header['channelinfo']:
         coltypes = np.array(inferColTypes(cols))
         header['channelinfo']['coltypes'] = coltypes
-    x = xr.DataArray(data, dims=['index', 'ch'], coords={'ch': cols})
-    offset_cols = list(offsets.keys())
-    offset_data = np.array([offsets[k] for k in offset_cols])
-    o = xr.DataArray(offset_data, dims=["ch"], coords=[offset_cols])
-    weight_cols = list(weights.keys())
-    weight_data = np.array([weights[k] for k in weight_cols])
-    w = xr.DataArray(weight_data, dims=["ch"], coords=[weight_cols])
-    d = xr.Dataset({"data": x, "offsets": o, "weights": w})
-
-    if isinstance(scan, int):
-        d = d.expand_dims({"scan": [scan]})
-    else:
-        d = d.expand_dims({"scan": [scan[0]]})
+    return scan, offsets, weights, header
+
+def channelArray(values, cols, default=np.nan):
+    """
+    Aligns per-channel values to cols. values may be a dictionary
+    of {col: value}, or an array of shape (ncols,) or (nscans, ncols)
+    """
+    if values is None:
+        values = {}
+    if isinstance(values, dict):
+        return np.array([values.get(c, default) for c in cols], dtype=float)
+    return np.asarray(values, dtype=float)
+
+def makeDataset(data, scans, cols, offsets=None, weights=None, dtype=None,
+                copy=True, coltypes=None):
+    """
+    Builds the scan-stacked Dataset used by XAS in one step
+
+    :param data: array of shape (nscans, npts, ncols)
+    :param scans: list of nscans scan labels
+    :param cols: list of ncols column names
+    :param offsets: dictionary or array (see channelArray), NaN if missing
+    :param weights: dictionary or array (see channelArray), NaN if missing
+    :param dtype: storage dtype policy of data, see storageLayout. By
+    default data is stored as given.
+    :param copy: if False, the Dataset may share memory with data, and
+    later changes to either are seen by both
+    :param coltypes: column types, see inferColTypes
+    """
+    data = np.asarray(data)
+    cols = list(cols)
+    xcols = []
+    if dtype is not None:
+        storage, xcols, xdtype = storageLayout(data, cols, dtype, coltypes)
+        if xcols:
+            xdata = data[..., [cols.index(c) for c in xcols]].astype(xdtype)
+        data = data.astype(storage, copy=copy)
+    elif copy:
+        data = data.copy()
+    nscans = data.shape[0]
+    o = np.broadcast_to(channelArray(offsets, cols), (nscans, len(cols)))
+    w = np.broadcast_to(channelArray(weights, cols), (nscans, len(cols)))
+    variables = {"data": (("scan", "index", "ch"), data),
+                 "offsets": (("scan", "ch"), o.copy()),
+                 "weights": (("scan", "ch"), w.copy())}
+    coords = {"scan": list(scans), "ch": cols}
+    if xcols:
+        variables["xdata"] = (("scan", "index", "xch"), xdata)
+        coords["xch"] = xcols
+    return xr.Dataset(variables, coords=coords)
+
+@timed("convertDataHeader")
+def convertDataHeader(data, header, dtype=None, copy=True):
+    """
+    :param dtype: storage dtype policy, see storageLayout (default float64)
+    :param copy: if False, the Dataset may share memory with data
+    """
+    scan, offsets, weights, header = convertHeader(header)
+    cols = header['channelinfo']['cols']
+    if isinstance(scan, (list, tuple)):
+        scan = scan[0]
+    data = np.asarray(data)[np.newaxis]
+    d = makeDataset(data, [scan], cols, offsets, weights,
+                    float if dtype is None else dtype, copy,
+                    header['channelinfo']['coltypes'])
     return d, header
 
 class XAS:
     scaninfokeys = ['motor', 'date', 'sample', 'loadid', 'command']
 
     @classmethod
-    def from_data_header(cls, data, header):
+    def from_data_header(cls, data, header, dtype=None, copy=True):
         """
         Create an XAS object from a 2-d numpy array and a dictionary
         that contains "scaninfo", "channelinfo", and "motors" sub-dictionaries
+
+        :param dtype: storage dtype policy, see storageLayout (default float64)
+        :param copy: if False, the XAS object may share memory with data
+        (e.g. for arrays freshly read from a file)
+        """
+        arr, h = convertDataHeader(data, header, dtype, copy)
+        return cls(arr, copy=False, **h)
+
+    @classmethod
+    def from_scan_array(cls, data, header, scans=None, offsets=None,
+                        weights=None, dtype=None, copy=True):
         """
-        arr, h = convertDataHeader(data, header)
-        return cls(arr, **h)
+        Create a multi-scan XAS object from a 3-d numpy array in one step
 
-    def __init__(self, data, scaninfo={}, motors={}, channelinfo={}, **kwargs):
+        :param data: array of shape (nscans, npts, ncols)
+        :param header: header dictionary, as for from_data_header. Offsets and
+        weights in channelinfo are applied to every scan.
+        :param scans: list of scan labels, defaults to scaninfo['scan']
+        :param offsets: optional (nscans, ncols) array of per-scan offsets
+        :param weights: optional (nscans, ncols) array of per-scan weights
+        :param dtype: storage dtype policy, see storageLayout. By default
+        data is stored as given.
+        :param copy: if False, the XAS object may share memory with data
+        """
+        scan, o, w, h = convertHeader(header)
+        if scans is None:
+            scans = scan if isinstance(scan, (list, tuple)) else [scan]
+        if offsets is None:
+            offsets = o
+        if weights is None:
+            weights = w
+        cols = h['channelinfo']['cols']
+        arr = makeDataset(data, scans, cols, offsets, weights, dtype, copy)
+        return cls(arr, copy=False, **h)
+
+    def __init__(self, data, scaninfo={}, motors={}, channelinfo={}, copy=True,
+                 **kwargs):
         """Create an XAS object directly from a properly formatted xarray, 
         and three metadata dictionaries
+
+        :param copy: if False, take ownership of data instead of copying it
         """
+        self._setHeader(scaninfo, motors, channelinfo)
+        if copy:
+            data = data.copy(deep=True)
+        self.data = data
+
+    def _setHeader(self, scaninfo, motors, channelinfo):
         for k in self.scaninfokeys:
             setattr(self, k, scaninfo.get(k, None))
         self.bintype = 'XAS'
-        self.data = data.copy(deep=True)
         self.motors = motors
         self.scaninfo = {}
         for k in scaninfo:
@@ -92,15 +265,15 @@ class XAS:
         if y.bintype != self.bintype:
             raise TypeError("Cannot add %s to %s" % (y.bintype, self.bintype))
         header = self.getHeader()
-        data = xr.concat([self.data, y.data], "scan")
-        return XAS(data, **header)
+        data = concatScans([self.data, y.data])
+        return XAS(data, copy=False, **header)
 
     def __iadd__(self, y):
         if y is None:
             return self
         if y.bintype != self.bintype:
             raise TypeError("Cannot add %s to %s" % (y.bintype, self.bintype))
-        self.data = xr.concat([self.data, y.data], "scan")
+        self.data = concatScans([self.data, y.data])
         return self
 
     """ 
@@ -117,6 +290,40 @@ class XAS:
         header = self.getHeader()
         return XAS(data, **header)
 
+    def toShared(self):
+        """
+        Copies the data into shared memory, for zero-copy transfer to
+        worker processes (see xastools.shared)
+
+        :returns: a picklable SharedHandle; use it as a context manager,
+        or call unlink(), to free the memory
+        """
+        from xastools.shared import SharedHandle
+        return SharedHandle.fromXAS(self)
+
+    @property
+    def dtype(self):
+        """
+        Storage dtype of the data
+        """
+        return self.data.data.dtype
+
+    def astype(self, dtype):
+        """
+        Copy of this object with the data stored as dtype (a policy, see
+        storageLayout)
+        """
+        new = self.copy()
+        values = self.columnData(list(self.columns))
+        stored = makeDataset(values.transpose('scan', 'index', 'ch').data,
+                             new.data.scan.data, self.columns,
+                             dtype=float if dtype is None else dtype,
+                             coltypes=self.channelinfo.get('coltypes'))
+        data = new.data.drop_vars(['data', 'xdata', 'xch'], errors='ignore')
+        new.data = data.assign({k: stored[k] for k in ('data', 'xdata')
+                                if k in stored})
+        return new
+
     def getIncludedScans(self, exclude):
         scans = list(self.data.data.scan.data)
         if type(exclude) == int:
@@ -140,50 +347,479 @@ class XAS:
         Returns a copy of the data object with the chosen columns
         """
         scans = self.getIncludedScans(exclude)
-        return self.data.data.sel(ch=cols, scan=scans).copy()
+        return self.columnData(cols, scans).copy()
+
+    def columnData(self, cols, scans=None):
+        """
+        data.sel(ch=cols, scan=scans), with the columns that are also kept
+        at a wider dtype in xdata (see storageLayout) read from there
+
+        :param scans: default all scans
+        """
+        sel = {'ch': cols} if scans is None else {'ch': cols, 'scan': scans}
+        y = self.data.data.sel(sel)
+        if 'xdata' not in self.data:
+            return y
+        wide = self.data.xdata.rename(xch='ch')
+        names = [c for c in np.atleast_1d(cols) if c in wide.ch.values]
+        if not names:
+            return y
+        if 'ch' not in y.dims:
+            return wide.sel(sel)
+        y = y.astype(np.result_type(y.dtype, wide.dtype))
+        sel['ch'] = names
+        y.loc[{'ch': names}] = wide.sel(sel).transpose(*y.dims).data
+        return y
+
+    def energyIndex(self, xcol='MONO'):
+        """
+        Sorted energies of every scan, computed once and kept until the
+        data is replaced
+
+        :returns: dictionary of x (nscans, npts), sorted along points;
+        order, the argsort of each scan, or None if every scan was already
+        increasing; unsorted, which scans were not; and shared, True if
+        every scan has the same energies
+        """
+        cache = self.__dict__.setdefault('_energyIndex', {})
+        entry = cache.get(xcol)
+        if entry is not None and entry['data'] is self.data:
+            return entry
+        x = np.atleast_2d(self.columnData(xcol).transpose(
+            'scan', 'index').data.astype(float))
+        order = None
+        unsorted = np.any(np.diff(x, axis=1) < 0, axis=1)
+        if np.any(unsorted):
+            order = np.argsort(x, axis=1, kind='stable')
+            x = np.take_along_axis(x, order, 1)
+        shared = bool(np.all(x == x[:1]))
+        entry = {'data': self.data, 'x': x, 'order': order,
+                 'unsorted': unsorted, 'shared': shared}
+        cache[xcol] = entry
+        return entry
+
+    def window(self, emin, emax, xcol='MONO', offsetMono=False):
+        """
+        Points with emin <= energy <= emax, found by binary search in the
+        cached energy index (see energyIndex). Windows can be passed to the
+        normalization and background functions (utils.areaNorm, tailNorm,
+        find_y_peak, background.fit_preedge, ...).
+
+        :param offsetMono: use the mono-corrected energies
+        :returns: a slice, if every scan shares one energy axis (and
+        offset), so y[..., window] is a view; otherwise a list with one
+        window per scan, a slice for scans that were sorted and an index
+        array for scans that were not
+        """
+        index = self.energyIndex(xcol)
+        x = index['x']
+        if offsetMono:
+            deltaE = self.data.offsets.sel(ch='MONO').fillna(0).data
+            deltaE = np.broadcast_to(np.atleast_1d(deltaE), (x.shape[0],))
+        else:
+            deltaE = np.zeros(x.shape[0])
+        if index['shared'] and np.all(deltaE == deltaE[0]):
+            if index['order'] is None:
+                return energy_window(x[0], emin - deltaE[0], emax - deltaE[0])
+        windows = []
+        for n in range(x.shape[0]):
+            w = energy_window(x[n], emin - deltaE[n], emax - deltaE[n])
+            if index['unsorted'][n]:
+                w = index['order'][n, w]
+            windows.append(w)
+        return windows
+
+    def addROIs(self, mca, energy, rois, chunksize=None):
+        """
+        Integrates MCA spectra over ROIs and appends the results as new
+        columns, named after the ROIs (see roi.integrate_rois)
+
+        :param mca: array of shape (nscans, npts, nbins), or (npts, nbins)
+        for a single scan, in the scan order of this object
+        :param energy: emission energy of each bin
+        :param rois: ROI names, elements, or {name: [elow, ehigh]}
+        :param chunksize: scans (or points, for a 2-d mca) per chunk
+        :returns: list of the new column names
+        """
+        from xastools.roi import integrate_rois
+        values, windows = integrate_rois(mca, energy, rois, chunksize)
+        if values.ndim == 2:
+            values = values[np.newaxis]
+        names = list(windows)
+        self._appendColumns(values, names)
+        self.channelinfo['rois'] = dict(
+            self.channelinfo.get('rois', {}),
+            **{k: list(v) for k, v in windows.items()})
+        return names
+
+    def _appendColumns(self, values, names):
+        """
+        Appends detector columns from an array of shape
+        (nscans, npts, len(names)), with a fresh channelinfo dictionary
+        """
+        existing = [n for n in names if n in self.columns]
+        if existing:
+            raise ValueError(f"Columns {existing} already exist")
+        nscans, npts = self.data.data.shape[:2]
+        if values.shape[:2] != (nscans, npts):
+            raise ValueError(f"Data of shape {values.shape[:2]} does not "
+                             f"match {nscans} scans of {npts} points")
+        new = makeDataset(values.astype(float), self.data.scan.data, names,
+                          copy=False)
+        # xdata has no ch dimension, and keeps the columns it has
+        data = self.data.drop_vars(['xdata', 'xch'], errors='ignore')
+        data = xr.concat([data, new], "ch")
+        if 'xdata' in self.data:
+            data['xdata'] = self.data.xdata
+        self.data = data
+        channelinfo = dict(self.channelinfo)
+        channelinfo['cols'] = list(self.columns) + list(names)
+        if 'coltypes' in channelinfo:
+            channelinfo['coltypes'] = np.append(channelinfo['coltypes'],
+                                                ['detector']*len(names))
+        self.channelinfo = channelinfo
+
+    def dropColumns(self, names):
+        """
+        Removes columns from the data and the header
+        """
+        keep = [c not in names for c in self.columns]
+        self.data = self.data.drop_sel(ch=list(names))
+        if 'xdata' in self.data:
+            wide = [c for c in names if c in self.data.xch.values]
+            self.data = self.data.drop_sel(xch=wide)
+        channelinfo = dict(self.channelinfo)
+        channelinfo['cols'] = [c for c, k in zip(self.columns, keep) if k]
+        if 'coltypes' in channelinfo:
+            channelinfo['coltypes'] = np.asarray(channelinfo['coltypes'])[keep]
+        self.channelinfo = channelinfo
+
+    def sumDetectors(self, elements, name='SDD', icr=None, ocr=None,
+                     offset=True, weight=True, drop=False, chunksize=None):
+        """
+        Sums the elements of a multi-element detector into one new column,
+        for all scans in one vectorized pass. Each element is corrected as
+
+            (counts*ICR/OCR - offset)/weight
+
+        where ICR/OCR is the dead-time correction (taken as 1 where OCR is
+        0), and offset and weight are the per-scan channel offsets and
+        weights (the per-element calibration).
+
+        :param elements: list of element columns
+        :param name: name of the summed column
+        :param icr: list of input count rate columns, one per element
+        :param ocr: list of output count rate columns, one per element
+        :param drop: remove the element (and ICR/OCR) columns afterwards
+        :param chunksize: scans per chunk, to bound the size of the
+        per-element intermediates (default all scans at once)
+        """
+        elements = list(elements)
+        if name in self.columns:
+            raise ValueError(f"Column {name} already exists")
+        if (icr is None) != (ocr is None):
+            raise ValueError("Both icr and ocr columns are needed")
+        if icr is not None and not len(icr) == len(ocr) == len(elements):
+            raise ValueError("Need one icr and ocr column per element")
+        data = self.data.data.transpose('scan', 'index', 'ch')
+        o = self.data.offsets.sel(ch=elements).fillna(0).data
+        w = self.data.weights.sel(ch=elements).fillna(1).data
+        nscans, npts = data.shape[:2]
+        if chunksize is None:
+            chunksize = max(nscans, 1)
+        total = np.empty((nscans, npts, 1))
+        with stage("sumDetectors"):
+            for start in range(0, nscans, chunksize):
+                sl = slice(start, start + chunksize)
+                y = data.isel(scan=sl).sel(ch=elements).data.astype(float)
+                if icr is not None:
+                    i = data.isel(scan=sl).sel(ch=list(icr)).data
+                    out = data.isel(scan=sl).sel(ch=list(ocr)).data
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        y *= np.where(out > 0, i/out, 1.0)
+                    del i, out
+                if offset:
+                    y -= o[sl, np.newaxis, :]
+                if weight:
+                    y /= w[sl, np.newaxis, :]
+                total[sl, :, 0] = y.sum(axis=-1)
+                del y
+        if drop:
+            dropped = elements + list(icr or []) + list(ocr or [])
+            self.dropColumns(dropped)
+        self._appendColumns(total, [name])
+        return name
+
+    def deglitch(self, cols=None, window=5, threshold=6, xcol='MONO'):
+        """
+        Flags glitches (see quality.glitch_mask) in the raw data of every
+        scan at once, and stores them as the boolean variable "mask"
+        (scan, index, ch) of the Dataset, True where a point is a glitch.
+        getData(deglitch=...) reuses the stored mask, and only computes it
+        for columns that have not been flagged yet.
+
+        :param cols: columns to check, default all detector columns
+        :param window: median filter length in points
+        :param threshold: robust z-score above which a point is flagged
+        :returns: the mask
+        """
+        if cols is None:
+            coltypes = self.channelinfo.get('coltypes',
+                                            inferColTypes(self.columns))
+            cols = [c for c, t in zip(self.columns, coltypes)
+                    if t == 'detector']
+        elif isinstance(cols, str):
+            cols = [cols]
+        cols = [c for c in cols if c != xcol]
+        data = self.data.data.transpose('scan', 'index', 'ch')
+        with stage("deglitch"):
+            flagged = glitch_mask(data.sel(ch=cols).data, window, threshold)
+        if 'mask' in self.data:
+            # Concatenating with unmasked data leaves NaN, i.e. unflagged
+            checked = list(self.data['mask'].attrs.get('cols', []))
+            mask = self.data['mask'].fillna(False).astype(bool)
+            mask = mask.transpose('scan', 'index', 'ch')
+        else:
+            mask = xr.zeros_like(data, dtype=bool)
+            checked = []
+        mask.loc[{'ch': cols}] = flagged
+        mask.attrs = {'cols': checked + [c for c in cols if c not in checked],
+                      'window': window, 'threshold': threshold}
+        self.data['mask'] = mask
+        return self.data['mask']
+
+    def _glitchMask(self, cols, scans, divisor=None):
+        """
+        Stored glitch mask of cols (computed if missing), also flagging
+        points where the divisor has a glitch
+        """
+        needed = list(np.atleast_1d(cols))
+        if divisor is not None:
+            needed += list(np.atleast_1d(divisor))
+        checked = (self.data['mask'].attrs.get('cols', [])
+                   if 'mask' in self.data else [])
+        missing = [c for c in needed if c not in checked]
+        if missing:
+            self.deglitch(missing)
+        stored = self.data['mask'].fillna(False).astype(bool)
+        mask = stored.sel(ch=cols, scan=scans)
+        if divisor is not None:
+            div = stored.sel(ch=divisor, scan=scans)
+            if 'ch' in div.dims:
+                div = div.any('ch')
+            mask = mask | div
+        return mask.transpose(*self.data.data.sel(ch=cols).dims)
+
+    def _processScans(self, cols, scans, divisor=None, xcol='MONO',
+                      offset=False, offsetMono=False, weight=False,
+                      deglitch=None, grid=None, resample='linear'):
+        """
+        Applies the per-scan steps of getData to the given scans
+
+        :param grid: if given, resample every scan onto grid, see
+        _resampleScans
+        :returns: x, y, both with a scan dimension
+        """
+        if grid is not None:
+            return self._resampleScans(cols, scans, grid, resample, divisor,
+                                       xcol, offset, offsetMono, weight,
+                                       deglitch)
+        with stage("getData.select"):
+            # Compact (e.g. float32) storage is promoted here
+            x = self.columnData(xcol, scans).astype(float)
+            y = self.columnData(cols, scans).astype(float)
+
+        if offset:
+            with stage("getData.offset"):
+                o = self.data.offsets.sel(ch=cols, scan=scans).fillna(0)
+                y = y-o
+        if weight:
+            with stage("getData.weight"):
+                w = self.data.weights.sel(ch=cols, scan=scans).fillna(1)
+                y = y/w
+        if divisor is not None:
+            # wtf was this doing??
+            # div = np.cumprod(self.getCols(divisor), axis=1)[:, [-1], ...]
+            with stage("getData.divide"):
+                div = self.data.data.sel(ch=divisor, scan=scans)
+                y = y/div
+
+        if deglitch is not None:
+            with stage("getData.deglitch"):
+                y = self._deglitchScans(x, y, cols, scans, divisor, deglitch)
+
+        if offsetMono:
+            with stage("getData.monoCorrect"):
+                y = self._monoCorrect(x, y, scans)
+        return x, y
+
+    def _deglitchScans(self, x, y, cols, scans, divisor, method):
+        """
+        Repairs ('interp') or blanks with NaN ('mask') the glitches of y,
+        after it has been divided
+        """
+        if method not in ('interp', 'mask'):
+            raise ValueError(f"Unknown deglitch method {method}")
+        mask = self._glitchMask(cols, scans, divisor)
+        if method == 'mask':
+            return y.where(~mask)
+        y3 = y.data.reshape(y.shape[0], y.shape[1], -1)
+        fixed = repair_glitches(x.data, y3, mask.data.reshape(y3.shape))
+        return y.copy(data=fixed.reshape(y.shape))
+
+    def _monoCorrect(self, x, y, scans):
+        deltaE = self.data.offsets.sel(ch='MONO', scan=scans).fillna(0)
+        for n in range(len(y.scan)):
+            ytmp = y[{"scan": n}]
+            dE = deltaE[{"scan": n}]
+            xtmp = x[{"scan": n}]
+            y[{"scan": n}] = correct_mono(xtmp, dE, ytmp)
+        return y
+
+    def _poissonVariance(self, x, cols, scans, divisor=None, offsetMono=False,
+                         weight=False, grid=None, xcol='MONO'):
+        """
+        Counting-statistics variance of the raw counts, carried through
+        the weight and divisor scaling of _processScans
+
+        :param grid: if given, the variance is interpolated onto grid like
+        the data. This neglects the reduction in variance between points.
+        """
+        var = self.data.data.sel(ch=cols, scan=scans).clip(min=0)
+        if weight:
+            w = self.data.weights.sel(ch=cols, scan=scans).fillna(1)
+            var = var/w**2
+        if divisor is not None:
+            div = self.data.data.sel(ch=divisor, scan=scans)
+            var = var/div**2
+        if grid is not None:
+            xs = self._shiftedX(scans, xcol, offsetMono)
+            coords = {k: v for k, v in var.coords.items()
+                      if 'index' not in v.dims}
+            return xr.DataArray(interp_scans(xs, var.data, grid),
+                                dims=var.dims, coords=coords)
+        if offsetMono:
+            var = self._monoCorrect(x, var.copy(), scans)
+        return var
+
+    def _resampleScans(self, cols, scans, grid, method='linear',
+                       divisor=None, xcol='MONO', offset=False,
+                       offsetMono=False, weight=False, deglitch=None):
+        """
+        Applies the per-scan steps of getData and resamples every scan onto
+        grid. The mono offset is applied by shifting x before resampling,
+        so each scan is interpolated only once.
+
+        :param grid: 1-d array of energies, or 'auto' for common_grid
+        :param method: 'linear' interpolation, or 'bin' for count-conserving
+        rebinning, in which case the divisor is rebinned separately and
+        divided out afterwards
+        :returns: x, y, both with a scan dimension
+        """
+        if method not in ('linear', 'bin'):
+            raise ValueError(f"Unknown resample method {method}")
+        if method == 'bin' and deglitch == 'mask':
+            raise ValueError("Masked points cannot be rebinned, use "
+                             "deglitch='interp'")
+        split = method == 'bin' and divisor is not None
+        x, y = self._processScans(cols, scans, None if split else divisor,
+                                  xcol, offset, False, weight, deglitch)
+        with stage("getData.resample"):
+            xs = self._shiftedX(scans, xcol, offsetMono)
+            if isinstance(grid, str) and grid == 'auto':
+                grid = common_grid(xs)
+            grid = np.asarray(grid, dtype=float)
+            f = interp_scans if method == 'linear' else rebin_scans
+            coords = {k: v for k, v in y.coords.items()
+                      if 'index' not in v.dims}
+            y = xr.DataArray(f(xs, y.data, grid), dims=y.dims, coords=coords)
+            if split:
+                div = self.data.data.sel(ch=divisor, scan=scans)
+                coords = {k: v for k, v in div.coords.items()
+                          if 'index' not in v.dims}
+                y = y/xr.DataArray(rebin_scans(xs, div.data, grid),
+                                   dims=div.dims, coords=coords)
+            x = xr.DataArray(np.broadcast_to(grid, (len(scans), len(grid))),
+                             dims=x.dims, coords={'scan': x.scan})
+        return x, y
+
+    def _shiftedX(self, scans, xcol='MONO', offsetMono=False):
+        """
+        x of the given scans as a (nscans, npts) array, shifted by the mono
+        offsets if offsetMono
+        """
+        xs = np.atleast_2d(self.columnData(xcol, scans).data)
+        xs = xs.astype(float)
+        if offsetMono:
+            deltaE = self.data.offsets.sel(ch='MONO', scan=scans).fillna(0)
+            xs = xs + np.atleast_1d(deltaE.data)[:, np.newaxis]
+        return xs
+
+    def _autoGrid(self, scans, xcol='MONO', offsetMono=False):
+        """
+        Common grid (see resample.common_grid) of the given scans if they do
+        not share one grid, else None
+        """
+        xraw = np.atleast_2d(self.columnData(xcol, scans).data)
+        if not is_heterogeneous(xraw):
+            return None
+        return common_grid(self._shiftedX(scans, xcol, offsetMono))
+
+    def _resampleGrid(self, scans, grid=None, xcol='MONO', offsetMono=False):
+        """
+        Resolves the grid argument of coadd and decompose once for all
+        scans, so that every chunk is resampled onto the same grid
+
+        :returns: grid array, or None to not resample
+        """
+        if grid is None:
+            return self._autoGrid(scans, xcol, offsetMono)
+        if grid is False:
+            return None
+        if isinstance(grid, str) and grid == 'auto':
+            return common_grid(self._shiftedX(scans, xcol, offsetMono))
+        return np.asarray(grid, dtype=float)
 
     def getData(self, cols, divisor=None, xcol='MONO', individual=False,
                 offset=False, offsetMono=False, return_x=True,
-                weight=False, squeeze=True, aggregate='sum', exclude=[]):
+                weight=False, squeeze=True, aggregate='sum', exclude=[],
+                grid=None, resample='linear', deglitch=None):
         """FIXME! briefly describe function
 
         :param cols: 
         :param divisor: columns to use to divide all the data
         :param x: 
         :param individual: 
+        :param grid: energy grid to resample all scans onto, 'auto' for the
+        range covered by every scan with the median step, or False to never
+        resample. By default (None), scans are only resampled (onto the
+        'auto' grid) when they are combined and do not share one grid.
+        :param resample: 'linear' or 'bin', see _resampleScans
+        :param deglitch: None, 'interp' to replace glitches (see deglitch)
+        by interpolation within each scan, or 'mask' to leave them out of
+        the aggregate. A sum then scales each point by the number of scans
+        over the number that were not masked.
         :returns: x, data1, data2, ...
         :rtype: 
 
         """
-        x = self.getCols(xcol, exclude)
-        y = self.getCols(cols, exclude)
-
-        if offset:
-            o = self.getOffsets(cols, exclude)
-            y = y-o
-        if weight:
-            w = self.getWeights(cols, exclude)
-            y = y/w
-        if divisor is not None:
-            # wtf was this doing??
-            # div = np.cumprod(self.getCols(divisor), axis=1)[:, [-1], ...]
-            div = self.getCols(divisor)
-            y = y/div
-
-        if offsetMono:
-            deltaE = self.getOffsets('MONO')
-            for n in range(len(y.scan)):
-                ytmp = y[{"scan": n}]
-                dE = deltaE[{"scan": n}]
-                xtmp = x[{"scan": n}]
-                y[{"scan": n}] = correct_mono(xtmp, dE, ytmp)
+        scans = self.getIncludedScans(exclude)
+        if grid is None and individual:
+            grid = False
+        grid = self._resampleGrid(scans, grid, xcol, offsetMono)
+        x, y = self._processScans(cols, scans, divisor, xcol, offset,
+                                  offsetMono, weight, deglitch, grid,
+                                  resample)
 
         if not individual:
-            x = x.mean(dim='scan')
-            if aggregate == 'sum':
-                y = y.sum(dim='scan')
-            elif aggregate == 'mean':
-                y = y.mean(dim='scan')
+            with stage("getData.aggregate"):
+                x = x.mean(dim='scan')
+                if aggregate == 'sum' and deglitch == 'mask':
+                    y = y.sum(dim='scan')*len(y.scan)/y.count(dim='scan')
+                elif aggregate == 'sum':
+                    y = y.sum(dim='scan')
+                elif aggregate == 'mean':
+                    y = y.mean(dim='scan')
 
         if squeeze:
             x = x.squeeze()
@@ -194,6 +830,188 @@ class XAS:
         else:
             return y
 
+    def coadd(self, cols, divisor=None, xcol='MONO', offset=False,
+              offsetMono=False, weight=False, scanWeights=None,
+              error='poisson', sigmaClip=None, clipIterations=1,
+              chunksize=None, squeeze=True, exclude=[], grid=None):
+        """Weighted coadd of the included scans with uncertainties.
+
+        Weighted sums are accumulated in one pass over the scan axis, plus one
+        more pass per sigma-clipping iteration. Only chunksize scans are
+        processed at a time. See getData for the processing kwargs.
+
+        :param scanWeights: per-scan weights, as a dictionary of {scan: weight}
+        or a sequence in the order of the included scans. Defaults to 1.
+        :param error: 'poisson' propagates the counting statistics of the raw
+        counts, 'empirical' uses the scatter between scans
+        :param sigmaClip: if given, leave out points further than sigmaClip
+        standard deviations (of the scan scatter) from the weighted mean
+        :param clipIterations: number of sigma-clipping passes
+        :param chunksize: number of scans processed at once, defaults to all
+        :param grid: energy grid to resample every scan onto, or False to
+        never resample. By default scans that do not share one grid are
+        resampled onto the 'auto' grid, as in getData.
+        :returns: Dataset of mean, variance, stderr, spread, neff, nscans and
+        counts, with the mean x as a coordinate
+        """
+        scans = self.getIncludedScans(exclude)
+        grid = self._resampleGrid(scans, grid, xcol, offsetMono)
+        if scanWeights is None:
+            sw = np.ones(len(scans))
+        elif isinstance(scanWeights, dict):
+            sw = np.array([scanWeights.get(s, 1) for s in scans], dtype=float)
+        else:
+            sw = np.asarray(scanWeights, dtype=float)
+        if chunksize is None:
+            chunksize = max(len(scans), 1)
+
+        def accumulate(reference=None):
+            acc = CoaddAccumulator()
+            xsum = 0
+            for n in range(0, len(scans), chunksize):
+                chunk = scans[n:n + chunksize]
+                x, y = self._processScans(cols, chunk, divisor, xcol, offset,
+                                          offsetMono, weight, grid=grid)
+                var = None
+                if error == 'poisson':
+                    var = self._poissonVariance(x, cols, chunk, divisor,
+                                                offsetMono, weight, grid,
+                                                xcol).data
+                w = sw[n:n + chunksize].reshape((-1,) + (1,)*(y.ndim - 1))
+                mask = None
+                if reference is not None:
+                    mean, spread = reference
+                    # No spread (one scan, or one left at a point): keep all
+                    mask = ((np.abs(y.data - mean) <= sigmaClip*spread)
+                            | ~np.isfinite(spread))
+                acc.add(y.data, w, var, mask)
+                xsum = xsum + x.sum(dim='scan')
+            return acc, xsum/len(scans), y
+
+        with stage("coadd"):
+            acc, x, template = accumulate()
+            if sigmaClip is not None:
+                for n in range(clipIterations):
+                    reference = (acc.mean(), acc.spread())
+                    acc, x, template = accumulate(reference)
+            dims = template.dims[1:]
+            coords = {k: v for k, v in template.coords.items()
+                      if 'scan' not in v.dims}
+            result = xr.Dataset({k: (dims, v) for k, v in
+                                 acc.result(error).items()}, coords=coords)
+            result = result.assign_coords(x=(x.dims, x.data))
+        if squeeze:
+            result = result.squeeze()
+        return result
+
+    def decompose(self, cols, ncomp=3, method='full', normType=None,
+                  divisor=None, xcol='MONO', offset=False, offsetMono=False,
+                  weight=False, chunksize=None, exclude=[], grid=None,
+                  **kwargs):
+        """PCA of the included scans, each scan (all of cols) being one
+        spectrum.
+
+        :param ncomp: number of components
+        :param method: 'full' or 'randomized' SVD of all scans at once,
+        or 'incremental', which processes chunksize scans at a time
+        :param normType: normalization applied to each scan first, see
+        utils.normalize
+        :param grid: energy grid to resample every scan onto, see coadd
+        :param kwargs: passed to decompose.randomized_svd
+        :returns: Dataset of components and mean over index (and ch),
+        scores over scan, and singular_values and explained_variance_ratio
+        over component
+        """
+        from xastools.decompose import pca, IncrementalPCA
+        scans = self.getIncludedScans(exclude)
+        grid = self._resampleGrid(scans, grid, xcol, offsetMono)
+
+        def spectra(chunk):
+            x, y = self._processScans(cols, chunk, divisor, xcol, offset,
+                                      offsetMono, weight, grid=grid)
+            if y.ndim == 2:
+                y = y.expand_dims('ch', axis=-1)
+            y = y.transpose('scan', 'index', 'ch')
+            values = np.stack([normalize(x.data.T, y.data[..., n].T,
+                                         normType).T
+                               for n in range(y.shape[-1])], axis=-1)
+            return x, y, values.reshape(len(chunk), -1)
+
+        with stage("decompose"):
+            if method == 'incremental':
+                if chunksize is None:
+                    chunksize = max(len(scans), 1)
+                chunks = [scans[n:n + chunksize]
+                          for n in range(0, len(scans), chunksize)]
+                ipca = IncrementalPCA(ncomp)
+                xsum = 0
+                for chunk in chunks:
+                    x, y, values = spectra(chunk)
+                    ipca.partial_fit(values)
+                    xsum = xsum + x.sum(dim='scan')
+                scores = np.concatenate([ipca.transform(spectra(c)[2])
+                                         for c in chunks])
+                result = {'mean': ipca.mean, 'components': ipca.components,
+                          'scores': scores,
+                          'singular_values': ipca.singular_values,
+                          'explained_variance_ratio':
+                          ipca.explained_variance_ratio}
+                x = xsum/len(scans)
+            else:
+                x, y, values = spectra(scans)
+                result = pca(values, ncomp, method, **kwargs)
+                x = x.mean(dim='scan')
+        shape = y.shape[1:]
+        dims = ('index', 'ch')
+        ncomp = len(result['singular_values'])
+        ds = xr.Dataset(
+            {'components': (('component',) + dims,
+                            result['components'].reshape((ncomp,) + shape)),
+             'mean': (dims, result['mean'].reshape(shape)),
+             'scores': (('scan', 'component'), result['scores']),
+             'singular_values': ('component', result['singular_values']),
+             'explained_variance_ratio':
+             ('component', result['explained_variance_ratio'])},
+            coords={'scan': scans, 'ch': y.ch.data,
+                    'component': np.arange(ncomp)})
+        ds = ds.assign_coords(x=('index', np.asarray(x.data)))
+        if isinstance(cols, str):
+            ds = ds.squeeze('ch', drop=True)
+        return ds
+
+    def fitLCF(self, col, library, grid=None, normType=None, shifts=None,
+               maxSubset=10, **kwargs):
+        """Fits every included scan as a non-negative linear combination
+        of reference spectra, all scans at once (see lcf.lcf)
+
+        :param col: column to fit (a single column)
+        :param library: dictionary of {name: (x, y)}, see lcf.loadLibrary
+        :param grid: energy grid for the fit, default 'auto' (see getData)
+        :param normType: normalization of each scan, see utils.normalize
+        :param shifts: optional trial energy shifts of the library
+        :param kwargs: passed to getData
+        :returns: Dataset of weights over (scan, ref), rfactor and shift
+        over scan, and fit and residual over (scan, index)
+        """
+        from xastools.lcf import lcf
+        if grid is None:
+            grid = 'auto'
+        x, y = self.getData(col, individual=True, grid=grid, squeeze=False,
+                            **kwargs)
+        scans = y.scan.data
+        x = x.isel(scan=0).data
+        y = normalize(x, y.transpose('index', 'scan').data, normType).T
+        with stage("fitLCF"):
+            result = lcf(y, x, library, shifts, maxSubset)
+        ds = xr.Dataset({'weights': (('scan', 'ref'), result['weights']),
+                         'rfactor': ('scan', result['rfactor']),
+                         'shift': ('scan', result['shift']),
+                         'fit': (('scan', 'index'), result['fit']),
+                         'residual': (('scan', 'index'), result['residual'])},
+                        coords={'scan': scans, 'ref': result['names'],
+                                'x': ('index', x)})
+        return ds
+
     def plot(self, col, individual=False, nstack=7, ax=None, label=None,
              normType=None, titlefmt="{sample} {scaninfo[element]} XAS", **kwargs):
         """See getData for all kwargs
@@ -208,6 +1026,7 @@ class XAS:
 
         """
 
+        import matplotlib.pyplot as plt
         x, data = self.getData(col, individual=individual, **kwargs)
         title = titlefmt.format(**self.__dict__)
         if individual:
@@ -247,22 +1066,174 @@ class XAS:
     def setMonoOffset(self, deltaE):
         self.data['offsets'].loc[dict(ch="MONO")] = deltaE
 
-    def findMonoOffset(self, edge, col='REF', width=5, smooth=False, shift=0, **kwargs):
+    def findMonoOffset(self, edge, col='REF', width=5, smooth=False, shift=0,
+                       method='peak', window=None, reference=None,
+                       upsample=10, maxShift=None, **kwargs):
         """
         edge : String or number, passed to find_mono_offset
         col : Column to use for alignment
         width : width of alignment window
+        method : 'peak' to find the peak nearest edge in every scan, or
+            'xcorr' to cross-correlate whole scans against a reference
+            (see align.xcorr_offsets)
+        window : (emin, emax) energy window for 'xcorr', by default
+            edge +/- 2*width, or the range covered by all scans if edge
+            is None
+        reference : scan to align to for 'xcorr', by default the median
+            of all scans
+        upsample, maxShift : passed to align.xcorr_offsets
         **kwargs : passed to getData
+
+        Returns deltaE for 'peak'. For 'xcorr', returns a Dataset over scan
+        of offset, corr, offsetZ and clipped, and the template the scans
+        were aligned to. If edge is given, the template is calibrated to
+        it with find_mono_offset, so the offsets are absolute.
         """
         x, y = self.getData(col, individual=True, **kwargs)
-        deltaE = find_mono_offset(x.data, y.data, edge, width, smooth, shift)
-        self.setMonoOffset(deltaE)
-        return deltaE
+        if method == 'peak':
+            deltaE = find_mono_offset(x.data, y.data, edge, width, smooth,
+                                      shift)
+            self.setMonoOffset(deltaE)
+            return deltaE
+        if method != 'xcorr':
+            raise ValueError(f"Unknown alignment method {method}")
+        from xastools.align import xcorr_offsets
+        from xastools.utils import refEdges
+        scans = list(np.atleast_1d(y.scan.data))
+        if window is None and edge is not None:
+            nominal = refEdges.get(edge, edge)
+            window = (float(nominal) - 2*width, float(nominal) + 2*width)
+        if reference is not None:
+            reference = scans.index(reference)
+        result = xcorr_offsets(np.atleast_2d(x.data), np.atleast_2d(y.data),
+                               window, reference=reference,
+                               upsample=upsample, maxShift=maxShift)
+        grid, template = result.pop('grid'), result.pop('template')
+        if edge is not None:
+            result['offset'] = result['offset'] + find_mono_offset(
+                grid[np.newaxis], template[np.newaxis], edge, width,
+                smooth, shift)[0]
+        self.setMonoOffset(result['offset'])
+        info = xr.Dataset({k: ('scan', v) for k, v in result.items()},
+                          coords={'scan': scans})
+        info['template'] = xr.DataArray(template, dims='energy',
+                                        coords={'energy': grid})
+        return info
+
+    def scoreScans(self, cols=None, divisor=None, edge=None, refcol='REF',
+                   glitchThreshold=8, normalize=True, exclude=[], **kwargs):
+        """Scores every scan against the median of all scans, without plotting.
+
+        :param cols: columns to compare, defaults to all detector columns
+        :param divisor: passed to getData
+        :param edge: if given, also align refcol to this edge with
+        find_mono_offset and score how far each scan's offset is from the rest
+        :param glitchThreshold: robust z-score above which a point is a glitch
+        :param normalize: scale each scan by its median before comparing
+        :param kwargs: passed to getData
+        :returns: Dataset over scan of residual (median robust |z|),
+        residualZ (how unusual that residual is among scans), glitches,
+        offset and offsetZ (if edge is given), and score, the largest of
+        residualZ and |offsetZ|
+        """
+        if cols is None:
+            coltypes = np.array(inferColTypes(self.columns))
+            cols = [c for c, t in zip(self.columns, coltypes)
+                    if t == 'detector' and c != divisor]
+        x, y = self.getData(cols, divisor=divisor, individual=True,
+                            squeeze=False, exclude=exclude, **kwargs)
+        y = y.transpose('scan', 'index', 'ch')
+        residual, glitches = scan_scores(y.data, glitchThreshold, normalize)
+        residualZ = robust_zscore(residual)
+        score = residualZ
+        result = xr.Dataset({'residual': ('scan', residual),
+                             'residualZ': ('scan', residualZ),
+                             'glitches': ('scan', glitches)},
+                            coords={'scan': y.scan.data})
+        if edge is not None:
+            xr_, yr = self.getData(refcol, individual=True, exclude=exclude,
+                                   **kwargs)
+            offset = find_mono_offset(np.atleast_2d(xr_.data),
+                                      np.atleast_2d(yr.data), edge)
+            offsetZ = robust_zscore(offset)
+            result['offset'] = ('scan', offset)
+            result['offsetZ'] = ('scan', offsetZ)
+            score = np.maximum(score, np.abs(offsetZ))
+        result['score'] = ('scan', score)
+        return result
+
+    def suggestExclude(self, threshold=5, maxGlitches=1, minScans=4,
+                       **kwargs):
+        """Ranks scans from worst to best and suggests which to exclude.
 
-    def checkMonoOffset(self, col='REF', nstack=14, vline=None):
+        :param threshold: exclude scans whose score (see scoreScans) is above
+        :param maxGlitches: exclude scans with more glitches than this
+        :param minScans: suggest no exclusions with fewer scans than this,
+        as the robust scores compare each scan to the median of the others
+        :param kwargs: passed to scoreScans
+        :returns: ranked list of scans (flagged scans first, then by score),
+        list of scans to exclude, which can be passed as getData(exclude=...)
+        """
+        scores = self.scoreScans(**kwargs)
+        bad = (scores.score.data > threshold) | (scores.glitches.data > maxGlitches)
+        if len(bad) < minScans:
+            bad[:] = False
+        # Flagged scans first, then by score
+        order = np.lexsort((-scores.score.data, ~bad))
+        ranked = scores.scan.data[order].tolist()
+        exclude = ranked[:int(bad.sum())]
+        return ranked, exclude
+
+    def checkMonoOffset(self, col='REF', nstack=14, vline=None, filename=None):
+        """
+        Plots the mono-corrected scans of col, nstack per figure
+
+        :param filename: if given, render the pages headlessly to this file
+        instead (see report.ReportRenderer.render) and return the page count
+        """
+        if filename is not None:
+            from xastools.report import renderReport
+            return renderReport(self, col, filename, nstack=nstack,
+                                vline=vline, offsetMono=True)
         figlist, axlist = self.plot(col, individual=True, offsetMono=True,
                                     nstack=nstack)
         if vline:
             for ax in axlist:
                 ax.axvline(vline)
         return figlist, axlist
+
+
+class LazyXAS(XAS):
+    """
+    XAS object whose data is only read when XAS.data is first accessed.
+    Header information is available immediately.
+    """
+
+    def __init__(self, header, loader, dtype=None):
+        """
+        :param header: header dictionary, as returned by the file loaders
+        :param loader: callable returning the 2-d data array
+        :param dtype: storage dtype policy, see storageLayout
+        """
+        self._rawheader = deepcopy(header)
+        self._loader = loader
+        self._dtype = dtype
+        self._data = None
+        scan, offsets, weights, h = convertHeader(deepcopy(header))
+        self._setHeader(**h)
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        if self._data is None:
+            d, h = convertDataHeader(self._loader(), deepcopy(self._rawheader),
+                                     self._dtype, copy=False)
+            self._data = d
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value